@@ -1,24 +1,115 @@
 import os
+import time
+import asyncio
 import logging
 import base64
-from typing import Dict, Any, Optional
-from openai import OpenAI
+import threading
+from concurrent.futures import Executor
+from typing import Dict, Any, Optional, Tuple, List
+from openai import OpenAI, AsyncOpenAI, RateLimitError, APIConnectionError, InternalServerError
 from dotenv import load_dotenv
+from image_processing import remove_background, extraction_settings_from_env
+from rate_limiter import AdaptiveConcurrencyLimiter, RateLimitedError
+from token_budget import estimate_request_tokens
+from taxonomy import (
+    CATEGORIES, COLORS, STYLES, SEASONS, OCCASIONS, LABELS,
+    ANALYSIS_RESPONSE_FORMAT, BATCH_RESPONSE_FORMAT, normalize_label, normalize_result, parse_confidence,
+    parse_json_response
+)
 
 # Load environment variables
 load_dotenv()
 
+# Antwortformat und erlaubte Werte aus der Taxonomie (gemeinsam für Einzel- und Batch-Analyse)
+ANALYSIS_FORMAT = f"""
+{{
+    "category": "Kategorie des Kleidungsstücks",
+    "color": "Hauptfarbe",
+    "style": "Stil des Kleidungsstücks", 
+    "season": "Passende Saison",
+    "material": "Vermutetes Material",
+    "occasion": "Geeigneter Anlass",
+    "confidence": "Vertrauenswert der Analyse (0-1)"
+}}
+
+Kategorien: {', '.join(CATEGORIES)}
+
+Farben: {', '.join(COLORS)}
+
+Stile: {', '.join(STYLES)}
+
+Saisons: {', '.join(SEASONS)}
+
+Anlässe: {', '.join(OCCASIONS)}
+"""
+
+# Vision-Modell für die Analyse (live und Backfill)
+ANALYSIS_MODEL = "gpt-4.1-mini"
+
+# Modelle mit Structured Outputs (response_format json_schema), Präfix-Vergleich
+STRUCTURED_OUTPUT_MODELS = ("gpt-4o", "gpt-4.1", "gpt-5", "o1", "o3", "o4")
+
+
+def cascade_from_env() -> List[Tuple[str, str]]:
+    """
+    Modell-Kaskade aus ENV ANALYSIS_CASCADE, z.B. "gpt-4.1-nano:low,gpt-4.1-mini:high"
+    (eine Stufe = keine Kaskade)
+    
+    Returns:
+        Liste von (Modell, Detailstufe), günstigste zuerst
+    """
+    tiers = []
+    for tier in os.getenv('ANALYSIS_CASCADE', f"gpt-4.1-nano:low,{ANALYSIS_MODEL}:high").split(','):
+        model, _, detail = tier.strip().partition(':')
+        tiers.append((model, detail or "high"))
+    return tiers
+
+
+def supports_structured_output(model: str) -> bool:
+    """
+    Structured Outputs für ein Modell verwenden? ENV ANALYSIS_STRUCTURED_OUTPUT:
+    "auto" (default, bekannte Modelle), "on" oder "off"
+    """
+    mode = os.getenv('ANALYSIS_STRUCTURED_OUTPUT', 'auto').lower()
+    if mode in ('on', 'true', '1'):
+        return True
+    if mode in ('off', 'false', '0'):
+        return False
+    return model.startswith(STRUCTURED_OUTPUT_MODELS)
+
+
+# Prompt für Kleidungsanalyse
+SYSTEM_PROMPT = f"""
+Du bist ein Experte für Kleidung und Mode. Analysiere das hochgeladene Bild eines Kleidungsstücks und gib die Informationen in folgendem JSON-Format zurück:
+{ANALYSIS_FORMAT}
+Antworte NUR mit dem JSON-Objekt, ohne zusätzlichen Text.
+"""
+
+# Prompt für die Batch-Analyse mehrerer Bilder in einem Request
+BATCH_SYSTEM_PROMPT = f"""
+Du bist ein Experte für Kleidung und Mode. Du erhältst mehrere Bilder von Kleidungsstücken, jedes angekündigt mit "Bild <Nummer>".
+Analysiere jedes Bild einzeln und gib ein JSON-Array mit genau einem Objekt pro Bild in derselben Reihenfolge zurück.
+Jedes Objekt enthält zusätzlich das Feld "index" (Nummer des Bildes) und hat folgendes Format:
+{ANALYSIS_FORMAT}
+Antworte NUR mit dem JSON-Array, ohne zusätzlichen Text.
+"""
+
 class ClothingAI:
     """
     AI-Klasse für die Analyse von Kleidungsstücken mit OpenAI Vision API
     """
     
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, executor: Optional[Executor] = None, budget=None,
+                 cascade_stats=None):
         """
         Initialisiert die ClothingAI
         
         Args:
             api_key: OpenAI API Key (falls nicht als ENV Variable gesetzt)
+            executor: Prozess-Pool für die CPU-lastige Hintergrund-Entfernung
+                      (falls nicht gesetzt: Ausführung im aufrufenden Thread)
+            budget: Flottenweites TokenBudget (Redis), optional
+            cascade_stats: CascadeStats für Trefferquoten/Latenz der Kaskadenstufen, optional
         """
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         
@@ -27,158 +118,324 @@ class ClothingAI:
         
         self.client = OpenAI(api_key=self.api_key)
         self.logger = logging.getLogger(__name__)
+        
+        # Analyse-Requests laufen async mit adaptivem Concurrency-Limit; Wiederholungen
+        # übernimmt _create_completion_async (429 vs. echte Fehler), nicht das SDK
+        self.async_client = AsyncOpenAI(api_key=self.api_key, max_retries=0)
+        self.limiter = AdaptiveConcurrencyLimiter()
+        self.budget = budget
+        self.max_attempts = max(1, int(os.getenv('OPENAI_MAX_ATTEMPTS', 3)))
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
+        
+        # Modell-Kaskade: günstige Stufe zuerst, Eskalation unter ANALYSIS_ESCALATION_CONFIDENCE
+        self.cascade = cascade_from_env()
+        self.escalation_confidence = float(os.getenv('ANALYSIS_ESCALATION_CONFIDENCE', 0.7))
+        self.cascade_stats = cascade_stats
+        
+        self.executor = executor
+        self.extraction_settings = extraction_settings_from_env()
     
-    def analyze_clothing_image(self, image_content: bytes) -> Dict[str, Any]:
+    def analyze_clothing_image(self, image_content: bytes, content_type: str = "image/jpeg",
+                               priority: int = 0) -> Dict[str, Any]:
         """
         Analysiert ein Kleidungsstück-Bild mit OpenAI Vision API
+        Über die Modell-Kaskade: günstige Stufe zuerst, Eskalation nur bei niedriger
+        Confidence oder Labels außerhalb der erlaubten Werte
         
         Args:
-            image_content: Binärdaten des Bildes
+            image_content: Binärdaten des Bildes (idealerweise vorverarbeitet, siehe image_processing)
+            content_type: MIME-Type des Bildes (für die Data-URL)
+            priority: Priorität des Jobs (Lane im Token-Budget)
             
         Returns:
             Dict mit erkannten Eigenschaften des Kleidungsstücks
+            
+        Raises:
+            RateLimitedError: Auch nach allen Versuchen gedrosselt oder Token-Budget erschöpft
+            APIConnectionError, InternalServerError: OpenAI nach allen Versuchen nicht erreichbar
         """
         try:
             # Bild zu Base64 konvertieren
             image_base64 = base64.b64encode(image_content).decode('utf-8')
+            return self._analyze_cascade(f"data:{content_type};base64,{image_base64}", priority)
             
-            # Prompt für Kleidungsanalyse
-            system_prompt = """
-            Du bist ein Experte für Kleidung und Mode. Analysiere das hochgeladene Bild eines Kleidungsstücks und gib die Informationen in folgendem JSON-Format zurück:
-
-            {
-                "category": "Kategorie des Kleidungsstücks",
-                "color": "Hauptfarbe",
-                "style": "Stil des Kleidungsstücks", 
-                "season": "Passende Saison",
-                "material": "Vermutetes Material",
-                "occasion": "Geeigneter Anlass",
-                "confidence": "Vertrauenswert der Analyse (0-1)"
-            }
-
-            Kategorien: Oberteil, Hose, Kleid, Rock, Jacke, Mantel, Pullover, T-Shirt, Hemd, Bluse, Shorts, Jeans, Schuhe, Stiefel, Sneaker, Sandalen, Accessoire, Gürtel, Mütze, Schal
-
-            Farben: schwarz, weiß, grau, braun, beige, rot, rosa, orange, gelb, grün, blau, lila, bunt, gemustert
-
-            Stile: casual, elegant, sportlich, business, vintage, modern, bohemian, minimalistisch, extravagant
-
-            Saisons: Frühling, Sommer, Herbst, Winter, Ganzjährig, Übergangszeit
-
-            Anlässe: Alltag, Arbeit, Sport, Freizeit, Ausgehen, Formal, Strand, Zuhause
-
-            Antworte NUR mit dem JSON-Objekt, ohne zusätzlichen Text.
-            """
+        except (AttributeError, IndexError, KeyError, TypeError, ValueError) as e:
+            # Nur unbrauchbare Antworten enden im Fallback; Drosselung (RateLimitedError),
+            # Verbindungs- und 5xx-Fehler gehen an den Worker, der per retry_policy neu einplant
+            self.logger.error(f"Fehler bei der Kleidungsanalyse: {e}")
+            return self._get_fallback_result()
+    
+    def _analyze_cascade(self, image_url: str, priority: int = 0, start_tier: int = 0) -> Dict[str, Any]:
+        """
+        Durchläuft die Kaskadenstufen ab `start_tier` bis ein Ergebnis akzeptiert wird
+        
+        Args:
+            image_url: Data-URL des Bildes
+            priority: Priorität des Jobs
+            start_tier: Erste Stufe (Batch-Analyse hat Stufe 0 bereits ausgeführt)
             
-            # API-Aufruf
-            response = self.client.chat.completions.create(
-                model="gpt-4.1-mini",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": system_prompt
-                    },
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": "Analysiere dieses Kleidungsstück:"
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/jpeg;base64,{image_base64}",
-                                    "detail": "high"
-                                }
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=500,
-                temperature=0.3
-            )
+        Returns:
+            Validiertes Ergebnis (der letzten Stufe, falls keine akzeptiert wurde)
+        """
+        result = None
+        for tier in range(start_tier, len(self.cascade)):
+            model, detail = self.cascade[tier]
+            last = tier == len(self.cascade) - 1
             
-            # Response verarbeiten
-            content = response.choices[0].message.content.strip()
+            started = time.perf_counter()
+            response = self._create_completion(self.build_analysis_request(image_url, model, detail), priority)
+            content = response.choices[0].message.content or ""
             
-            # JSON parsen
-            import json
+            # JSON parsen (toleriert Markdown-Fences und Text um das JSON)
             try:
-                analysis_result = json.loads(content)
-                
-                # Validierung und Defaults
-                result = self._validate_and_normalize_result(analysis_result)
-                
-                self.logger.info(f"Kleidungsanalyse erfolgreich: {result['category']}")
+                raw = parse_json_response(content)
+                result = normalize_result(raw)
+                reason = self._escalation_reason(raw, result)
+            except (AttributeError, TypeError, ValueError):
+                self.logger.error(f"Konnte AI-Response nicht als JSON parsen ({model}): {content}")
+                reason = "keine gültige JSON-Antwort"
+            
+            self._record_tier(tier, time.perf_counter() - started, accepted=reason is None or last)
+            
+            if reason is None:
+                self.logger.info(f"Kleidungsanalyse erfolgreich ({model}, {detail}): {result['category']}")
                 return result
-                
-            except json.JSONDecodeError:
-                self.logger.error(f"Konnte AI-Response nicht als JSON parsen: {content}")
-                return self._get_fallback_result()
-                
-        except Exception as e:
-            self.logger.error(f"Fehler bei der Kleidungsanalyse: {e}")
-            return self._get_fallback_result()
+            if not last:
+                self.logger.info(f"⬆️ Eskalation von {model} ({detail}): {reason}")
+        
+        return result or self._get_fallback_result()
     
-    def _validate_and_normalize_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
+    def _escalation_reason(self, raw: Dict[str, Any], result: Dict[str, Any]) -> Optional[str]:
         """
-        Validiert und normalisiert das AI-Analyseergebnis
+        Prüft ob ein Ergebnis an die nächste Kaskadenstufe eskaliert werden muss
         
         Args:
-            result: Rohes AI-Ergebnis
+            raw: Rohes AI-Ergebnis
+            result: Validiertes Ergebnis
             
         Returns:
-            Validiertes und normalisiertes Ergebnis
+            Grund der Eskalation oder None wenn das Ergebnis akzeptiert wird
         """
-        # Erlaubte Werte definieren
-        allowed_categories = [
-            "Oberteil", "Hose", "Kleid", "Rock", "Jacke", "Mantel", "Pullover", 
-            "T-Shirt", "Hemd", "Bluse", "Shorts", "Jeans", "Schuhe", "Stiefel", 
-            "Sneaker", "Sandalen", "Accessoire", "Gürtel", "Mütze", "Schal"
-        ]
+        defaulted = [field for field in LABELS if normalize_label(field, raw.get(field)) is None]
+        if parse_confidence(raw.get("confidence")) is None:
+            defaulted.append("confidence")
+        if defaulted:
+            return f"Standardwerte für {', '.join(defaulted)}"
+        if result["confidence"] < self.escalation_confidence:
+            return f"Confidence {result['confidence']:.2f} < {self.escalation_confidence:.2f}"
+        return None
+    
+    def _record_tier(self, tier: int, latency: float, accepted: bool, images: int = 1) -> None:
+        """Zählt Treffer und Latenz einer Kaskadenstufe (falls CascadeStats gesetzt)"""
+        if self.cascade_stats is not None:
+            model, detail = self.cascade[tier]
+            self.cascade_stats.record(f"{tier}:{model}:{detail}", latency, accepted, images)
+    
+    def build_analysis_request(self, image_url: str, model: str = ANALYSIS_MODEL,
+                               detail: str = "high") -> Dict[str, Any]:
+        """
+        Baut den Request-Body der Einzel-Analyse (auch für JSONL-Dateien der Batch API, siehe backfill.py)
         
-        allowed_colors = [
-            "schwarz", "weiß", "grau", "braun", "beige", "rot", "rosa", "orange", 
-            "gelb", "grün", "blau", "lila", "bunt", "gemustert"
-        ]
+        Args:
+            image_url: Data-URL oder öffentliche URL des Bildes
+            model: Vision-Modell (default: stärkste Stufe)
+            detail: Bild-Detailstufe "low" oder "high"
         
-        allowed_styles = [
-            "casual", "elegant", "sportlich", "business", "vintage", "modern", 
-            "bohemian", "minimalistisch", "extravagant"
-        ]
+        Returns:
+            Parameter für chat.completions.create
+        """
+        request = {
+            "model": model,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": SYSTEM_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "text",
+                            "text": "Analysiere dieses Kleidungsstück:"
+                        },
+                        {
+                            "type": "image_url",
+                            "image_url": {
+                                "url": image_url,
+                                "detail": detail
+                            }
+                        }
+                    ]
+                }
+            ],
+            "max_tokens": 500,
+            "temperature": 0.3
+        }
+        if supports_structured_output(model):
+            request["response_format"] = ANALYSIS_RESPONSE_FORMAT
+        return request
+    
+    def analyze_clothing_images(self, images: List[Tuple[bytes, str]], priority: int = 0) -> List[Dict[str, Any]]:
+        """
+        Analysiert mehrere Kleidungsstück-Bilder in EINEM Vision-Request
+        (System-Prompt und Round-Trip werden über alle Bilder geteilt)
         
-        allowed_seasons = [
-            "Frühling", "Sommer", "Herbst", "Winter", "Ganzjährig", "Übergangszeit"
+        Args:
+            images: Liste von (Bilddaten, MIME-Type)
+            priority: Höchste Priorität der Jobs im Batch (Lane im Token-Budget)
+            
+        Returns:
+            Liste validierter Ergebnisse in derselben Reihenfolge wie `images`
+            
+        Raises:
+            ValueError: Antwort nicht parsebar oder passt nicht zu den Bildern
+                        (Aufrufer fällt dann auf Einzel-Analysen zurück)
+        """
+        # Batch läuft auf der ersten Kaskadenstufe, unsichere Ergebnisse werden einzeln eskaliert
+        model, detail = self.cascade[0]
+        image_urls = [
+            f"data:{content_type};base64,{base64.b64encode(image_content).decode('utf-8')}"
+            for image_content, content_type in images
         ]
         
-        # Validierung mit Fallbacks
-        validated_result = {
-            "category": result.get("category", "Oberteil"),
-            "color": result.get("color", "unbekannt"),
-            "style": result.get("style", "casual"),
-            "season": result.get("season", "Ganzjährig"),
-            "material": result.get("material", "unbekannt"),
-            "occasion": result.get("occasion", "Alltag"),
-            "confidence": float(result.get("confidence", 0.8))
+        content = [{"type": "text", "text": f"Analysiere diese {len(images)} Kleidungsstücke:"}]
+        for number, image_url in enumerate(image_urls, start=1):
+            content.append({"type": "text", "text": f"Bild {number}"})
+            content.append({
+                "type": "image_url",
+                "image_url": {
+                    "url": image_url,
+                    "detail": detail
+                }
+            })
+        
+        request = {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+                {"role": "user", "content": content}
+            ],
+            "max_tokens": 200 * len(images) + 100,
+            "temperature": 0.3
         }
+        if supports_structured_output(model):
+            request["response_format"] = BATCH_RESPONSE_FORMAT
         
-        # Kategorie validieren
-        if validated_result["category"] not in allowed_categories:
-            validated_result["category"] = "Oberteil"
+        started = time.perf_counter()
+        response = self._create_completion(request, priority)
+        latency = time.perf_counter() - started
         
-        # Farbe validieren
-        if validated_result["color"] not in allowed_colors:
-            validated_result["color"] = "unbekannt"
+        parsed = parse_json_response(response.choices[0].message.content or "")
+        
+        # Toleriert auch {"results": [...]}
+        if isinstance(parsed, dict):
+            parsed = parsed.get("results")
+        if not isinstance(parsed, list) or len(parsed) != len(images):
+            raise ValueError(f"Batch-Antwort enthält {len(parsed) if isinstance(parsed, list) else 0} "
+                             f"statt {len(images)} Ergebnisse")
+        
+        # Zuordnung über "index" (1-basiert), sonst über die Reihenfolge
+        by_index = {}
+        for position, item in enumerate(parsed, start=1):
+            if not isinstance(item, dict):
+                raise ValueError("Batch-Antwort enthält ungültige Einträge")
+            index = item.get("index", position)
+            by_index[int(index) if str(index).isdigit() else position] = item
+        
+        if sorted(by_index) != list(range(1, len(images) + 1)):
+            raise ValueError("Batch-Antwort: Indizes passen nicht zu den Bildern")
+        
+        results = [normalize_result(by_index[number]) for number in range(1, len(images) + 1)]
+        escalate = [] if len(self.cascade) == 1 else [
+            position for position, result in enumerate(results)
+            if self._escalation_reason(by_index[position + 1], result) is not None
+        ]
+        
+        accepted = len(images) - len(escalate)
+        if accepted:
+            self._record_tier(0, latency, accepted=True, images=accepted)
+        if escalate:
+            self._record_tier(0, latency, accepted=False, images=len(escalate))
+        self.logger.info(f"Batch-Kleidungsanalyse erfolgreich: {len(results)} Bilder in einem Request "
+                         f"({len(escalate)} eskaliert)")
+        
+        for position in escalate:
+            try:
+                results[position] = self._analyze_cascade(image_urls[position], priority, start_tier=1)
+            except RateLimitedError:
+                raise
+            except Exception as e:
+                # Ergebnis der ersten Stufe behalten statt den ganzen Batch zu wiederholen
+                self.logger.error(f"Eskalation fehlgeschlagen, behalte Ergebnis von {model}: {e}")
+        
+        return results
+    
+    def _create_completion(self, request: Dict[str, Any], priority: int = 0):
+        """
+        Führt einen Chat-Completion-Request im Event Loop des Limiters aus (blockiert den aufrufenden Thread)
+        
+        Args:
+            request: Parameter für chat.completions.create
+            priority: Priorität des Jobs (Lane im Token-Budget)
             
-        # Stil validieren
-        if validated_result["style"] not in allowed_styles:
-            validated_result["style"] = "casual"
+        Returns:
+            ChatCompletion
             
-        # Saison validieren
-        if validated_result["season"] not in allowed_seasons:
-            validated_result["season"] = "Ganzjährig"
+        Raises:
+            RateLimitedError: Auch nach allen Versuchen gedrosselt oder Token-Budget erschöpft
+        """
+        future = asyncio.run_coroutine_threadsafe(self._create_completion_async(request, priority), self._get_loop())
+        return future.result()
+    
+    async def _create_completion_async(self, request: Dict[str, Any], priority: int = 0):
+        """Request mit Token-Budget und AIMD-Limiter; 429 und Verbindungs-/Serverfehler werden wiederholt"""
+        estimated = estimate_request_tokens(request)
         
-        return validated_result
+        for attempt in range(1, self.max_attempts + 1):
+            reserved = self.budget is not None and await self.budget.acquire_async(estimated, priority)
+            actual = 0
+            try:
+                async with self.limiter.slot():
+                    raw = await self.async_client.chat.completions.with_raw_response.create(**request)
+                self.limiter.on_success(raw.headers)
+                response = raw.parse()
+                actual = response.usage.total_tokens if response.usage else estimated
+                return response
+                
+            except RateLimitError as e:
+                retry_after = self.limiter.on_throttle(e.response.headers)
+                if attempt == self.max_attempts:
+                    raise RateLimitedError(f"OpenAI Rate-Limit nach {attempt} Versuchen: {e}", retry_after) from e
+                # Wartet im nächsten slot() auf das Ende der Pause
+                
+            except (APIConnectionError, InternalServerError) as e:
+                if attempt == self.max_attempts:
+                    raise
+                self.logger.warning(f"⚠️ OpenAI-Fehler (Versuch {attempt}/{self.max_attempts}): {e}")
+                await asyncio.sleep(0.5 * 2 ** attempt)
+            
+            finally:
+                # Reservierung mit der tatsächlichen usage abgleichen (abgelehnte Requests kosten nichts)
+                if reserved:
+                    await self.budget.reconcile_async(estimated, actual, priority)
+    
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Startet bei Bedarf den Event Loop für den async Client in einem Hintergrund-Thread"""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="openai-async", daemon=True).start()
+            return self._loop
+    
+    def close(self) -> None:
+        """Schließt den async Client und beendet den Event Loop"""
+        with self._loop_lock:
+            if self._loop is None:
+                return
+            asyncio.run_coroutine_threadsafe(self.async_client.close(), self._loop).result(timeout=5)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop = None
     
     def _get_fallback_result(self) -> Dict[str, Any]:
         """
@@ -202,24 +459,29 @@ class ClothingAI:
         with open(image_path, "rb") as image_file:
             return base64.b64encode(image_file.read()).decode('utf-8')
     
-    def extract_clothing(self, image_content: bytes) -> bytes:
+    def extract_clothing(self, image_content: bytes) -> Tuple[bytes, str]:
         """
         Extrahiert Kleidungsstücke aus einem Bild (Hintergrund entfernen)
         
-        Für jetzt geben wir das ursprüngliche Bild zurück.
-        TODO: Implementiere echte Hintergrund-Entfernung
+        Randbasierte Farbsegmentierung auf der CPU (siehe image_processing.remove_background),
+        Ergebnis ist ein eng zugeschnittenes RGBA-Bild (WebP oder PNG).
         
         Args:
             image_content: Binärdaten des Bildes
             
         Returns:
-            Bytes des verarbeiteten Bildes
+            Tuple (bytes, content_type) des freigestellten Bildes
         """
         try:
-            # Für jetzt: geben wir das Original-Bild zurück
-            # TODO: Hier echte Hintergrund-Entfernung implementieren
-            self.logger.info("Hintergrund-Entfernung (Placeholder - gibt Original zurück)")
-            return image_content
+            if self.executor is not None:
+                extracted, content_type = self.executor.submit(
+                    remove_background, image_content, **self.extraction_settings
+                ).result()
+            else:
+                extracted, content_type = remove_background(image_content, **self.extraction_settings)
+            
+            self.logger.info(f"Hintergrund entfernt: {len(image_content)} → {len(extracted)} Bytes ({content_type})")
+            return extracted, content_type
             
         except Exception as e:
             self.logger.error(f"Fehler bei der Hintergrund-Entfernung: {e}")
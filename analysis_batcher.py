@@ -0,0 +1,138 @@
+import os
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, List, Tuple
+from rate_limiter import RateLimitedError
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisBatcher:
+    """
+    Micro-Batching der AI-Analyse über parallel laufende Jobs
+    Job-Threads reichen ihr Bild ein und warten auf das Ergebnis; ein Hintergrund-Thread
+    sammelt bis zu `max_batch` Bilder (höchstens `linger` Sekunden ab dem ersten Bild)
+    und analysiert sie in einem einzigen Vision-Request. Mehrere Batches laufen parallel.
+    Scheitert ein Batch, wird jedes Bild einzeln analysiert (außer bei Drosselung durch OpenAI).
+    """
+
+    def __init__(self, ai, max_batch: int = None, linger: float = None, max_in_flight: int = 4):
+        """
+        Args:
+            ai: ClothingAI-Instanz
+            max_batch: Maximale Bilder pro Request (falls nicht gesetzt: ENV ANALYSIS_BATCH_SIZE)
+            linger: Wartezeit in Sekunden auf weitere Bilder (falls nicht gesetzt: ENV ANALYSIS_BATCH_LINGER_MS)
+            max_in_flight: Maximale gleichzeitige Requests (i.d.R. WORKER_CONCURRENCY)
+        """
+        self.ai = ai
+        self.max_batch = max(1, max_batch or int(os.getenv('ANALYSIS_BATCH_SIZE', 4)))
+        self.linger = linger if linger is not None else int(os.getenv('ANALYSIS_BATCH_LINGER_MS', 150)) / 1000
+
+        self._pending: "queue.Queue[Tuple[bytes, str, int, Future]]" = queue.Queue()
+        self._closed = threading.Event()
+        self._thread = None
+        self._executor = None
+
+        # Zähler für Logs
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.images = 0
+        self.fallbacks = 0
+
+        if self.max_batch > 1:
+            self._executor = ThreadPoolExecutor(max_workers=max(1, max_in_flight), thread_name_prefix="analysis")
+            self._thread = threading.Thread(target=self._run, name="analysis-batcher", daemon=True)
+            self._thread.start()
+
+    def analyze(self, image_content: bytes, content_type: str, priority: int = 0) -> Dict[str, Any]:
+        """
+        Analysiert ein Bild, ggf. gebündelt mit Bildern anderer Jobs (blockiert bis zum Ergebnis)
+
+        Args:
+            image_content: Vorverarbeitete Bilddaten
+            content_type: MIME-Type
+            priority: Priorität des Jobs (Lane im Token-Budget)
+
+        Returns:
+            Validiertes Analyseergebnis
+        """
+        if self._thread is None or self._closed.is_set():
+            return self.ai.analyze_clothing_image(image_content, content_type, priority)
+
+        future = Future()
+        self._pending.put((image_content, content_type, priority, future))
+        return future.result()
+
+    def close(self) -> None:
+        """Beendet den Batch-Thread (wartende Bilder werden noch verarbeitet)"""
+        self._closed.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._executor.shutdown(wait=True)
+
+    def _run(self) -> None:
+        """Hintergrund-Thread: Batches sammeln und ausführen"""
+        while not (self._closed.is_set() and self._pending.empty()):
+            try:
+                first = self._pending.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            batch = [first]
+            deadline = time.monotonic() + self.linger
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            if len(batch) == 1:
+                self._executor.submit(self._analyze_single, *batch[0])
+            else:
+                self._executor.submit(self._execute, batch)
+
+    def _execute(self, batch: List[Tuple[bytes, str, int, Future]]) -> None:
+        """Führt einen Batch aus und verteilt die Ergebnisse auf die wartenden Jobs"""
+        try:
+            results = self.ai.analyze_clothing_images(
+                [(image, content_type) for image, content_type, _, _ in batch],
+                priority=max(priority for _, _, priority, _ in batch)
+            )
+        except RateLimitedError as e:
+            # Einzel-Analysen würden das Rate-Limit nur weiter belasten: alle Jobs später erneut
+            for _, _, _, future in batch:
+                future.set_exception(e)
+            return
+        except Exception as e:
+            with self._lock:
+                self.fallbacks += 1
+            logger.warning(f"⚠️ Batch-Analyse fehlgeschlagen ({e}) - Einzel-Analysen für {len(batch)} Bilder")
+            for item in batch:
+                self._analyze_single(*item)
+            return
+
+        self._count(len(batch))
+        for (_, _, _, future), result in zip(batch, results):
+            future.set_result(result)
+        logger.info(f"🧺 {len(batch)} Bilder in einem Request analysiert "
+                    f"(⌀ {self.images / self.requests:.1f} Bilder/Request)")
+
+    def _analyze_single(self, image_content: bytes, content_type: str, priority: int, future: Future) -> None:
+        """Analysiert ein einzelnes Bild (kein zweites Bild im Linger-Fenster oder Batch-Fallback)"""
+        try:
+            future.set_result(self.ai.analyze_clothing_image(image_content, content_type, priority))
+            self._count(1)
+        except Exception as e:
+            future.set_exception(e)
+
+    def _count(self, images: int) -> None:
+        """Zählt einen Request mit `images` Bildern"""
+        with self._lock:
+            self.requests += 1
+            self.images += images
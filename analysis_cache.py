@@ -0,0 +1,123 @@
+import os
+import json
+import time
+import logging
+from typing import Dict, Any, Optional
+from redis_utils import decode_response
+
+logger = logging.getLogger(__name__)
+
+# Bei Änderungen an Prompt, Modell oder Ergebnisformat erhöhen (alte Einträge laufen per TTL aus)
+ANALYSIS_CACHE_VERSION = 2
+
+
+class AnalysisCache:
+    """
+    Redis-Cache für AI-Analyseergebnisse, Key = SHA-256 des Original-Bildes
+    Gleiche Bilder (erneuter Upload, Client-Retry) werden nicht erneut analysiert.
+    Einträge laufen per TTL aus; ein Sorted Set (Score = letzter Zugriff) begrenzt
+    die Anzahl der Einträge (LRU-Verdrängung).
+    """
+
+    def __init__(self, redis_client, async_redis_client=None, ttl: int = None, max_entries: int = None):
+        """
+        Args:
+            redis_client: Sync Redis Client (Worker)
+            async_redis_client: Async Redis Client (API, nur für Stats)
+            ttl: Lebensdauer eines Eintrags in Sekunden (falls nicht gesetzt: ENV ANALYSIS_CACHE_TTL)
+            max_entries: Maximale Anzahl Einträge (falls nicht gesetzt: ENV ANALYSIS_CACHE_MAX_ENTRIES)
+        """
+        self.redis_client = redis_client
+        self.async_redis_client = async_redis_client
+        self.ttl = ttl or int(os.getenv('ANALYSIS_CACHE_TTL', 30 * 24 * 3600))
+        self.max_entries = max_entries or int(os.getenv('ANALYSIS_CACHE_MAX_ENTRIES', 100000))
+
+        self.prefix = f"analysis_cache:v{ANALYSIS_CACHE_VERSION}"
+        self.index_key = f"{self.prefix}:index"
+        self.stats_key = "analysis_cache:stats"
+
+    def _entry_key(self, content_hash: str) -> str:
+        """Key eines Cache-Eintrags"""
+        return f"{self.prefix}:{content_hash}"
+
+    def get(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Holt ein gecachtes Analyseergebnis und zählt Hit/Miss
+
+        Args:
+            content_hash: SHA-256 (hex) des Original-Bildes
+
+        Returns:
+            Analyseergebnis oder None bei Cache-Miss
+        """
+        try:
+            cached = self.redis_client.get(self._entry_key(content_hash))
+
+            pipe = self.redis_client.pipeline(transaction=False)
+            if cached is not None:
+                pipe.zadd(self.index_key, {content_hash: time.time()}, xx=True)
+                pipe.hincrby(self.stats_key, 'hits', 1)
+            else:
+                pipe.hincrby(self.stats_key, 'misses', 1)
+            pipe.execute()
+
+            return json.loads(cached) if cached is not None else None
+        except Exception as e:
+            logger.warning(f"⚠️ Analyse-Cache Lesefehler: {e}")
+            return None
+
+    def put(self, content_hash: str, analysis: Dict[str, Any]) -> None:
+        """
+        Legt ein Analyseergebnis ab und verdrängt bei Bedarf die ältesten Einträge
+
+        Args:
+            content_hash: SHA-256 (hex) des Original-Bildes
+            analysis: Validiertes Analyseergebnis
+        """
+        try:
+            pipe = self.redis_client.pipeline(transaction=True)
+            pipe.set(self._entry_key(content_hash), json.dumps(analysis), ex=self.ttl)
+            pipe.zadd(self.index_key, {content_hash: time.time()})
+            # Per TTL abgelaufene Einträge aus dem Index entfernen
+            pipe.zremrangebyscore(self.index_key, '-inf', time.time() - self.ttl)
+            pipe.zcard(self.index_key)
+            size = pipe.execute()[-1]
+
+            if size > self.max_entries:
+                evicted = self.redis_client.zpopmin(self.index_key, size - self.max_entries)
+                if evicted:
+                    self.redis_client.delete(*(self._entry_key(decode_response(member)) for member, _ in evicted))
+                    self.redis_client.hincrby(self.stats_key, 'evictions', len(evicted))
+        except Exception as e:
+            logger.warning(f"⚠️ Analyse-Cache Schreibfehler: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit/Miss-Zähler und aktuelle Größe des Caches"""
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.hgetall(self.stats_key)
+        pipe.zcard(self.index_key)
+        return self._format_stats(*pipe.execute())
+
+    async def get_stats_async(self) -> Dict[str, Any]:
+        """Async-Variante von get_stats"""
+        pipe = self.async_redis_client.pipeline(transaction=False)
+        pipe.hgetall(self.stats_key)
+        pipe.zcard(self.index_key)
+        return self._format_stats(*await pipe.execute())
+
+    def _format_stats(self, counters: Dict[Any, Any], entries: int) -> Dict[str, Any]:
+        """Baut das Stats-Dict aus den Pipeline-Ergebnissen"""
+        counters = {decode_response(key): int(value) for key, value in counters.items()}
+        hits = counters.get('hits', 0)
+        misses = counters.get('misses', 0)
+        lookups = hits + misses
+
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / lookups, 4) if lookups else None,
+            'evictions': counters.get('evictions', 0),
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl
+        }
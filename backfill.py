@@ -0,0 +1,389 @@
+"""
+Backfill: Re-Analyse der gesamten clothes Tabelle über die OpenAI Batch API
+
+Nach Änderungen an Prompt oder Taxonomie (taxonomy.normalize_result) werden
+alle Kleidungsstücke neu analysiert, ohne die Live-Queue oder das Rate-Limit der Uploads zu belasten:
+
+    prepare  Blättert per Keyset-Pagination durch clothes und schreibt JSONL-Batch-Dateien
+    submit   Lädt vorbereitete Dateien hoch und startet Batches (höchstens --max-active gleichzeitig)
+    poll     Fragt den Batch-Status ab und lädt fertige Ergebnisdateien herunter
+    apply    Validiert die Ergebnisse und schreibt sie per Bulk-Update in die Datenbank
+    run      Alles zusammen, bis alle Batches angewendet sind
+    status   Übersicht des Checkpoints
+
+Jeder Schritt speichert den Fortschritt atomar in <work-dir>/state.json; nach einem Abbruch
+setzt derselbe Befehl dort fort, wo er aufgehört hat.
+Für Tests gegen einen lokalen Stub der Batch API: OPENAI_BASE_URL setzen (vom OpenAI-Client ausgewertet).
+
+Verwendung:
+    python backfill.py run --work-dir backfill_runs/2025-prompt-v2 [--chunk-size 10000] [--limit 1000]
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from typing import Dict, Any, List, Optional
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from ai import ClothingAI
+from database_manager import DatabaseManager
+from taxonomy import parse_json_response, normalize_result
+
+# Load environment variables
+load_dotenv()
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Chunk-Status im Checkpoint
+CHUNK_PREPARED = "prepared"    # JSONL-Datei geschrieben
+CHUNK_UPLOADED = "uploaded"    # Datei bei OpenAI hochgeladen
+CHUNK_SUBMITTED = "submitted"  # Batch läuft
+CHUNK_COMPLETED = "completed"  # Ergebnisdatei heruntergeladen
+CHUNK_APPLIED = "applied"      # Ergebnisse in der Datenbank
+CHUNK_FAILED = "failed"        # Batch fehlgeschlagen/abgebrochen ohne Ergebnisse
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+MAX_REQUESTS_PER_BATCH = 50000  # Limit der Batch API pro Eingabedatei
+
+
+class BackfillState:
+    """Checkpoint eines Backfill-Laufs (JSON-Datei, atomar ersetzt)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.data = {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'last_id': None,          # Letzte vorbereitete clothing_id (Keyset-Cursor)
+            'prepared_all': False,    # Tabelle vollständig durchlaufen
+            'chunks': []
+        }
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.data = json.load(f)
+
+    @property
+    def chunks(self) -> List[Dict[str, Any]]:
+        return self.data['chunks']
+
+    def save(self) -> None:
+        """Schreibt den Checkpoint atomar (tmp-Datei + os.replace)"""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def count(self, status: str) -> int:
+        return sum(1 for chunk in self.chunks if chunk['status'] == status)
+
+
+class Backfill:
+    """Re-Analyse aller Kleidungsstücke über die OpenAI Batch API mit fortsetzbaren Checkpoints"""
+
+    def __init__(self, db: DatabaseManager, ai: ClothingAI, work_dir: str,
+                 chunk_size: int = 10000, page_size: int = 1000, max_active: int = 5):
+        """
+        Args:
+            db: DatabaseManager (Service-Role Key, damit RLS alle Zeilen freigibt)
+            ai: ClothingAI (Request-Body, Validierung und OpenAI-Client)
+            work_dir: Verzeichnis für JSONL-Dateien und Checkpoint
+            chunk_size: Requests pro Batch-Datei (max. 50.000)
+            page_size: Zeilen pro Datenbank-Seite
+            max_active: Maximale gleichzeitig laufende Batches (Enqueued-Token-Limit)
+        """
+        self.db = db
+        self.ai = ai
+        self.client = ai.client
+        self.work_dir = work_dir
+        self.chunk_size = min(chunk_size, MAX_REQUESTS_PER_BATCH)
+        self.page_size = min(page_size, self.chunk_size)
+        self.max_active = max_active
+
+        os.makedirs(work_dir, exist_ok=True)
+        self.state = BackfillState(os.path.join(work_dir, 'state.json'))
+
+    def _path(self, filename: str) -> str:
+        return os.path.join(self.work_dir, filename)
+
+    # ======================
+    # PREPARE
+    # ======================
+
+    def prepare(self, limit: int = None) -> int:
+        """
+        Schreibt JSONL-Batch-Dateien ab dem letzten Checkpoint
+
+        Args:
+            limit: Maximale Anzahl Kleidungsstücke insgesamt (None = ganze Tabelle)
+
+        Returns:
+            Anzahl neu vorbereiteter Requests
+        """
+        prepared = 0
+        total = sum(chunk['count'] for chunk in self.state.chunks)
+
+        while not self.state.data['prepared_all']:
+            if limit is not None and total >= limit:
+                break
+
+            # Eine unvollständige Datei (Abbruch vor dem Checkpoint) wird einfach neu geschrieben
+            index = len(self.state.chunks)
+            filename = f"chunk_{index:05d}.jsonl"
+            capacity = self.chunk_size if limit is None else min(self.chunk_size, limit - total)
+            last_id = self.state.data['last_id']
+            count = 0
+            exhausted = False
+
+            with open(self._path(filename), 'w', encoding='utf-8') as f:
+                while count < capacity:
+                    page = self.db.get_clothing_items_page(after_id=last_id, limit=min(self.page_size, capacity - count))
+                    if not page:
+                        exhausted = True
+                        break
+
+                    for item in page:
+                        line = self._build_request_line(item)
+                        if line:
+                            f.write(line)
+                            count += 1
+                    last_id = page[-1]['id']
+
+            if count:
+                self.state.chunks.append({
+                    'index': index,
+                    'file': filename,
+                    'count': count,
+                    'status': CHUNK_PREPARED,
+                    'input_file_id': None,
+                    'batch_id': None,
+                    'output_file_id': None,
+                    'applied': 0,
+                    'errors': 0
+                })
+            else:
+                os.remove(self._path(filename))
+
+            self.state.data['last_id'] = last_id
+            self.state.data['prepared_all'] = exhausted
+            self.state.save()
+
+            prepared += count
+            total += count
+            if count:
+                logger.info(f"📝 {filename}: {count} Requests vorbereitet (Cursor: {last_id})")
+
+        return prepared
+
+    def _build_request_line(self, item: Dict[str, Any]) -> Optional[str]:
+        """Eine JSONL-Zeile der Batch API; nutzt das kleinste vorhandene Bild-Derivat"""
+        image_url = item.get('medium_image_url') or item.get('extracted_image_url') or item.get('image_url')
+        if not image_url:
+            logger.warning(f"⚠️ Kein Bild für {item['id']} - übersprungen")
+            return None
+
+        return json.dumps({
+            'custom_id': item['id'],
+            'method': 'POST',
+            'url': BATCH_ENDPOINT,
+            'body': self.ai.build_analysis_request(image_url)
+        }, ensure_ascii=False) + "\n"
+
+    # ======================
+    # SUBMIT / POLL
+    # ======================
+
+    def submit(self) -> int:
+        """
+        Lädt vorbereitete Dateien hoch und startet Batches bis max_active erreicht ist
+
+        Returns:
+            Anzahl gestarteter Batches
+        """
+        started = 0
+        for chunk in self.state.chunks:
+            if self.state.count(CHUNK_SUBMITTED) >= self.max_active:
+                break
+
+            if chunk['status'] == CHUNK_PREPARED:
+                with open(self._path(chunk['file']), 'rb') as f:
+                    uploaded = self.client.files.create(file=f, purpose='batch')
+                chunk['input_file_id'] = uploaded.id
+                chunk['status'] = CHUNK_UPLOADED
+                self.state.save()
+
+            if chunk['status'] == CHUNK_UPLOADED:
+                batch = self.client.batches.create(
+                    input_file_id=chunk['input_file_id'],
+                    endpoint=BATCH_ENDPOINT,
+                    completion_window='24h',
+                    metadata={'purpose': 'wardroberry-backfill', 'chunk': chunk['file']}
+                )
+                chunk['batch_id'] = batch.id
+                chunk['status'] = CHUNK_SUBMITTED
+                self.state.save()
+
+                started += 1
+                logger.info(f"🚀 Batch {batch.id} gestartet ({chunk['file']}, {chunk['count']} Requests)")
+
+        return started
+
+    def poll(self) -> int:
+        """
+        Prüft laufende Batches und lädt Ergebnisdateien herunter
+
+        Returns:
+            Anzahl neu abgeschlossener Batches
+        """
+        finished = 0
+        for chunk in self.state.chunks:
+            if chunk['status'] != CHUNK_SUBMITTED:
+                continue
+
+            batch = self.client.batches.retrieve(chunk['batch_id'])
+            counts = batch.request_counts
+            if counts:
+                logger.info(f"⏳ {batch.id}: {batch.status} ({counts.completed}/{counts.total}, {counts.failed} Fehler)")
+
+            if batch.status not in ('completed', 'failed', 'expired', 'cancelled'):
+                continue
+
+            # Auch abgelaufene/abgebrochene Batches liefern Teilergebnisse
+            if batch.output_file_id:
+                content = self.client.files.content(batch.output_file_id)
+                output_file = chunk['file'].replace('.jsonl', '.output.jsonl')
+                with open(self._path(output_file), 'wb') as f:
+                    f.write(content.read())
+                chunk['output_file_id'] = batch.output_file_id
+                chunk['status'] = CHUNK_COMPLETED
+            else:
+                logger.error(f"❌ Batch {batch.id} ohne Ergebnisse beendet: {batch.status} {batch.errors}")
+                chunk['status'] = CHUNK_FAILED
+
+            self.state.save()
+            finished += 1
+
+        return finished
+
+    # ======================
+    # APPLY
+    # ======================
+
+    def apply(self) -> int:
+        """
+        Validiert heruntergeladene Ergebnisse und schreibt sie per Bulk-Update in die Datenbank
+
+        Returns:
+            Anzahl aktualisierter Kleidungsstücke
+        """
+        applied = 0
+        for chunk in self.state.chunks:
+            if chunk['status'] != CHUNK_COMPLETED:
+                continue
+
+            analyses = self._parse_output(self._path(chunk['file'].replace('.jsonl', '.output.jsonl')))
+            updated = self.db.bulk_update_clothing_analysis(analyses)
+
+            chunk['applied'] = updated
+            chunk['errors'] = chunk['count'] - len(analyses)  # inkl. fehlender Zeilen
+            chunk['status'] = CHUNK_APPLIED
+            self.state.save()
+
+            applied += updated
+            logger.info(f"✅ {chunk['file']}: {updated} aktualisiert, {chunk['errors']} ohne Ergebnis")
+
+        return applied
+
+    def _parse_output(self, path: str) -> Dict[str, Dict[str, Any]]:
+        """Liest eine Ergebnisdatei der Batch API: Dict clothing_id -> validierte Analyse"""
+        analyses = {}
+
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get('response') or {}
+
+                try:
+                    if record.get('error') or response.get('status_code') != 200:
+                        raise ValueError(record.get('error') or response.get('status_code'))
+
+                    content = response['body']['choices'][0]['message']['content'] or ''
+                    analyses[record['custom_id']] = normalize_result(parse_json_response(content))
+                except (ValueError, KeyError, IndexError, TypeError) as e:
+                    logger.warning(f"⚠️ Ungültiges Ergebnis für {record.get('custom_id')}: {e}")
+
+        return analyses
+
+    # ======================
+    # RUN / STATUS
+    # ======================
+
+    def run(self, limit: int = None, poll_interval: int = 60) -> None:
+        """Kompletter Lauf: vorbereiten, einreichen, abfragen und anwenden bis alles erledigt ist"""
+        self.prepare(limit)
+
+        while True:
+            self.submit()
+            self.poll()
+            self.apply()
+
+            open_chunks = len(self.state.chunks) - self.state.count(CHUNK_APPLIED) - self.state.count(CHUNK_FAILED)
+            if open_chunks == 0:
+                break
+            time.sleep(poll_interval)
+
+    def print_status(self) -> None:
+        """Gibt eine Übersicht des Checkpoints aus"""
+        chunks = self.state.chunks
+        print(f"Arbeitsverzeichnis: {self.work_dir}")
+        print(f"Tabelle vollständig vorbereitet: {'ja' if self.state.data['prepared_all'] else 'nein'} "
+              f"(Cursor: {self.state.data['last_id']})")
+        print(f"Requests: {sum(c['count'] for c in chunks)}, aktualisiert: {sum(c['applied'] for c in chunks)}, "
+              f"ohne Ergebnis: {sum(c['errors'] for c in chunks)}")
+        for status in (CHUNK_PREPARED, CHUNK_UPLOADED, CHUNK_SUBMITTED, CHUNK_COMPLETED, CHUNK_APPLIED, CHUNK_FAILED):
+            print(f"  {status:<10} {self.state.count(status):>5} Dateien")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-Analyse der clothes Tabelle über die OpenAI Batch API")
+    parser.add_argument("command", choices=["prepare", "submit", "poll", "apply", "run", "status"])
+    parser.add_argument("--work-dir", default="backfill_runs/default", help="Verzeichnis für Dateien und Checkpoint")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Requests pro Batch (max. 50.000)")
+    parser.add_argument("--limit", type=int, help="Maximale Anzahl Kleidungsstücke")
+    parser.add_argument("--max-active", type=int, default=5, help="Gleichzeitig laufende Batches")
+    parser.add_argument("--poll-interval", type=int, default=60, help="Sekunden zwischen Abfragen (run)")
+    args = parser.parse_args()
+
+    # Service-Role Key umgeht RLS (sonst sind nur die Zeilen des anon Users sichtbar)
+    db = DatabaseManager(supabase_key=os.getenv('SUPABASE_SERVICE_ROLE_KEY'))
+    backfill = Backfill(db, ClothingAI(), args.work_dir, chunk_size=args.chunk_size, max_active=args.max_active)
+
+    try:
+        if args.command == "prepare":
+            backfill.prepare(args.limit)
+        elif args.command == "submit":
+            backfill.submit()
+        elif args.command == "poll":
+            backfill.poll()
+        elif args.command == "apply":
+            backfill.apply()
+        elif args.command == "run":
+            backfill.run(args.limit, args.poll_interval)
+        backfill.print_status()
+    except KeyboardInterrupt:
+        logger.info("🛑 Abgebrochen - Fortsetzung mit demselben Befehl ab dem letzten Checkpoint")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
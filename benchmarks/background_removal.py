@@ -0,0 +1,60 @@
+"""
+Hintergrund-Entfernung: Bilder/Sekunde pro Kern und Skalierung im Prozess-Pool
+
+Misst remove_background zuerst in einem Prozess (= Bilder/s pro Kern), danach den
+Gesamtdurchsatz mit 1..N Prozessen im ProcessPoolExecutor (wie im Worker).
+Mit --output wird das Ergebnis zur Sichtkontrolle gespeichert.
+
+Verwendung:
+    python benchmarks/background_removal.py [--image test_images/jeans.jpg] [--images 40] [--processes 1,2,4]
+"""
+import os
+import sys
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from image_processing import remove_background, extraction_settings_from_env  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Durchsatz der Hintergrund-Entfernung")
+    parser.add_argument("--image", default=os.path.join(os.path.dirname(__file__), "..", "test_images", "jeans.jpg"))
+    parser.add_argument("--images", type=int, default=40)
+    parser.add_argument("--processes", default=",".join(str(n) for n in sorted({1, 2, os.cpu_count() or 1})))
+    parser.add_argument("--output", help="Pfad für das freigestellte Ergebnis")
+    args = parser.parse_args()
+
+    settings = extraction_settings_from_env()
+    with open(args.image, "rb") as f:
+        image = f.read()
+
+    extracted, content_type = remove_background(image, **settings)  # Warm-up
+    print(f"Bild: {args.image} ({len(image):,} Bytes) → {len(extracted):,} Bytes {content_type}")
+    if args.output:
+        with open(args.output, "wb") as f:
+            f.write(extracted)
+
+    start = time.perf_counter()
+    for _ in range(args.images):
+        remove_background(image, **settings)
+    elapsed = time.perf_counter() - start
+    print(f"1 Prozess (ohne Pool):  {args.images / elapsed:6.2f} Bilder/s pro Kern  "
+          f"({elapsed / args.images * 1000:.0f} ms/Bild)")
+
+    for processes in (int(x) for x in args.processes.split(",")):
+        with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn')) as pool:
+            list(pool.map(remove_background, [image] * processes))  # Prozesse starten
+            start = time.perf_counter()
+            futures = [pool.submit(remove_background, image, **settings) for _ in range(args.images)]
+            for future in futures:
+                future.result()
+            elapsed = time.perf_counter() - start
+        print(f"Pool mit {processes:>2} Prozessen:  {args.images / elapsed:6.2f} Bilder/s gesamt, "
+              f"{args.images / elapsed / processes:6.2f} pro Prozess")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Lokale Farb- und Musteranalyse: Bilder/Sekunde pro Kern und Skalierung im Prozess-Pool
+
+Misst analyze_colors auf dem freigestellten Bild (wie im Worker) zuerst in einem Prozess,
+danach den Gesamtdurchsatz mit 1..N Prozessen im ProcessPoolExecutor.
+Mit --clusters/--sample-edge lassen sich Genauigkeit und Geschwindigkeit abwägen.
+
+Verwendung:
+    python benchmarks/color_analysis.py [--image test_images/jeans.jpg] [--images 200] [--processes 1,2,4]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from image_processing import analyze_colors, remove_background  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Durchsatz der lokalen Farbanalyse")
+    parser.add_argument("--image", default=os.path.join(os.path.dirname(__file__), "..", "test_images", "jeans.jpg"))
+    parser.add_argument("--images", type=int, default=200)
+    parser.add_argument("--processes", default=",".join(str(n) for n in sorted({1, 2, os.cpu_count() or 1})))
+    parser.add_argument("--clusters", type=int, default=5)
+    parser.add_argument("--sample-edge", type=int, default=96)
+    args = parser.parse_args()
+
+    with open(args.image, "rb") as f:
+        extracted, _ = remove_background(f.read())
+    settings = {"clusters": args.clusters, "sample_edge": args.sample_edge}
+
+    result = analyze_colors(extracted, **settings)  # Warm-up
+    print(f"Bild: {args.image} (freigestellt {len(extracted):,} Bytes)")
+    print(f"Ergebnis: {result['color']} (Anteil {result['confidence']:.0%}, Muster {result['pattern_score']:.3f})")
+    print(f"Palette: {json.dumps(result['palette'], ensure_ascii=False)}")
+
+    start = time.perf_counter()
+    for _ in range(args.images):
+        analyze_colors(extracted, **settings)
+    elapsed = time.perf_counter() - start
+    print(f"1 Prozess (ohne Pool):  {args.images / elapsed:7.1f} Bilder/s pro Kern  "
+          f"({elapsed / args.images * 1000:.1f} ms/Bild)")
+
+    for processes in (int(x) for x in args.processes.split(",")):
+        with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('spawn')) as pool:
+            list(pool.map(analyze_colors, [extracted] * processes))  # Prozesse starten
+            start = time.perf_counter()
+            futures = [pool.submit(analyze_colors, extracted, **settings) for _ in range(args.images)]
+            for future in futures:
+                future.result()
+            elapsed = time.perf_counter() - start
+        print(f"Pool mit {processes:>2} Prozessen:  {args.images / elapsed:7.1f} Bilder/s gesamt, "
+              f"{args.images / elapsed / processes:7.1f} pro Prozess")
+
+
+if __name__ == "__main__":
+    main()
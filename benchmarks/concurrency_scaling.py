@@ -0,0 +1,37 @@
+"""
+Durchsatz-Benchmark: Requests/Sekunde in Abhängigkeit der gleichzeitigen Requests
+gegen EINEN API-Prozess (z.B. `uvicorn main:app --workers 1`)
+
+Blockierende I/O im Event Loop zeigt sich als flache Kurve (req/s steigt nicht mit
+der Anzahl paralleler Requests), ein echter async Pfad skaliert bis zum I/O-Limit.
+
+Verwendung:
+    python benchmarks/concurrency_scaling.py --token <jwt> --clothing-id <uuid>
+"""
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from http_load import run_load, format_row  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="req/s vs. parallele Requests")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--clothing-id", required=True)
+    parser.add_argument("--requests-per-level", type=int, default=200)
+    parser.add_argument("--levels", default="1,2,4,8,16,32,64")
+    args = parser.parse_args()
+
+    url = f"{args.base_url}/clothing/{args.clothing_id}/status"
+    headers = {"Authorization": f"Bearer {args.token}"}
+
+    for level in (int(x) for x in args.levels.split(",")):
+        stats = run_load(url, max(args.requests_per_level, level), level, headers=headers)
+        print(format_row("GET /clothing/{id}/status", stats))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Latenz-Benchmark (p50/p99) pro Endpoint gegen eine laufende Wardroberry API
+
+Vergleich vorher/nachher: Benchmark einmal gegen den alten und einmal gegen den
+neuen Stand laufen lassen (gleiche Parameter, gleiche Redis-/Supabase-Instanz).
+
+Verwendung:
+    python benchmarks/endpoint_latency.py --token <jwt> --clothing-id <uuid>
+"""
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from http_load import build_multipart, run_load, format_row  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="p50/p99 Latenz pro Endpoint")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--token", required=True, help="Supabase JWT für die Auth-Endpoints")
+    parser.add_argument("--clothing-id", help="Existierende Kleidungsstück-ID für den Status-Endpoint")
+    parser.add_argument("--image", default=os.path.join(os.path.dirname(__file__), "..", "test_images", "jeans.jpg"))
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--uploads", type=int, default=20, help="Anzahl Uploads (erzeugen echte Jobs!)")
+    args = parser.parse_args()
+
+    auth = {"Authorization": f"Bearer {args.token}"}
+
+    print(format_row("GET /health", run_load(f"{args.base_url}/health", args.requests, args.concurrency)))
+
+    if args.clothing_id:
+        stats = run_load(f"{args.base_url}/clothing/{args.clothing_id}/status",
+                         args.requests, args.concurrency, headers=auth)
+        print(format_row("GET /clothing/{id}/status", stats))
+
+    if args.uploads:
+        body, content_type = build_multipart(args.image)
+        stats = run_load(f"{args.base_url}/upload-clothing", args.uploads, min(args.concurrency, args.uploads),
+                         method="POST", body=body, headers={**auth, "Content-Type": content_type})
+        print(format_row("POST /upload-clothing", stats))
+
+
+if __name__ == "__main__":
+    main()
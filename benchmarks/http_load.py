@@ -0,0 +1,88 @@
+"""
+Gemeinsame Helfer für die HTTP-Benchmarks gegen eine laufende Wardroberry API
+(nur Standardbibliothek, damit die Benchmarks ohne Zusatzpakete laufen)
+"""
+import time
+import uuid
+import statistics
+import urllib.request
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+
+def build_multipart(file_path: str, content_type: str = "image/jpeg", field: str = "file") -> tuple:
+    """
+    Baut einen multipart/form-data Body für einen Datei-Upload
+
+    Returns:
+        Tuple (body, content_type_header)
+    """
+    boundary = uuid.uuid4().hex
+    with open(file_path, "rb") as f:
+        file_bytes = f.read()
+
+    file_name = file_path.rsplit("/", 1)[-1]
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{file_name}"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode() + file_bytes + f"\r\n--{boundary}--\r\n".encode()
+
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def timed_request(url: str, method: str = "GET", body: Optional[bytes] = None,
+                  headers: Optional[Dict[str, str]] = None, timeout: float = 60) -> tuple:
+    """
+    Führt einen Request aus und misst die Latenz
+
+    Returns:
+        Tuple (latency_seconds, status_code)
+    """
+    request = urllib.request.Request(url, data=body, method=method, headers=headers or {})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception:
+        status = 0
+    return time.perf_counter() - start, status
+
+
+def run_load(url: str, requests: int, concurrency: int, method: str = "GET",
+             body: Optional[bytes] = None, headers: Optional[Dict[str, str]] = None) -> Dict[str, float]:
+    """
+    Feuert `requests` Requests mit `concurrency` parallelen Clients ab
+
+    Returns:
+        Dict mit p50/p99 (ms), Durchsatz (req/s) und Fehleranzahl
+    """
+    def one(_):
+        return timed_request(url, method=method, body=body, headers=headers)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results: List[tuple] = list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - start
+
+    latencies = sorted(r[0] * 1000 for r in results)
+    errors = sum(1 for _, status in results if status == 0 or status >= 500)
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        "rps": requests / wall if wall else 0.0,
+        "errors": errors,
+    }
+
+
+def format_row(name: str, stats: Dict[str, float]) -> str:
+    """Formatiert eine Ergebniszeile für die Konsole"""
+    return (f"{name:<28} c={stats['concurrency']:<4} p50={stats['p50_ms']:8.1f}ms "
+            f"p99={stats['p99_ms']:8.1f}ms  {stats['rps']:8.1f} req/s  errors={stats['errors']}")
@@ -0,0 +1,93 @@
+"""
+Vorverarbeitung vor der AI-Analyse: gesparte Bytes, Vision-Tokens und Latenz pro Bild
+
+Offline: Payload-Größe (Base64 in der Data-URL), geschätzte Vision-Tokens bei
+"detail": "high" und Dauer der Vorverarbeitung.
+Mit --live zusätzlich die Latenz echter OpenAI-Aufrufe mit Original vs. vorverarbeitetem
+Bild (kostet API-Guthaben, benötigt OPENAI_API_KEY).
+
+Verwendung:
+    python benchmarks/image_preprocessing.py [--image test_images/jeans.jpg] [--live --calls 5]
+"""
+import io
+import os
+import sys
+import math
+import time
+import base64
+import argparse
+import statistics
+
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from image_processing import prepare_for_analysis  # noqa: E402
+
+
+def vision_tokens(width: int, height: int) -> int:
+    """Token-Schätzung für detail=high: in 2048² einpassen, kurze Seite auf 768, 170 Tokens pro 512er-Kachel"""
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    return 85 + 170 * math.ceil(width / 512) * math.ceil(height / 512)
+
+
+def describe(data: bytes) -> tuple:
+    with Image.open(io.BytesIO(data)) as image:
+        width, height = image.size
+    return len(base64.b64encode(data)), vision_tokens(width, height), f"{width}x{height}"
+
+
+def time_calls(ai, image: bytes, content_type: str, calls: int) -> float:
+    durations = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        ai.analyze_clothing_image(image, content_type)
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bytes/Tokens/Latenz der Bild-Vorverarbeitung")
+    parser.add_argument("--image", default=os.path.join(os.path.dirname(__file__), "..", "test_images", "jeans.jpg"))
+    parser.add_argument("--max-edges", default="512,768,1024,1536")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--live", action="store_true", help="Echte OpenAI-Aufrufe messen")
+    parser.add_argument("--calls", type=int, default=5)
+    args = parser.parse_args()
+
+    with open(args.image, "rb") as f:
+        original = f.read()
+
+    payload, tokens, size = describe(original)
+    print(f"{'Variante':<18} {'Größe':>10} {'Payload (B64)':>14} {'Tokens':>7} {'Vorverarb.':>11}")
+    print(f"{'Original':<18} {size:>10} {payload:>14,} {tokens:>7} {'-':>11}")
+
+    variants = []
+    for max_edge in (int(x) for x in args.max_edges.split(",")):
+        for output_format in ("jpeg", "webp"):
+            start = time.perf_counter()
+            for _ in range(args.iterations):
+                prepared, content_type = prepare_for_analysis(original, max_edge, output_format)
+            prep_ms = (time.perf_counter() - start) / args.iterations * 1000
+
+            prepared_payload, prepared_tokens, prepared_size = describe(prepared)
+            label = f"{output_format} {max_edge}"
+            print(f"{label:<18} {prepared_size:>10} {prepared_payload:>14,} {prepared_tokens:>7} {prep_ms:>9.1f}ms"
+                  f"   (-{1 - prepared_payload / payload:.0%} Bytes)")
+            variants.append((label, prepared, content_type))
+
+    if args.live:
+        from ai import ClothingAI
+
+        ai = ClothingAI()
+        print(f"\nOpenAI-Latenz (Median aus {args.calls} Aufrufen):")
+        print(f"  Original: {time_calls(ai, original, 'image/jpeg', args.calls):.0f}ms")
+        for label, prepared, content_type in variants:
+            if label in ("jpeg 1024", "webp 1024"):
+                print(f"  {label}: {time_calls(ai, prepared, content_type, args.calls):.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Job-Serialisierung: Bytes pro Job und Encode/Decode-Zeit
+
+Vergleicht das alte Job-Format (JSON + Base64-Bild), den JSON-Claim-Check,
+den msgpack-Umschlag und den msgpack-Umschlag mit Rohbytes + Kompression.
+Die Job-Größe bestimmt Redis-Speicher und Netzwerk-Bytes pro LMOVE/XADD.
+
+Verwendung:
+    python benchmarks/job_size.py [--image test_images/jeans.jpg] [--iterations 2000]
+"""
+import os
+import sys
+import json
+import time
+import base64
+import argparse
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from job_codec import JobCodec  # noqa: E402
+
+
+def claim_check_job() -> dict:
+    return {
+        'clothing_id': '3f6c2a1e-8d4b-4c1a-9f2e-7b5d0c9a1e23',
+        'user_id': 'b1e7d9c4-2a6f-4e8b-8c3d-5f1a9e7b2c60',
+        'storage_bucket': 'clothing-images-original',
+        'storage_path': 'b1e7d9c4-2a6f-4e8b-8c3d-5f1a9e7b2c60/3f6c2a1e8d4b4c1a9f2e7b5d0c9a1e23.jpg',
+        'file_name': 'jeans.jpg',
+        'content_type': 'image/jpeg',
+        'file_size': 183421,
+        'created_at': datetime.utcnow().isoformat(),
+        'retry_count': 0,
+        'priority': 0
+    }
+
+
+def measure(name: str, encode, decode, job: dict, iterations: int) -> None:
+    payload = encode(job)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        encode(job)
+    encode_us = (time.perf_counter() - start) / iterations * 1e6
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        decode(payload)
+    decode_us = (time.perf_counter() - start) / iterations * 1e6
+
+    print(f"{name:<36} {len(payload):>10,} B  encode {encode_us:>9.1f} µs  decode {decode_us:>9.1f} µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Job-Größe und Serialisierungszeit")
+    parser.add_argument("--image", default=os.path.join(os.path.dirname(__file__), "..", "test_images", "jeans.jpg"))
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    with open(args.image, "rb") as f:
+        image = f.read()
+
+    job = claim_check_job()
+    job['file_size'] = len(image)
+
+    legacy_job = dict(job, file_content_b64=base64.b64encode(image).decode('utf-8'))
+    embedded_job = dict(job, file_content=image)
+
+    json_codec = JobCodec(job_format='json')
+    msgpack_codec = JobCodec(job_format='msgpack', compression='none')
+    zstd_codec = JobCodec(job_format='msgpack', compression='zstd')
+
+    print(f"Bild: {args.image} ({len(image):,} Bytes), {args.iterations} Iterationen\n")
+    measure("Legacy JSON + Base64", json_codec.encode, json_codec.decode, legacy_job, max(args.iterations // 20, 10))
+    measure("msgpack + Rohbytes", msgpack_codec.encode, msgpack_codec.decode, embedded_job, max(args.iterations // 20, 10))
+    measure("msgpack + Rohbytes + zstd", zstd_codec.encode, zstd_codec.decode, embedded_job, max(args.iterations // 20, 10))
+    measure("Claim-Check JSON", lambda j: json.dumps(j), json.loads, job, args.iterations)
+    measure("Claim-Check msgpack", msgpack_codec.encode, msgpack_codec.decode, job, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Speicher-Benchmark: RSS des API-Prozesses bei vielen parallelen Uploads
+
+Schickt --uploads gleichzeitige Uploads (--size-mb groß) an eine laufende API und liest
+währenddessen VmRSS des Server-Prozesses aus /proc (nur Linux). Mit Streaming-Uploads
+sollte die Spitze kaum über dem Ausgangswert liegen statt mit Parallelität × Dateigröße zu wachsen.
+
+Ohne --unique haben alle Uploads denselben Inhalt: nach dem ersten greift der Duplikat-Check
+(der Body wird trotzdem vollständig gestreamt), es entsteht nur ein Job. Mit --unique bekommt
+jeder Upload eigene Zufallsbytes hinter dem JPEG (erzeugt echte Jobs und Storage-Objekte!).
+
+Verwendung:
+    python benchmarks/upload_memory.py --token <jwt> --pid <PID des uvicorn-Workers> [--uploads 100] [--size-mb 8]
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from http_load import build_multipart, timed_request  # noqa: E402
+
+
+def read_rss_mb(pid: int) -> float:
+    """Resident Set Size eines Prozesses in MB"""
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def padded_body(image: bytes, size: int, boundary_body: tuple) -> tuple:
+    """Multipart-Body mit dem Bild plus Zufallsbytes bis `size` (JPEG-Decoder ignorieren Daten nach EOI)"""
+    body, content_type = boundary_body
+    head, tail = body.split(image, 1)
+    return head + image + os.urandom(max(0, size - len(image))) + tail, content_type
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RSS des API-Prozesses bei parallelen Uploads")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--token", required=True, help="Supabase JWT")
+    parser.add_argument("--pid", type=int, required=True, help="PID des API-Prozesses (bei --reload der Worker)")
+    parser.add_argument("--image", default=os.path.join(os.path.dirname(__file__), "..", "test_images", "jeans.jpg"))
+    parser.add_argument("--uploads", type=int, default=100)
+    parser.add_argument("--size-mb", type=float, default=8)
+    parser.add_argument("--unique", action="store_true", help="Eigener Inhalt pro Upload (echte Jobs)")
+    args = parser.parse_args()
+
+    with open(args.image, "rb") as f:
+        image = f.read()
+    size = int(args.size_mb * 1024 * 1024)
+    multipart = build_multipart(args.image)
+    shared_body, content_type = padded_body(image, size, multipart)
+    headers = {"Authorization": f"Bearer {args.token}", "Content-Type": content_type}
+
+    baseline = read_rss_mb(args.pid)
+    samples = [baseline]
+    done = threading.Event()
+
+    def sample():
+        while not done.is_set():
+            samples.append(read_rss_mb(args.pid))
+            time.sleep(0.02)
+
+    def upload(_):
+        body = padded_body(image, size, multipart)[0] if args.unique else shared_body
+        return timed_request(f"{args.base_url}/upload-clothing", method="POST", body=body,
+                             headers=headers, timeout=300)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.uploads) as pool:
+        results = list(pool.map(upload, range(args.uploads)))
+    wall = time.perf_counter() - start
+    done.set()
+    sampler.join()
+
+    statuses = {}
+    for _, status in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    peak = max(samples)
+    total_mb = args.uploads * size / (1024 * 1024)
+
+    print(f"{args.uploads} parallele Uploads à {args.size_mb:.1f}MB ({total_mb:.0f}MB gesamt) in {wall:.1f}s, "
+          f"Status: {statuses}")
+    print(f"RSS Ausgangswert: {baseline:8.1f}MB")
+    print(f"RSS Spitze:       {peak:8.1f}MB  (+{peak - baseline:.1f}MB, "
+          f"{(peak - baseline) / args.uploads:.2f}MB pro gleichzeitigem Upload)")
+    print(f"RSS danach:       {read_rss_mb(args.pid):8.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import logging
+from typing import Dict, Any, List
+from redis_utils import decode_response
+
+logger = logging.getLogger(__name__)
+
+# Obergrenzen der Latenz-Buckets in Millisekunden (letzter Bucket = alles darüber)
+LATENCY_BUCKETS_MS = (250, 500, 1000, 2000, 4000, 8000, 16000)
+
+
+class CascadeStats:
+    """
+    Trefferquoten und Latenzen der Modell-Kaskade pro Stufe, flottenweit in Redis
+    Pro Stufe: Aufrufe, akzeptierte Ergebnisse, Eskalationen, Latenzsumme und
+    ein Histogramm (für p50/p90), damit Schwellwerte gezielt eingestellt werden können.
+    """
+
+    def __init__(self, redis_client, async_redis_client=None):
+        """
+        Args:
+            redis_client: Sync Redis Client (Worker)
+            async_redis_client: Async Redis Client (API, nur für Stats)
+        """
+        self.redis_client = redis_client
+        self.async_redis_client = async_redis_client
+        self.prefix = "analysis_cascade:stats"
+        self.tiers_key = f"{self.prefix}:tiers"
+
+    def record(self, tier: str, latency: float, accepted: bool, images: int = 1) -> None:
+        """
+        Zählt einen Aufruf einer Kaskadenstufe
+
+        Args:
+            tier: Name der Stufe (z.B. "0:gpt-4.1-nano:low")
+            latency: Dauer des Aufrufs in Sekunden
+            accepted: True wenn das Ergebnis übernommen wurde, False bei Eskalation
+            images: Anzahl analysierter Bilder (Batch-Requests)
+        """
+        latency_ms = latency * 1000
+        bucket = next((str(limit) for limit in LATENCY_BUCKETS_MS if latency_ms <= limit), 'inf')
+        key = f"{self.prefix}:{tier}"
+
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.sadd(self.tiers_key, tier)
+            pipe.hincrby(key, 'calls', images)
+            pipe.hincrby(key, 'accepted' if accepted else 'escalated', images)
+            pipe.hincrbyfloat(key, 'latency_ms_total', latency_ms * images)
+            pipe.hincrby(key, f'le_{bucket}', images)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"⚠️ Kaskaden-Stats Schreibfehler: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Trefferquote und Latenz pro Stufe"""
+        tiers = sorted(decode_response(tier) for tier in self.redis_client.smembers(self.tiers_key))
+        pipe = self.redis_client.pipeline(transaction=False)
+        for tier in tiers:
+            pipe.hgetall(f"{self.prefix}:{tier}")
+        return self._format_stats(tiers, pipe.execute())
+
+    async def get_stats_async(self) -> Dict[str, Any]:
+        """Async-Variante von get_stats"""
+        tiers = sorted(decode_response(tier) for tier in await self.async_redis_client.smembers(self.tiers_key))
+        pipe = self.async_redis_client.pipeline(transaction=False)
+        for tier in tiers:
+            pipe.hgetall(f"{self.prefix}:{tier}")
+        return self._format_stats(tiers, await pipe.execute())
+
+    def _format_stats(self, tiers: List[str], results: List[Dict[Any, Any]]) -> Dict[str, Any]:
+        """Baut das Stats-Dict aus den Pipeline-Ergebnissen"""
+        stats = {}
+        for tier, counters in zip(tiers, results):
+            counters = {decode_response(key): float(value) for key, value in counters.items()}
+            calls = int(counters.get('calls', 0))
+            histogram = [(limit, counters.get(f'le_{limit}', 0)) for limit in LATENCY_BUCKETS_MS]
+            histogram.append((None, counters.get('le_inf', 0)))
+
+            stats[tier] = {
+                'calls': calls,
+                'accepted': int(counters.get('accepted', 0)),
+                'escalated': int(counters.get('escalated', 0)),
+                'hit_rate': round(counters.get('accepted', 0) / calls, 4) if calls else None,
+                'avg_latency_ms': round(counters.get('latency_ms_total', 0) / calls) if calls else None,
+                'p50_latency_ms': _percentile(histogram, calls, 0.5),
+                'p90_latency_ms': _percentile(histogram, calls, 0.9)
+            }
+        return stats
+
+
+def _percentile(histogram: List[tuple], total: int, fraction: float):
+    """Obergrenze des Histogramm-Buckets, in dem das Perzentil liegt (None = über dem größten Bucket)"""
+    if not total:
+        return None
+    seen = 0
+    for limit, count in histogram:
+        seen += count
+        if seen >= total * fraction:
+            return limit
+    return None
@@ -3,12 +3,16 @@ import logging
 from typing import Optional, List, Dict, Any, Union
 from datetime import datetime, timezone
 from supabase import create_client, Client
+from supabase._async.client import AsyncClient, create_client as create_async_client
+from gotrue import AsyncMemoryStorage
+from supabase.lib.client_options import ClientOptions
 from postgrest.exceptions import APIError
 from enum import Enum
 
 
 class ProcessingStatus(Enum):
     """Status der Kleidungsstück-Verarbeitung"""
+    UPLOADING = "uploading"      # Signierte Upload-URL ausgestellt, Client lädt direkt in den Storage
     PENDING = "pending"          # Gerade hochgeladen, wartet auf Verarbeitung
     PROCESSING = "processing"    # Wird gerade verarbeitet (Extraktion + Analyse)
     COMPLETED = "completed"      # Verarbeitung abgeschlossen
@@ -26,13 +30,14 @@ class DatabaseManager:
     - outfit_items (Outfit-Kleidung Verknüpfungen)
     """
     
-    def __init__(self, supabase_url: str = None, supabase_key: str = None):
+    def __init__(self, supabase_url: str = None, supabase_key: str = None, status_cache=None):
         """
         Initialisiert den DatabaseManager
         
         Args:
             supabase_url: Supabase URL (falls nicht als ENV Variable gesetzt)
             supabase_key: Supabase Anon Key (falls nicht als ENV Variable gesetzt)
+            status_cache: Optionaler StatusCache, in den Statuswechsel durchgeschrieben werden
         """
         self.supabase_url = supabase_url or os.getenv('SUPABASE_URL')
         self.supabase_key = supabase_key or os.getenv('SUPABASE_ANON_KEY')
@@ -40,8 +45,37 @@ class DatabaseManager:
         if not self.supabase_url or not self.supabase_key:
             raise ValueError("Supabase URL und Key müssen gesetzt sein")
         
-        self.client: Client = create_client(self.supabase_url, self.supabase_key)
+        # Langlebiger Client: die PostgREST-Session (Keep-Alive) wird über alle Requests wiederverwendet
+        options = ClientOptions(
+            postgrest_client_timeout=int(os.getenv('SUPABASE_POSTGREST_TIMEOUT', 10))
+        )
+        self.client: Client = create_client(self.supabase_url, self.supabase_key, options=options)
+        self.client_options = options
         self.logger = logging.getLogger(__name__)
+        
+        # Async Client für die FastAPI-Endpoints (wird in init_async() erstellt)
+        self.async_client: Optional[AsyncClient] = None
+        
+        # Write-Through der Statuswechsel für den Status-Endpoint (Redis)
+        self.status_cache = status_cache
+    
+    async def init_async(self) -> None:
+        """Erstellt den async Supabase Client (muss im laufenden Event Loop aufgerufen werden)"""
+        if self.async_client is None:
+            # Der async Auth-Client braucht einen async Session-Storage
+            async_options = self.client_options.replace(storage=AsyncMemoryStorage())
+            self.async_client = await create_async_client(self.supabase_url, self.supabase_key,
+                                                          options=async_options)
+    
+    def _cache_status(self, clothing_item: Dict[str, Any]) -> None:
+        """Schreibt einen Statuswechsel in den StatusCache durch (falls konfiguriert)"""
+        if self.status_cache is not None:
+            self.status_cache.put(clothing_item)
+    
+    async def _cache_status_async(self, clothing_item: Dict[str, Any]) -> None:
+        """Async-Variante von _cache_status"""
+        if self.status_cache is not None:
+            await self.status_cache.put_async(clothing_item)
 
     # ======================
     # USERS MANAGEMENT
@@ -143,7 +177,9 @@ class DatabaseManager:
     # ======================
     
     def create_pending_clothing_item(self, user_id: str, original_image_url: str, 
-                                   original_filename: str = None) -> Dict[str, Any]:
+                                   original_filename: str = None,
+                                   content_hash: str = None,
+                                   status: ProcessingStatus = ProcessingStatus.PENDING) -> Dict[str, Any]:
         """
         Erstellt sofort einen Eintrag für ein hochgeladenes Kleidungsstück
         Status: PENDING - wartet auf Verarbeitung
@@ -152,20 +188,14 @@ class DatabaseManager:
             user_id: UUID des Nutzers
             original_image_url: URL zum ursprünglichen Bild
             original_filename: Ursprünglicher Dateiname (optional)
+            content_hash: SHA-256 (hex) des Original-Bildes (optional, für Deduplizierung)
+            status: Startstatus (UPLOADING bei direktem Upload per signierter URL)
             
         Returns:
             Dict mit den erstellten Kleidungsdaten (ID für Frontend)
         """
         try:
-            data = {
-                'user_id': user_id,
-                'image_url': original_image_url,
-                'original_filename': original_filename,
-                'processing_status': ProcessingStatus.PENDING.value,
-                'category': 'Wird analysiert...',  # Placeholder
-                'created_at': datetime.now(timezone.utc).isoformat(),
-                'updated_at': datetime.now(timezone.utc).isoformat()
-            }
+            data = self._pending_item_data(user_id, original_image_url, original_filename, content_hash, status)
             
             result = self.client.table('clothes').insert(data).execute()
             
@@ -181,6 +211,211 @@ class DatabaseManager:
             self.logger.error(f"Fehler beim Erstellen des pending Kleidungsstücks: {e}")
             raise
     
+    async def create_pending_clothing_item_async(self, user_id: str, original_image_url: str,
+                                                 original_filename: str = None,
+                                                 content_hash: str = None,
+                                                 status: ProcessingStatus = ProcessingStatus.PENDING) -> Dict[str, Any]:
+        """Async-Variante von create_pending_clothing_item (für FastAPI-Endpoints)"""
+        try:
+            data = self._pending_item_data(user_id, original_image_url, original_filename, content_hash, status)
+            
+            result = await self.async_client.table('clothes').insert(data).execute()
+            
+            if not result.data:
+                raise Exception("Kleidungsstück konnte nicht erstellt werden")
+            
+            clothing_item = result.data[0]
+            self.logger.info(f"Pending Kleidungsstück erstellt: {clothing_item['id']}")
+            
+            return clothing_item
+            
+        except APIError as e:
+            self.logger.error(f"Fehler beim Erstellen des pending Kleidungsstücks: {e}")
+            raise
+    
+    async def create_pending_clothing_items_async(self, items: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Erstellt viele pending Kleidungsstücke mit einem Bulk-Insert (Batch-Upload)
+        
+        Args:
+            items: Liste von Dicts mit den Argumenten von create_pending_clothing_item
+                   (user_id, original_image_url, original_filename, content_hash)
+            
+        Returns:
+            Erstellte Zeilen in Reihenfolge der items; None für Einträge, die am
+            Unique-Index (user_id, content_hash) gescheitert sind (paralleler Upload)
+        """
+        if not items:
+            return []
+        
+        rows = [self._pending_item_data(**item) for item in items]
+        try:
+            result = await self.async_client.table('clothes').insert(rows).execute()
+            
+            if len(result.data) != len(rows):
+                raise Exception("Kleidungsstücke konnten nicht erstellt werden")
+            
+            self.logger.info(f"{len(result.data)} pending Kleidungsstücke erstellt (Bulk-Insert)")
+            return result.data
+            
+        except APIError as e:
+            if e.code != '23505':
+                self.logger.error(f"Fehler beim Bulk-Insert der pending Kleidungsstücke: {e}")
+                raise
+        
+        # Duplikat durch parallelen Upload: der Bulk-Insert ist komplett zurückgerollt,
+        # einzeln einfügen, damit nur die betroffenen Einträge fehlschlagen
+        self.logger.warning("Bulk-Insert kollidiert mit vorhandenem Bild-Hash - füge einzeln ein")
+        created = []
+        for row in rows:
+            try:
+                result = await self.async_client.table('clothes').insert(row).execute()
+                created.append(result.data[0] if result.data else None)
+            except APIError as e:
+                if e.code != '23505':
+                    raise
+                created.append(None)
+        return created
+    
+    def _pending_item_data(self, user_id: str, original_image_url: str,
+                           original_filename: str = None, content_hash: str = None,
+                           status: ProcessingStatus = ProcessingStatus.PENDING) -> Dict[str, Any]:
+        """Baut die Zeile für ein neues pending Kleidungsstück"""
+        data = {
+            'user_id': user_id,
+            'image_url': original_image_url,
+            'original_filename': original_filename,
+            'processing_status': status.value,
+            'category': 'Wird analysiert...',  # Placeholder
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'updated_at': datetime.now(timezone.utc).isoformat()
+        }
+        if content_hash:
+            data['content_hash'] = content_hash
+        return data
+    
+    async def find_clothing_item_by_hash_async(self, user_id: str, content_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Sucht ein Kleidungsstück des Nutzers mit identischem Bildinhalt
+        
+        Args:
+            user_id: UUID des Nutzers
+            content_hash: SHA-256 (hex) des Original-Bildes
+            
+        Returns:
+            Dict mit Kleidungsdaten oder None
+        """
+        try:
+            result = await self.async_client.table('clothes')\
+                .select('*')\
+                .eq('user_id', user_id)\
+                .eq('content_hash', content_hash)\
+                .limit(1)\
+                .execute()
+            return result.data[0] if result.data else None
+            
+        except APIError as e:
+            self.logger.error(f"Fehler bei der Suche nach Bild-Hash: {e}")
+            raise
+    
+    async def find_clothing_items_by_hashes_async(self, user_id: str, content_hashes: List[str],
+                                                  chunk_size: int = 50) -> Dict[str, Dict[str, Any]]:
+        """
+        Sucht Kleidungsstücke des Nutzers zu vielen Bild-Hashes (Batch-Upload)
+        
+        Args:
+            user_id: UUID des Nutzers
+            content_hashes: SHA-256 (hex) der Original-Bilder
+            chunk_size: Hashes pro Abfrage (begrenzt die URL-Länge des in-Filters)
+            
+        Returns:
+            Dict content_hash → Kleidungsdaten (nur gefundene)
+        """
+        found = {}
+        try:
+            for i in range(0, len(content_hashes), chunk_size):
+                result = await self.async_client.table('clothes')\
+                    .select('*')\
+                    .eq('user_id', user_id)\
+                    .in_('content_hash', content_hashes[i:i + chunk_size])\
+                    .execute()
+                for item in result.data:
+                    found[item['content_hash']] = item
+            return found
+            
+        except APIError as e:
+            self.logger.error(f"Fehler bei der Suche nach Bild-Hashes: {e}")
+            raise
+    
+    async def reset_failed_clothing_item_async(self, clothing_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Setzt ein fehlgeschlagenes Kleidungsstück für eine erneute Verarbeitung zurück
+        (bedingtes Update: bei parallelen Re-Uploads gewinnt genau einer)
+        
+        Args:
+            clothing_id: UUID des Kleidungsstücks
+            
+        Returns:
+            Dict mit aktualisierten Daten oder None wenn nicht mehr im Status FAILED
+        """
+        try:
+            update_data = {
+                'processing_status': ProcessingStatus.PENDING.value,
+                'processing_error': None,
+                'updated_at': datetime.now(timezone.utc).isoformat()
+            }
+            
+            result = await self.async_client.table('clothes')\
+                .update(update_data)\
+                .eq('id', clothing_id)\
+                .eq('processing_status', ProcessingStatus.FAILED.value)\
+                .execute()
+            
+            if not result.data:
+                return None
+            
+            self.logger.info(f"Kleidungsstück für erneute Verarbeitung zurückgesetzt: {clothing_id}")
+            await self._cache_status_async(result.data[0])
+            return result.data[0]
+            
+        except APIError as e:
+            self.logger.error(f"Fehler beim Zurücksetzen des Kleidungsstücks: {e}")
+            raise
+    
+    async def finalize_upload_async(self, clothing_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Übergang UPLOADING → PENDING nach abgeschlossenem Direkt-Upload
+        (bedingtes Update: bei parallelen Finalize-Aufrufen gewinnt genau einer)
+        
+        Args:
+            clothing_id: UUID des Kleidungsstücks
+            
+        Returns:
+            Dict mit aktualisierten Daten oder None wenn nicht mehr im Status UPLOADING
+        """
+        try:
+            update_data = {
+                'processing_status': ProcessingStatus.PENDING.value,
+                'updated_at': datetime.now(timezone.utc).isoformat()
+            }
+            
+            result = await self.async_client.table('clothes')\
+                .update(update_data)\
+                .eq('id', clothing_id)\
+                .eq('processing_status', ProcessingStatus.UPLOADING.value)\
+                .execute()
+            
+            if not result.data:
+                return None
+            
+            self.logger.info(f"Direkt-Upload abgeschlossen: {clothing_id}")
+            await self._cache_status_async(result.data[0])
+            return result.data[0]
+            
+        except APIError as e:
+            self.logger.error(f"Fehler beim Abschließen des Uploads: {e}")
+            raise
+    
     def update_processing_status(self, clothing_id: str, status: ProcessingStatus) -> Dict[str, Any]:
         """
         Aktualisiert den Verarbeitungsstatus eines Kleidungsstücks
@@ -204,6 +439,7 @@ class DatabaseManager:
                 raise Exception(f"Kleidungsstück {clothing_id} nicht gefunden")
             
             self.logger.info(f"Status aktualisiert für {clothing_id}: {status.value}")
+            self._cache_status(result.data[0])
             return result.data[0]
             
         except APIError as e:
@@ -215,7 +451,10 @@ class DatabaseManager:
                                    category: str = None, color: str = None, 
                                    style: str = None, season: str = None,
                                    material: str = None, occasion: str = None,
-                                   confidence: float = None) -> Dict[str, Any]:
+                                   confidence: float = None,
+                                   thumbnail_url: str = None,
+                                   medium_image_url: str = None,
+                                   color_palette: List[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Vervollständigt die Verarbeitung eines Kleidungsstücks mit allen AI-Daten
         
@@ -229,6 +468,9 @@ class DatabaseManager:
             material: Erkanntes Material
             occasion: Erkannter Anlass
             confidence: AI-Confidence Score
+            thumbnail_url: URL zum Thumbnail-Derivat (128px, optional)
+            medium_image_url: URL zum mittleren Derivat (512px, optional)
+            color_palette: Dominante Farben aus der lokalen Farbanalyse (optional)
             
         Returns:
             Dict mit vollständigen Kleidungsdaten
@@ -244,6 +486,14 @@ class DatabaseManager:
             if extracted_image_url:
                 update_data['extracted_image_url'] = extracted_image_url
             
+            # Optional: Derivate für Listen- und Detailansichten
+            if thumbnail_url:
+                update_data['thumbnail_url'] = thumbnail_url
+            if medium_image_url:
+                update_data['medium_image_url'] = medium_image_url
+            if color_palette:
+                update_data['color_palette'] = color_palette
+            
             # AI-Analyse Ergebnisse
             if category:
                 update_data['category'] = category
@@ -266,6 +516,7 @@ class DatabaseManager:
                 raise Exception(f"Kleidungsstück {clothing_id} nicht gefunden")
             
             completed_item = result.data[0]
+            self._cache_status(completed_item)
             self.logger.info(f"Kleidungsstück-Verarbeitung abgeschlossen: {clothing_id}")
             self.logger.info(f"Erkannt: {category} ({color}, {style})")
             
@@ -301,6 +552,31 @@ class DatabaseManager:
                 raise Exception(f"Kleidungsstück {clothing_id} nicht gefunden")
             
             self.logger.error(f"Kleidungsstück-Verarbeitung fehlgeschlagen: {clothing_id} - {error_message}")
+            self._cache_status(result.data[0])
+            return result.data[0]
+            
+        except APIError as e:
+            self.logger.error(f"Fehler beim Markieren als fehlgeschlagen: {e}")
+            raise
+    
+    async def mark_processing_failed_async(self, clothing_id: str, error_message: str = None) -> Dict[str, Any]:
+        """Async-Variante von mark_processing_failed"""
+        try:
+            update_data = {
+                'processing_status': ProcessingStatus.FAILED.value,
+                'updated_at': datetime.now(timezone.utc).isoformat()
+            }
+            
+            if error_message:
+                update_data['processing_error'] = error_message
+            
+            result = await self.async_client.table('clothes').update(update_data).eq('id', clothing_id).execute()
+            
+            if not result.data:
+                raise Exception(f"Kleidungsstück {clothing_id} nicht gefunden")
+            
+            self.logger.error(f"Kleidungsstück-Verarbeitung fehlgeschlagen: {clothing_id} - {error_message}")
+            await self._cache_status_async(result.data[0])
             return result.data[0]
             
         except APIError as e:
@@ -355,6 +631,85 @@ class DatabaseManager:
             self.logger.error(f"Fehler beim Laden der Kleidungsstücke mit Status: {e}")
             raise
 
+    # ======================
+    # BACKFILL (RE-ANALYSE)
+    # ======================
+
+    def get_clothing_items_page(self, after_id: str = None, limit: int = 1000,
+                                status: ProcessingStatus = ProcessingStatus.COMPLETED) -> List[Dict[str, Any]]:
+        """
+        Blättert per Keyset-Pagination (nach id) durch die clothes Tabelle
+
+        Args:
+            after_id: Letzte id der vorherigen Seite (None = von vorne)
+            limit: Seitengröße
+            status: ProcessingStatus Filter (None = alle)
+
+        Returns:
+            Liste mit Kleidungsstücken (id, Bild-URLs), aufsteigend nach id
+        """
+        try:
+            query = self.client.table('clothes')\
+                .select('id, image_url, extracted_image_url, medium_image_url')
+
+            if status:
+                query = query.eq('processing_status', status.value)
+            if after_id:
+                query = query.gt('id', after_id)
+
+            result = query.order('id', desc=False).limit(limit).execute()
+            return result.data or []
+
+        except APIError as e:
+            self.logger.error(f"Fehler beim Laden der Backfill-Seite: {e}")
+            raise
+
+    def bulk_update_clothing_analysis(self, analyses: Dict[str, Dict[str, Any]], chunk_size: int = 500) -> int:
+        """
+        Schreibt AI-Analyseergebnisse für viele Kleidungsstücke (ein RPC-Request pro Chunk)
+        
+        Nur UPDATE (SQL-Funktion bulk_update_clothing_analysis aus database_migration.sql):
+        zwischenzeitlich gelöschte Kleidungsstücke werden nicht wieder angelegt.
+
+        Args:
+            analyses: Dict clothing_id -> validiertes Analyseergebnis
+            chunk_size: Zeilen pro Request
+
+        Returns:
+            Anzahl aktualisierter Kleidungsstücke
+        """
+        clothing_ids = list(analyses)
+        updated = 0
+        now = datetime.now(timezone.utc).isoformat()
+
+        try:
+            for start in range(0, len(clothing_ids), chunk_size):
+                rows = [
+                    {
+                        'id': clothing_id,
+                        'category': analyses[clothing_id]['category'],
+                        'color': analyses[clothing_id]['color'],
+                        'style': analyses[clothing_id]['style'],
+                        'season': analyses[clothing_id]['season'],
+                        'material': analyses[clothing_id]['material'],
+                        'occasion': analyses[clothing_id]['occasion'],
+                        'ai_confidence': analyses[clothing_id]['confidence'],
+                        'updated_at': now
+                    }
+                    for clothing_id in clothing_ids[start:start + chunk_size]
+                ]
+
+                # Rückgabe: Anzahl tatsächlich aktualisierter (noch existierender) Zeilen
+                result = self.client.rpc('bulk_update_clothing_analysis', {'items': rows}).execute()
+                updated += result.data or 0
+
+            self.logger.info(f"Backfill: {updated} Kleidungsstücke aktualisiert")
+            return updated
+
+        except APIError as e:
+            self.logger.error(f"Fehler beim Bulk-Update der Analysen: {e}")
+            raise
+
     # ======================
     # CLOTHES MANAGEMENT (ORIGINAL METHODS)
     # ======================
@@ -445,6 +800,16 @@ class DatabaseManager:
             self.logger.error(f"Fehler beim Laden des Kleidungsstücks: {e}")
             raise
     
+    async def get_clothing_item_async(self, clothing_id: str) -> Optional[Dict[str, Any]]:
+        """Async-Variante von get_clothing_item (für FastAPI-Endpoints)"""
+        try:
+            result = await self.async_client.table('clothes').select('*').eq('id', clothing_id).execute()
+            return result.data[0] if result.data else None
+            
+        except APIError as e:
+            self.logger.error(f"Fehler beim Laden des Kleidungsstücks: {e}")
+            raise
+    
     def update_clothing_item(self, clothing_id: str, **kwargs) -> Dict[str, Any]:
         """
         Aktualisiert ein Kleidungsstück
@@ -854,6 +1219,15 @@ class DatabaseManager:
             self.logger.error(f"Datenbankverbindung fehlgeschlagen: {e}")
             return False
     
+    async def health_check_async(self) -> bool:
+        """Async-Variante von health_check"""
+        try:
+            await self.async_client.table('users').select('id').limit(1).execute()
+            return True
+        except Exception as e:
+            self.logger.error(f"Datenbankverbindung fehlgeschlagen: {e}")
+            return False
+    
     def get_clothing_categories(self, user_id: str) -> List[str]:
         """
         Holt alle verwendeten Kleidungskategorien eines Nutzers
@@ -872,3 +1246,22 @@ class DatabaseManager:
         except APIError as e:
             self.logger.error(f"Fehler beim Laden der Kategorien: {e}")
             raise
+    
+    def close(self) -> None:
+        """Schließt die HTTP-Session des PostgREST-Clients"""
+        try:
+            self.client.postgrest.session.close()
+            self.logger.info("Datenbank-Client geschlossen")
+        except Exception as e:
+            self.logger.error(f"Fehler beim Schließen des Datenbank-Clients: {e}")
+    
+    async def aclose(self) -> None:
+        """Schließt die HTTP-Session des async PostgREST-Clients"""
+        if self.async_client is None:
+            return
+        try:
+            await self.async_client.postgrest.aclose()
+        except Exception as e:
+            self.logger.error(f"Fehler beim Schließen des async Datenbank-Clients: {e}")
+        finally:
+            self.async_client = None
@@ -0,0 +1,41 @@
+-- Wardroberry - Migrationen für die clothes Tabelle
+-- Idempotent: kann mehrfach in der Supabase SQL-Konsole ausgeführt werden
+
+-- Deduplizierung von Uploads: SHA-256 (hex) des Original-Bildes
+ALTER TABLE clothes ADD COLUMN IF NOT EXISTS content_hash TEXT;
+
+-- Ein Bild pro Nutzer nur einmal (schützt auch gegen parallele Client-Retries)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_clothes_user_content_hash
+    ON clothes(user_id, content_hash)
+    WHERE content_hash IS NOT NULL;
+
+-- Bild-Derivate für Clients (WebP, vom Worker erzeugt)
+ALTER TABLE clothes ADD COLUMN IF NOT EXISTS thumbnail_url TEXT;     -- 128px
+ALTER TABLE clothes ADD COLUMN IF NOT EXISTS medium_image_url TEXT;  -- 512px
+
+-- Lokale Farbanalyse: dominante Farben [{"hex", "share", "color"}], nach Anteil sortiert
+ALTER TABLE clothes ADD COLUMN IF NOT EXISTS color_palette JSONB;
+
+-- Backfill: Analyseergebnisse vieler Kleidungsstücke in einem Request schreiben (siehe backfill.py)
+-- Nur UPDATE: zwischenzeitlich gelöschte Zeilen werden nicht wieder angelegt (anders als ein Upsert)
+-- items: [{"id", "category", "color", "style", "season", "material", "occasion", "ai_confidence", "updated_at"}]
+CREATE OR REPLACE FUNCTION bulk_update_clothing_analysis(items JSONB)
+RETURNS INTEGER
+LANGUAGE sql
+AS $$
+    WITH updated AS (
+        UPDATE clothes AS c
+        SET category = r.category,
+            color = r.color,
+            style = r.style,
+            season = r.season,
+            material = r.material,
+            occasion = r.occasion,
+            ai_confidence = r.ai_confidence,
+            updated_at = r.updated_at
+        FROM jsonb_populate_recordset(NULL::clothes, items) AS r
+        WHERE c.id = r.id
+        RETURNING c.id
+    )
+    SELECT count(*)::INTEGER FROM updated;
+$$;
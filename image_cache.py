@@ -0,0 +1,116 @@
+import os
+import hashlib
+import logging
+import tempfile
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LocalImageCache:
+    """
+    Kleiner lokaler Disk-Cache für Original-Bilder
+    Wird von mehreren Workern auf demselben Host geteilt (gemeinsames Verzeichnis),
+    damit Retries und parallele Worker ein Bild nicht erneut aus dem Storage laden
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        """
+        Initialisiert den Cache
+
+        Args:
+            directory: Cache-Verzeichnis (wird bei Bedarf angelegt)
+            max_bytes: Maximale Gesamtgröße des Caches in Bytes
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> Optional['LocalImageCache']:
+        """
+        Erstellt den Cache aus IMAGE_CACHE_DIR / IMAGE_CACHE_MAX_MB
+
+        Returns:
+            LocalImageCache oder None wenn kein Verzeichnis konfiguriert ist
+        """
+        directory = os.getenv('IMAGE_CACHE_DIR')
+        if not directory:
+            return None
+
+        max_mb = int(os.getenv('IMAGE_CACHE_MAX_MB', 512))
+        return cls(directory, max_mb * 1024 * 1024)
+
+    def _path_for(self, key: str) -> str:
+        """Ermittelt den Dateipfad für einen Cache-Key"""
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Holt ein Bild aus dem Cache
+
+        Args:
+            key: Cache-Key (z.B. Bucket + Storage-Pfad)
+
+        Returns:
+            Bilddaten oder None bei Cache-Miss
+        """
+        path = self._path_for(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            # mtime als "zuletzt benutzt" für die LRU-Verdrängung
+            os.utime(path, None)
+            return data
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"⚠️ Bild-Cache Lesefehler für {key}: {e}")
+            return None
+
+    def put(self, key: str, data: bytes) -> None:
+        """
+        Legt ein Bild im Cache ab (atomar über temporäre Datei + rename)
+
+        Args:
+            key: Cache-Key
+            data: Bilddaten
+        """
+        if len(data) > self.max_bytes:
+            return
+
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self._path_for(key))
+            self._evict()
+        except Exception as e:
+            logger.warning(f"⚠️ Bild-Cache Schreibfehler für {key}: {e}")
+
+    def _evict(self) -> None:
+        """Entfernt die am längsten nicht benutzten Dateien bis max_bytes eingehalten wird"""
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if not entry.is_file() or entry.name.startswith('.tmp-'):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+            if total <= self.max_bytes:
+                break
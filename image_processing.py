@@ -0,0 +1,455 @@
+import io
+import os
+from typing import Dict, Tuple
+
+import numpy as np
+from PIL import Image, ImageChops, ImageFilter, ImageOps
+
+# Ausgabeformate für die AI-Analyse (Pillow-Format → MIME-Type)
+ANALYSIS_FORMATS = {
+    'jpeg': ('JPEG', 'image/jpeg'),
+    'webp': ('WEBP', 'image/webp'),
+}
+
+# Ausgabeformate der Hintergrund-Entfernung (mit Alpha-Kanal)
+EXTRACTION_FORMATS = {
+    'webp': ('WEBP', 'image/webp'),
+    'png': ('PNG', 'image/png'),
+}
+
+# Derivate für Clients (Variante → längste Kante in Pixeln), "full" ist das freigestellte Bild selbst
+DERIVATIVE_SIZES = {
+    'thumb': 128,
+    'medium': 512,
+}
+
+# Plausibler Anteil des Vordergrunds; außerhalb gilt die Segmentierung als gescheitert
+MIN_FOREGROUND = 0.03
+MAX_FOREGROUND = 0.97
+
+
+def analysis_settings_from_env() -> dict:
+    """
+    Einstellungen der Vorverarbeitung aus ENV (als Dict, damit sie an Prozesse übergeben werden können)
+
+    Returns:
+        Dict mit max_edge, output_format und quality
+    """
+    return {
+        'max_edge': int(os.getenv('IMAGE_MAX_EDGE', 1024)),
+        'output_format': os.getenv('IMAGE_ANALYSIS_FORMAT', 'jpeg').lower(),
+        'quality': int(os.getenv('IMAGE_ANALYSIS_QUALITY', 85)),
+    }
+
+
+def prepare_for_analysis(image_content: bytes, max_edge: int = 1024,
+                         output_format: str = 'jpeg', quality: int = 85) -> Tuple[bytes, str]:
+    """
+    Bereitet ein Bild für die AI-Analyse vor
+    EXIF-Orientierung anwenden, erstes Frame (GIF), auf max_edge verkleinern,
+    ohne Metadaten kompakt neu kodieren.
+
+    Läuft im Prozess-Pool des Workers (modulweite Funktion, damit sie picklebar ist).
+
+    Args:
+        image_content: Binärdaten des Bildes (JPEG, PNG, WebP, GIF)
+        max_edge: Maximale Kantenlänge in Pixeln
+        output_format: "jpeg" oder "webp"
+        quality: Kodierqualität (1-100)
+
+    Returns:
+        Tuple (bytes, content_type)
+    """
+    pil_format, content_type = ANALYSIS_FORMATS.get(output_format, ANALYSIS_FORMATS['jpeg'])
+
+    with Image.open(io.BytesIO(image_content)) as image:
+        # JPEG: direkt in reduzierter Auflösung dekodieren (DCT-Skalierung, deutlich schneller)
+        image.draft('RGB', (max_edge, max_edge))
+
+        # Bei animierten GIFs/WebPs nur das erste Frame
+        image.seek(0)
+
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+
+        if pil_format == 'JPEG':
+            image = _flatten(image)
+            save_options = {'quality': quality, 'optimize': True}
+        else:
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA' if _has_alpha(image) else 'RGB')
+            save_options = {'quality': quality, 'method': 4}
+
+        output = io.BytesIO()
+        # Ohne exif/icc_profile speichern: Metadaten (GPS, Kamera) werden entfernt
+        image.save(output, format=pil_format, **save_options)
+        return output.getvalue(), content_type
+
+
+def _has_alpha(image: Image.Image) -> bool:
+    """Prüft ob ein Bild Transparenz enthält"""
+    return image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+
+
+def _flatten(image: Image.Image) -> Image.Image:
+    """Legt transparente Bilder auf weißen Hintergrund (JPEG kennt keinen Alpha-Kanal)"""
+    if not _has_alpha(image):
+        return image.convert('RGB')
+
+    rgba = image.convert('RGBA')
+    background = Image.new('RGB', rgba.size, (255, 255, 255))
+    background.paste(rgba, mask=rgba.getchannel('A'))
+    return background
+
+
+def extraction_settings_from_env() -> dict:
+    """
+    Einstellungen der Hintergrund-Entfernung aus ENV
+
+    Returns:
+        Dict mit output_format, max_edge, mask_edge und tolerance
+    """
+    return {
+        'output_format': os.getenv('EXTRACTION_FORMAT', 'webp').lower(),
+        'max_edge': int(os.getenv('EXTRACTION_MAX_EDGE', 1600)),
+        'mask_edge': int(os.getenv('EXTRACTION_MASK_EDGE', 384)),
+        'tolerance': float(os.getenv('EXTRACTION_TOLERANCE', 0.12)),
+    }
+
+
+def remove_background(image_content: bytes, output_format: str = 'webp', max_edge: int = 1600,
+                      mask_edge: int = 384, tolerance: float = 0.12) -> Tuple[bytes, str]:
+    """
+    Entfernt den Hintergrund eines Kleidungsfotos und schneidet eng auf das Kleidungsstück zu
+
+    Farbsegmentierung vom Bildrand aus: die dominanten Randfarben bilden das
+    Hintergrundmodell, als Hintergrund gilt nur, was diesen Farben ähnelt UND mit dem
+    Rand verbunden ist (Innenflächen in Hintergrundfarbe bleiben erhalten). Die Maske
+    wird auf reduzierter Auflösung berechnet, morphologisch bereinigt und weich auf
+    die Ausgabegröße skaliert. Vollständig vektorisiert (NumPy), läuft im Prozess-Pool.
+
+    Args:
+        image_content: Binärdaten des Bildes
+        output_format: "webp" oder "png"
+        max_edge: Maximale Kantenlänge der Ausgabe
+        mask_edge: Kantenlänge, auf der die Maske berechnet wird
+        tolerance: Farbabstand (RGB, 0-1) bis zu dem ein Pixel als Hintergrund gilt
+
+    Returns:
+        Tuple (bytes, content_type) - RGBA, eng zugeschnitten
+    """
+    pil_format, content_type = EXTRACTION_FORMATS.get(output_format, EXTRACTION_FORMATS['webp'])
+
+    with Image.open(io.BytesIO(image_content)) as image:
+        image.draft('RGB', (max_edge, max_edge))
+        image.seek(0)
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+        rgba = image.convert('RGBA')
+
+    small = rgba.resize(_fit(rgba.size, mask_edge), Image.BILINEAR)
+    pixels = np.asarray(small, dtype=np.float32) / 255.0
+
+    # Bereits transparente Bereiche zählen immer als Hintergrund
+    foreground = _foreground_mask(pixels[..., :3], tolerance) & (pixels[..., 3] > 0.5)
+
+    coverage = foreground.mean()
+    if MIN_FOREGROUND <= coverage <= MAX_FOREGROUND:
+        mask = Image.fromarray(foreground.astype(np.uint8) * 255, 'L')
+        alpha = mask.resize(rgba.size, Image.BILINEAR).filter(ImageFilter.GaussianBlur(1))
+        rgba.putalpha(ImageChops.multiply(alpha, rgba.getchannel('A')))
+
+    # Enger Zuschnitt auf den sichtbaren Bereich (kleinere Dateien, kleinerer AI-Payload)
+    bbox = rgba.getchannel('A').point(lambda value: 255 if value > 8 else 0).getbbox()
+    if bbox:
+        pad = max(2, round(max(rgba.size) * 0.01))
+        left, top, right, bottom = bbox
+        rgba = rgba.crop((max(0, left - pad), max(0, top - pad),
+                          min(rgba.width, right + pad), min(rgba.height, bottom + pad)))
+
+    output = io.BytesIO()
+    if pil_format == 'WEBP':
+        # method=2: kaum größer als method=4, aber deutlich schneller kodiert
+        rgba.save(output, format='WEBP', quality=85, method=2)
+    else:
+        rgba.save(output, format='PNG', compress_level=6)
+    return output.getvalue(), content_type
+
+
+def _fit(size: Tuple[int, int], max_edge: int) -> Tuple[int, int]:
+    """Größe mit gleichem Seitenverhältnis, längste Kante höchstens max_edge"""
+    width, height = size
+    scale = min(1.0, max_edge / max(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _foreground_mask(rgb: np.ndarray, tolerance: float) -> np.ndarray:
+    """Berechnet die Vordergrund-Maske (bool HxW) per randbasierter Farbsegmentierung"""
+    height, width = rgb.shape[:2]
+    border = max(1, round(min(height, width) * 0.02))
+
+    border_pixels = np.concatenate([
+        rgb[:border].reshape(-1, 3), rgb[-border:].reshape(-1, 3),
+        rgb[:, :border].reshape(-1, 3), rgb[:, -border:].reshape(-1, 3)
+    ])
+    palette = _border_palette(border_pixels)
+
+    # Abstand jedes Pixels zur nächsten Hintergrundfarbe (H x W x K → H x W)
+    distance = np.sqrt(((rgb[:, :, None, :] - palette[None, None, :, :]) ** 2).sum(axis=-1)).min(axis=-1)
+    candidate = distance < tolerance
+
+    # Nur mit dem Rand verbundene Kandidaten sind Hintergrund
+    seed = np.zeros_like(candidate)
+    seed[:border], seed[-border:], seed[:, :border], seed[:, -border:] = True, True, True, True
+    background = _reconstruct(seed & candidate, candidate)
+
+    # Morphologische Bereinigung: Sprenkel entfernen (Opening), kleine Lücken schließen (Closing)
+    foreground = ~background
+    foreground = _dilate(_erode(foreground, 1), 1)
+    foreground = _erode(_dilate(foreground, 2), 2)
+    return foreground
+
+
+def _border_palette(border_pixels: np.ndarray, coverage: float = 0.9, max_colors: int = 8) -> np.ndarray:
+    """
+    Dominante Randfarben: Histogramm über 8x8x8 Farbwürfel, die häufigsten Würfel
+    bis `coverage` der Randpixel, jeweils mit ihrer mittleren Farbe
+    """
+    bins = np.minimum((border_pixels * 8).astype(np.int32), 7)
+    codes = bins[:, 0] * 64 + bins[:, 1] * 8 + bins[:, 2]
+
+    counts = np.bincount(codes, minlength=512)
+    sums = np.stack([np.bincount(codes, weights=border_pixels[:, c], minlength=512) for c in range(3)], axis=1)
+
+    order = np.argsort(counts)[::-1]
+    cumulative = np.cumsum(counts[order]) / len(codes)
+    selected = order[:min(max_colors, int(np.searchsorted(cumulative, coverage)) + 1)]
+    selected = selected[counts[selected] > 0]
+    return (sums[selected] / counts[selected, None]).astype(np.float32)
+
+
+def _reconstruct(seed: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    """Morphologische Rekonstruktion: Seed innerhalb der Maske wachsen lassen bis stabil (8er-Nachbarschaft)"""
+    current = seed & mask
+    while True:
+        grown = _dilate(current, 1) & mask
+        if np.array_equal(grown, current):
+            return current
+        current = grown
+
+
+def _dilate(mask: np.ndarray, radius: int) -> np.ndarray:
+    """Binäre Dilatation mit 3x3-Element, `radius` mal angewendet"""
+    for _ in range(radius):
+        padded = np.pad(mask, 1, mode='constant', constant_values=False)
+        height, width = mask.shape
+        result = np.zeros_like(mask)
+        for dy in range(3):
+            for dx in range(3):
+                result |= padded[dy:dy + height, dx:dx + width]
+        mask = result
+    return mask
+
+
+def _erode(mask: np.ndarray, radius: int) -> np.ndarray:
+    """Binäre Erosion mit 3x3-Element, `radius` mal angewendet (Bildrand zählt nicht als Hintergrund)"""
+    for _ in range(radius):
+        padded = np.pad(mask, 1, mode='edge')
+        height, width = mask.shape
+        result = np.ones_like(mask)
+        for dy in range(3):
+            for dx in range(3):
+                result &= padded[dy:dy + height, dx:dx + width]
+        mask = result
+    return mask
+
+
+def make_derivatives(image_content: bytes, quality: int = 80) -> Dict[str, Tuple[bytes, str]]:
+    """
+    Erzeugt verkleinerte WebP-Derivate (mit Alpha) für Listen- und Detailansichten
+
+    Args:
+        image_content: Binärdaten des freigestellten Bildes
+        quality: WebP-Qualität
+
+    Returns:
+        Dict Variante → (bytes, content_type), Varianten siehe DERIVATIVE_SIZES
+    """
+    derivatives = {}
+    with Image.open(io.BytesIO(image_content)) as image:
+        image = image.convert('RGBA')
+
+    # Von groß nach klein, jede Stufe aus der vorherigen (schneller als jeweils aus dem Original)
+    for variant, edge in sorted(DERIVATIVE_SIZES.items(), key=lambda item: -item[1]):
+        image = image.resize(_fit(image.size, edge), Image.LANCZOS) if max(image.size) > edge else image
+        output = io.BytesIO()
+        image.save(output, format='WEBP', quality=quality, method=4)
+        derivatives[variant] = (output.getvalue(), 'image/webp')
+
+    return derivatives
+
+
+# ======================
+# FARB- UND MUSTERANALYSE
+# ======================
+
+def color_settings_from_env() -> dict:
+    """
+    Einstellungen der lokalen Farbanalyse aus ENV
+
+    Returns:
+        Dict mit clusters, sample_edge und pattern_threshold
+    """
+    return {
+        'clusters': int(os.getenv('COLOR_CLUSTERS', 5)),
+        'sample_edge': int(os.getenv('COLOR_SAMPLE_EDGE', 96)),
+        'pattern_threshold': float(os.getenv('COLOR_PATTERN_THRESHOLD', 0.18)),
+    }
+
+
+def analyze_colors(image_content: bytes, clusters: int = 5, sample_edge: int = 96,
+                   pattern_threshold: float = 0.18) -> Dict[str, object]:
+    """
+    Dominante Farben und Muster des freigestellten Kleidungsstücks ohne API-Aufruf
+
+    K-Means (vektorisiert, NumPy) über die Vordergrundpixel einer verkleinerten Kopie;
+    jedes Cluster wird auf das Farbvokabular abgebildet (HSV-Regeln). Ein Muster gilt
+    als erkannt, wenn innerhalb der Fläche viele starke Helligkeitskanten liegen.
+
+    Args:
+        image_content: Binärdaten des freigestellten Bildes (RGBA)
+        clusters: Anzahl K-Means-Cluster
+        sample_edge: Kantenlänge der Analysekopie
+        pattern_threshold: Kantendichte, ab der ein Muster erkannt wird
+
+    Returns:
+        Dict mit color (Vokabular), confidence (Anteil der Farbe), pattern, pattern_score
+        und palette (Liste {"hex", "share", "color"}, nach Anteil sortiert)
+    """
+    with Image.open(io.BytesIO(image_content)) as image:
+        image.draft('RGB', (sample_edge * 2, sample_edge * 2))
+        image = image.convert('RGBA')
+        image.thumbnail((sample_edge, sample_edge), Image.BILINEAR)
+
+    pixels = np.asarray(image, dtype=np.float32) / 255.0
+    mask = pixels[..., 3] > 0.5
+    if mask.sum() < 16:
+        mask = np.ones(mask.shape, dtype=bool)
+    foreground = pixels[..., :3][mask]
+
+    centers, shares = _kmeans(foreground, clusters)
+    names = [_color_name(center) for center in centers]
+
+    # Anteile gleichnamiger Cluster zusammenfassen
+    by_name: Dict[str, float] = {}
+    for name, share in zip(names, shares):
+        by_name[name] = by_name.get(name, 0.0) + float(share)
+    dominant, dominant_share = max(by_name.items(), key=lambda item: item[1])
+
+    pattern_score = _pattern_score(pixels[..., :3], mask)
+    significant = [name for name, share in by_name.items() if share >= 0.15]
+
+    if pattern_score >= pattern_threshold and len(significant) >= 2:
+        color, confidence = 'gemustert', min(1.0, pattern_score / pattern_threshold / 2)
+    elif dominant_share < 0.4 and len(significant) >= 3:
+        color, confidence = 'bunt', 1.0 - dominant_share
+    else:
+        color, confidence = dominant, dominant_share
+
+    order = np.argsort(shares)[::-1]
+    palette = [
+        {
+            'hex': '#{:02x}{:02x}{:02x}'.format(*(np.clip(centers[i] * 255, 0, 255).round().astype(int))),
+            'share': round(float(shares[i]), 3),
+            'color': names[i]
+        }
+        for i in order if shares[i] > 0
+    ]
+
+    return {
+        'color': color,
+        'confidence': round(float(confidence), 3),
+        'pattern': color == 'gemustert',
+        'pattern_score': round(float(pattern_score), 3),
+        'palette': palette,
+    }
+
+
+def _kmeans(points: np.ndarray, k: int, iterations: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    K-Means (Lloyd) mit deterministischer Initialisierung über Helligkeits-Quantile
+
+    Returns:
+        Tuple (Zentren k x 3, Anteile k)
+    """
+    k = max(1, min(k, len(points)))
+    luminance = points @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    order = np.argsort(luminance)
+    centers = points[order[((np.arange(k) + 0.5) / k * len(points)).astype(int)]].copy()
+
+    for _ in range(iterations):
+        distances = ((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=-1)
+        labels = distances.argmin(axis=1)
+        counts = np.bincount(labels, minlength=k).astype(np.float32)
+        sums = np.stack([np.bincount(labels, weights=points[:, c], minlength=k) for c in range(3)], axis=1)
+        updated = np.where(counts[:, None] > 0, sums / np.maximum(counts, 1)[:, None], centers)
+        if np.allclose(updated, centers, atol=1e-3):
+            centers = updated
+            break
+        centers = updated.astype(np.float32)
+
+    return centers, counts / counts.sum()
+
+
+def _color_name(rgb: np.ndarray) -> str:
+    """Bildet eine RGB-Farbe (0-1) auf das Farbvokabular ab (HSV-Regeln)"""
+    red, green, blue = (float(value) for value in rgb)
+    value = max(red, green, blue)
+    delta = value - min(red, green, blue)
+    saturation = delta / value if value > 0 else 0.0
+
+    if value < 0.2 or (value < 0.3 and saturation < 0.4):
+        return 'schwarz'
+    if saturation < 0.15:
+        if value > 0.85:
+            return 'weiß'
+        return 'grau'
+
+    if value == red:
+        hue = (60 * (green - blue) / delta) % 360
+    elif value == green:
+        hue = 60 * (blue - red) / delta + 120
+    else:
+        hue = 60 * (red - green) / delta + 240
+
+    if 15 <= hue < 50:
+        if saturation < 0.4 and value > 0.6:
+            return 'beige'
+        if value < 0.6:
+            return 'braun'
+    if hue < 15 or hue >= 345:
+        return 'rosa' if saturation < 0.5 and value > 0.7 else 'rot'
+    if hue < 40:
+        return 'orange'
+    if hue < 70:
+        return 'gelb'
+    if hue < 170:
+        return 'grün'
+    if hue < 260:
+        return 'blau'
+    if hue < 320:
+        return 'lila'
+    return 'rosa'
+
+
+def _pattern_score(rgb: np.ndarray, mask: np.ndarray) -> float:
+    """Anteil starker Helligkeitskanten im Inneren der Fläche (Kontur ausgenommen)"""
+    luminance = rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    inner = _erode(mask, 2)
+    if inner.sum() < 16:
+        return 0.0
+
+    gradient_y = np.abs(np.diff(luminance, axis=0, append=luminance[-1:]))
+    gradient_x = np.abs(np.diff(luminance, axis=1, append=luminance[:, -1:]))
+    edges = np.maximum(gradient_x, gradient_y) > 0.12
+    return float(edges[inner].mean())
@@ -0,0 +1,161 @@
+import os
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Union
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+logger = logging.getLogger(__name__)
+
+# Binärer Job-Umschlag:
+#   MAGIC (3 Bytes) | Version (1 Byte) | Kompression (1 Byte) | msgpack-Payload
+# 0xC1 ist in msgpack unbenutzt und kann weder JSON noch gültiges UTF-8 einleiten,
+# dadurch lassen sich JSON- und Binär-Jobs eindeutig unterscheiden.
+MAGIC = b'\xc1WJ'
+ENVELOPE_VERSION = 1
+HEADER_SIZE = len(MAGIC) + 2
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZSTD = 1
+COMPRESSION_LZ4 = 2
+
+# Version 1: bekannte Felder positionell (keine wiederholten Feldnamen), Rest als Dict
+FIELDS_V1 = (
+    'clothing_id', 'user_id', 'storage_bucket', 'storage_path', 'file_name',
+    'content_type', 'file_size', 'created_at', 'retry_count', 'priority'
+)
+
+# ISO-Zeitstempel (naive UTC, wie datetime.utcnow().isoformat()) werden als msgpack Timestamp abgelegt
+TIMESTAMP_FIELDS = frozenset({'created_at', 'retry_at', 'retry_due_at'})
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class JobCodec:
+    """
+    Kodiert und dekodiert Queue-Jobs
+    Schreibt wahlweise JSON oder den binären msgpack-Umschlag (optional komprimiert),
+    liest beide Formate automatisch
+    """
+
+    def __init__(self, job_format: str = None, compression: str = None,
+                 compression_threshold: int = None):
+        """
+        Args:
+            job_format: "msgpack" oder "json" (falls nicht gesetzt: ENV JOB_FORMAT, default msgpack)
+            compression: "none", "zstd" oder "lz4" (falls nicht gesetzt: ENV JOB_COMPRESSION)
+            compression_threshold: Ab dieser Payload-Größe (Bytes) wird komprimiert
+        """
+        self.job_format = (job_format or os.getenv('JOB_FORMAT', 'msgpack')).lower()
+        self.compression = (compression or os.getenv('JOB_COMPRESSION', 'zstd')).lower()
+        self.compression_threshold = compression_threshold or int(os.getenv('JOB_COMPRESSION_THRESHOLD', 1024))
+
+        if self.job_format == 'msgpack' and msgpack is None:
+            logger.warning("⚠️ msgpack nicht installiert - Jobs werden als JSON geschrieben")
+            self.job_format = 'json'
+
+        if self.compression == 'zstd' and zstandard is None:
+            self.compression = 'none'
+        if self.compression == 'lz4' and lz4_frame is None:
+            self.compression = 'none'
+
+        self._zstd_compressor = zstandard.ZstdCompressor(level=3) if zstandard else None
+        self._zstd_decompressor = zstandard.ZstdDecompressor() if zstandard else None
+
+    def encode(self, job_data: Dict[str, Any]) -> Union[bytes, str]:
+        """
+        Serialisiert einen Job im konfigurierten Format
+
+        Args:
+            job_data: Job-Daten
+
+        Returns:
+            Binärer Umschlag (bytes) oder JSON (str)
+        """
+        if self.job_format != 'msgpack':
+            return json.dumps(job_data)
+
+        values = [_pack_value(field, job_data.get(field)) for field in FIELDS_V1]
+        extras = {key: _pack_value(key, value) for key, value in job_data.items() if key not in FIELDS_V1}
+        payload = msgpack.packb([values, extras], use_bin_type=True)
+
+        compression = COMPRESSION_NONE
+        if len(payload) >= self.compression_threshold:
+            if self.compression == 'zstd':
+                payload, compression = self._zstd_compressor.compress(payload), COMPRESSION_ZSTD
+            elif self.compression == 'lz4':
+                payload, compression = lz4_frame.compress(payload), COMPRESSION_LZ4
+
+        return MAGIC + bytes((ENVELOPE_VERSION, compression)) + payload
+
+    def decode(self, raw: Union[bytes, str]) -> Dict[str, Any]:
+        """
+        Deserialisiert einen Job, erkennt JSON und Binär-Umschlag automatisch
+
+        Args:
+            raw: Job wie aus Redis gelesen
+
+        Returns:
+            Job-Daten
+        """
+        if isinstance(raw, str):
+            return json.loads(raw)
+
+        if not raw.startswith(MAGIC):
+            return json.loads(raw)
+
+        version, compression = raw[len(MAGIC)], raw[len(MAGIC) + 1]
+        if version != ENVELOPE_VERSION:
+            raise ValueError(f"Unbekannte Job-Umschlag-Version: {version}")
+        if msgpack is None:
+            raise ValueError("msgpack nicht installiert - Binär-Job kann nicht gelesen werden")
+
+        payload = raw[HEADER_SIZE:]
+        if compression == COMPRESSION_ZSTD:
+            if self._zstd_decompressor is None:
+                raise ValueError("zstandard nicht installiert - komprimierter Job kann nicht gelesen werden")
+            payload = self._zstd_decompressor.decompress(payload)
+        elif compression == COMPRESSION_LZ4:
+            if lz4_frame is None:
+                raise ValueError("lz4 nicht installiert - komprimierter Job kann nicht gelesen werden")
+            payload = lz4_frame.decompress(payload)
+
+        values, extras = msgpack.unpackb(payload, raw=False, timestamp=0)
+        job_data = {field: _unpack_value(value) for field, value in zip(FIELDS_V1, values) if value is not None}
+        job_data.update({key: _unpack_value(value) for key, value in extras.items()})
+        return job_data
+
+
+def _pack_value(field: str, value: Any) -> Any:
+    """Wandelt ISO-Zeitstempel in msgpack Timestamps um (verlustfrei bis Mikrosekunden)"""
+    if field in TIMESTAMP_FIELDS and isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            return value
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        delta = parsed - _EPOCH
+        return msgpack.Timestamp(delta.days * 86400 + delta.seconds, delta.microseconds * 1000)
+    return value
+
+
+def _unpack_value(value: Any) -> Any:
+    """Wandelt msgpack Timestamps zurück in ISO-Strings (naive UTC)"""
+    if msgpack is not None and isinstance(value, msgpack.Timestamp):
+        return (_EPOCH + timedelta(seconds=value.seconds, microseconds=value.nanoseconds // 1000)).isoformat()
+    return value
@@ -1,31 +1,53 @@
 import os
+import json
+import asyncio
 import logging
-from typing import Optional, Dict, Any
+import mimetypes
+from typing import Optional, Dict, Any, List, Tuple, Set
 from datetime import datetime
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, aclosing
 
-from fastapi import FastAPI, HTTPException, Depends, UploadFile, File
+from fastapi import FastAPI, HTTPException, Depends, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 import jwt
+from postgrest.exceptions import APIError
 
 from storage_manager import StorageManager
 from ai import ClothingAI
 from database_manager import DatabaseManager, ProcessingStatus
 from queue_manager import QueueManager
+from analysis_cache import AnalysisCache
+from token_budget import TokenBudget
+from cascade_stats import CascadeStats
+from status_events import StatusEvents
+from status_cache import StatusCache, etag_matches
+from service_container import ServiceContainer
+from upload_stream import receive_upload, receive_uploads, UploadError
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    services = ServiceContainer()
+    await services.startup()
+    app.state.services = services
+    
     logger.info("🚀 Wardroberry AI API gestartet")
     logger.info("📋 Verfügbare Endpoints:")
     logger.info("  POST /upload-clothing - Kleidungsstück hochladen")
+    logger.info("  POST /upload-clothing/batch - Viele Kleidungsstücke hochladen")
+    logger.info("  POST /upload-clothing/signed-url - Direkt-Upload in den Storage vorbereiten")
+    logger.info("  POST /upload-clothing/{id}/finalize - Direkt-Upload abschließen")
     logger.info("  GET  /clothing/{id}/status - Status-Check")
+    logger.info("  GET  /clothing/events - Status-Updates per Server-Sent Events")
+    logger.info("  WS   /clothing/events/ws - Status-Updates per WebSocket")
     logger.info("  GET  /queue/stats - Queue-Statistiken")
     logger.info("  GET  /health - Health Check")
     yield
     # Shutdown
+    await services.shutdown()
     logger.info("🔄 Wardroberry AI API beendet")
 
 # FastAPI App Setup
@@ -52,18 +74,42 @@ logger = logging.getLogger(__name__)
 # Security Setup
 security = HTTPBearer(auto_error=False)
 
-# Dependencies
-def get_storage_manager() -> StorageManager:
+# Dependencies (langlebige Instanzen aus dem Service Container)
+def get_services(request: Request) -> ServiceContainer:
+    """Dependency für den prozessweiten ServiceContainer"""
+    return request.app.state.services
+
+def get_storage_manager(services: ServiceContainer = Depends(get_services)) -> StorageManager:
     """Dependency für StorageManager"""
-    return StorageManager()
+    return services.storage
 
-def get_database_manager() -> DatabaseManager:
+def get_database_manager(services: ServiceContainer = Depends(get_services)) -> DatabaseManager:
     """Dependency für DatabaseManager"""
-    return DatabaseManager()
+    return services.db
 
-def get_queue_manager() -> QueueManager:
+def get_queue_manager(services: ServiceContainer = Depends(get_services)) -> QueueManager:
     """Dependency für QueueManager"""
-    return QueueManager()
+    return services.queue
+
+def get_analysis_cache(services: ServiceContainer = Depends(get_services)) -> AnalysisCache:
+    """Dependency für AnalysisCache"""
+    return services.analysis_cache
+
+def get_token_budget(services: ServiceContainer = Depends(get_services)) -> TokenBudget:
+    """Dependency für TokenBudget"""
+    return services.token_budget
+
+def get_cascade_stats(services: ServiceContainer = Depends(get_services)) -> CascadeStats:
+    """Dependency für CascadeStats"""
+    return services.cascade_stats
+
+def get_status_events(services: ServiceContainer = Depends(get_services)) -> StatusEvents:
+    """Dependency für StatusEvents"""
+    return services.status_events
+
+def get_status_cache(services: ServiceContainer = Depends(get_services)) -> StatusCache:
+    """Dependency für StatusCache"""
+    return services.status_cache
 
 async def get_current_user_id(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
     """
@@ -72,8 +118,25 @@ async def get_current_user_id(credentials: HTTPAuthorizationCredentials = Depend
     if not credentials:
         raise HTTPException(status_code=401, detail="Authorization header fehlt")
     
+    return user_id_from_token(credentials.credentials)
+
+async def get_stream_user_id(
+    token: Optional[str] = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> str:
+    """
+    User-ID für Event-Streams: Authorization Header oder ?token=
+    (EventSource und Browser-WebSockets können keine Header setzen)
+    """
+    if credentials:
+        return user_id_from_token(credentials.credentials)
+    if token:
+        return user_id_from_token(token)
+    raise HTTPException(status_code=401, detail="Authorization header fehlt")
+
+def user_id_from_token(token: str) -> str:
+    """Liest die User-ID (sub) aus einem Supabase JWT"""
     try:
-        token = credentials.credentials
         payload = jwt.decode(token, options={"verify_signature": False})
         user_id = payload.get("sub")
         
@@ -97,6 +160,127 @@ class ClothingUploadResponse(BaseModel):
     status: str
     message: str
     created_at: str
+    duplicate: bool = False  # True wenn das Bild bereits als Kleidungsstück existiert
+
+class BatchUploadResult(BaseModel):
+    """Ergebnis einer Datei im Batch-Upload"""
+    index: int                      # Position der Datei im Request
+    file_name: Optional[str] = None
+    id: Optional[str] = None        # None wenn die Datei abgelehnt wurde
+    status: str                     # pending/... oder "rejected"
+    duplicate: bool = False
+    error: Optional[str] = None
+
+class BatchUploadResponse(BaseModel):
+    """Antwort des Batch-Uploads mit Ergebnis pro Datei"""
+    accepted: int
+    duplicates: int
+    rejected: int
+    results: List[BatchUploadResult]
+
+class SignedUploadRequest(BaseModel):
+    """Anfrage für einen Direkt-Upload in den Storage"""
+    content_type: str
+    file_size: int
+    file_name: Optional[str] = None
+    content_hash: Optional[str] = None  # SHA-256 (hex), optional für den Duplikat-Check vor dem Upload
+
+class SignedUploadResponse(BaseModel):
+    """Signierte Upload-URL + ID des angelegten Kleidungsstücks"""
+    id: str
+    status: str
+    created_at: str
+    upload_url: Optional[str] = None  # None bei Duplikat (kein Upload nötig)
+    token: Optional[str] = None
+    path: Optional[str] = None
+    duplicate: bool = False
+
+# ======================
+# HELPERS
+# ======================
+
+# OpenAPI-Beschreibung des Upload-Bodys (der Body wird als Stream gelesen, nicht per File())
+UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "string", "format": "binary",
+                                            "description": "Bilddatei des Kleidungsstücks"}},
+                    "required": ["file"]
+                }
+            }
+        }
+    }
+}
+
+BATCH_UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "array", "items": {"type": "string", "format": "binary"},
+                                            "description": "Bilddateien (Feld 'file' mehrfach)"}},
+                    "required": ["file"]
+                }
+            }
+        }
+    }
+}
+
+UPLOAD_BATCH_MAX_FILES = int(os.getenv('UPLOAD_BATCH_MAX_FILES', 200))
+UPLOAD_BATCH_CONCURRENCY = int(os.getenv('UPLOAD_BATCH_CONCURRENCY', 8))  # Parallele Storage-Uploads pro Batch
+BATCH_REJECTED = "rejected"
+
+def duplicate_upload_response(clothing_item: Dict[str, Any]) -> ClothingUploadResponse:
+    """Antwort für ein bereits vorhandenes Kleidungsstück mit identischem Bild"""
+    return ClothingUploadResponse(
+        id=clothing_item['id'],
+        status=clothing_item.get('processing_status', ProcessingStatus.PENDING.value),
+        message="Kleidungsstück bereits vorhanden - kein erneuter Upload nötig.",
+        created_at=clothing_item['created_at'],
+        duplicate=True
+    )
+
+async def is_reprocessable_duplicate(queue: QueueManager, existing_item: Dict[str, Any]) -> bool:
+    """
+    Fehlgeschlagenes Duplikat ohne Job in Queue, Retry oder In-Flight
+    (sonst würde ein zweiter Job für dasselbe Kleidungsstück eingereiht)
+    """
+    if existing_item.get('processing_status') != ProcessingStatus.FAILED.value:
+        return False
+    return not await queue.is_tracked_async(existing_item['id'])
+
+async def enqueue_processing_job(queue: QueueManager, db: DatabaseManager, storage: StorageManager,
+                                 clothing_id: str, user_id: str, storage_path: str, file_name: str,
+                                 content_type: str, file_size: int, content_hash: Optional[str] = None) -> bool:
+    """
+    Reiht den Verarbeitungsjob ein; schlägt das fehl, wird das Kleidungsstück als failed markiert
+    
+    Returns:
+        True wenn der Job eingereiht wurde
+    """
+    job_added = await queue.add_clothing_processing_job_async(
+        clothing_id=clothing_id,
+        user_id=user_id,
+        storage_path=storage_path,
+        file_name=file_name,
+        content_type=content_type,
+        priority=0,  # Normal priority
+        file_size=file_size,
+        storage_bucket=storage.original_bucket,
+        content_hash=content_hash
+    )
+    
+    if not job_added:
+        logger.error(f"❌ Job konnte nicht zur Queue hinzugefügt werden: {clothing_id}")
+        # Fallback: Markiere als failed
+        await db.mark_processing_failed_async(clothing_id, "Queue-Fehler: Job konnte nicht hinzugefügt werden")
+    return job_added
 
 class ClothingStatusResponse(BaseModel):
     """Status-Antwort für Polling"""
@@ -111,6 +295,8 @@ class ClothingStatusResponse(BaseModel):
     confidence: Optional[float] = None
     image_url: Optional[str] = None
     extracted_image_url: Optional[str] = None
+    medium_image_url: Optional[str] = None  # 512px WebP (Detailansicht)
+    thumbnail_url: Optional[str] = None     # 128px WebP (Listen/Grids)
     processing_error: Optional[str] = None
     updated_at: str
 
@@ -118,9 +304,9 @@ class ClothingStatusResponse(BaseModel):
 # MAIN ENDPOINTS
 # ======================
 
-@app.post("/upload-clothing", response_model=ClothingUploadResponse)
+@app.post("/upload-clothing", response_model=ClothingUploadResponse, openapi_extra=UPLOAD_OPENAPI)
 async def upload_clothing_item(
-    file: UploadFile = File(..., description="Bilddatei des Kleidungsstücks"),
+    request: Request,
     user_id: str = Depends(get_current_user_id),
     storage: StorageManager = Depends(get_storage_manager),
     db: DatabaseManager = Depends(get_database_manager),
@@ -130,57 +316,91 @@ async def upload_clothing_item(
     🚀 **HAUPTENDPOINT**: Kleidungsstück hochladen → sofortige Bestätigung
     
     **Workflow:**
-    1. ✅ Bild validieren
-    2. 📤 Original hochladen
-    3. 💾 Pending-Eintrag in DB erstellen
-    4. 📋 Job zur Redis-Queue hinzufügen
-    5. 🚀 Sofortige Bestätigung an Frontend
-    6. 🔄 Worker verarbeitet asynchron (Extraktion + Analyse)
+    1. ✅ Bild als Stream empfangen: Größenlimit, Magic Bytes und SHA-256 pro Chunk
+       (kleine Dateien im Speicher, größere in einer temporären Datei)
+    2. ♻️ Duplikat-Check: gleiches Bild des Nutzers → vorhandenes Kleidungsstück zurückgeben
+    3. 📤 Original hochladen
+    4. 💾 Pending-Eintrag in DB erstellen
+    5. 📋 Job zur Redis-Queue hinzufügen
+    6. 🚀 Sofortige Bestätigung an Frontend
+    7. 🔄 Worker verarbeitet asynchron (Extraktion + Analyse)
     """
+    upload = None
     try:
-        # 1. Datei-Validierung
-        file_content = await file.read()
-        file_size = len(file_content)
+        # 1. Datei-Validierung (Typ aus den Magic Bytes, nicht aus dem Content-Type des Clients)
+        try:
+            upload = await receive_upload(request)
+        except UploadError as e:
+            raise HTTPException(status_code=e.status_code, detail=str(e))
+        content_hash = upload.content_hash
+        file_size = upload.size
+        file_name = upload.filename or "clothing.jpg"
         
-        is_valid, error_message = storage.validate_image_file(file.content_type, file_size)
+        is_valid, error_message = storage.validate_image_file(upload.content_type, file_size)
         if not is_valid:
             raise HTTPException(status_code=400, detail=error_message)
         
-        logger.info(f"📤 Lade Original-Bild hoch für User: {user_id}")
+        # 2. Duplikat-Check (erneuter Upload oder Client-Retry nach Timeout)
+        existing_item = await db.find_clothing_item_by_hash_async(user_id, content_hash)
+        if existing_item and not await is_reprocessable_duplicate(queue, existing_item):
+            logger.info(f"♻️ Bild bereits vorhanden für User {user_id}: {existing_item['id']}")
+            return duplicate_upload_response(existing_item)
         
-        # 2. Original-Bild hochladen
-        original_path, original_url = storage.upload_original_image(
-            user_id=user_id,
-            file_content=file_content,
-            file_name=file.filename or "clothing.jpg",
-            content_type=file.content_type
-        )
+        # Fehlgeschlagenes Duplikat: vorhandenes Storage-Objekt wiederverwenden und neu einreihen
+        original_path = None
+        if existing_item:
+            original_path = storage.path_from_public_url(existing_item['image_url'], storage.original_bucket)
         
-        # 3. Pending-Eintrag in Datenbank erstellen
-        clothing_item = db.create_pending_clothing_item(
-            user_id=user_id,
-            original_image_url=original_url,
-            original_filename=file.filename
-        )
+        if original_path:
+            logger.info(f"♻️ Fehlgeschlagenes Duplikat wird erneut verarbeitet: {existing_item['id']}")
+            clothing_item = await db.reset_failed_clothing_item_async(existing_item['id'])
+            if not clothing_item:
+                # Paralleler Re-Upload hat das Kleidungsstück bereits zurückgesetzt
+                return duplicate_upload_response(await db.get_clothing_item_async(existing_item['id']) or existing_item)
+        else:
+            logger.info(f"📤 Lade Original-Bild hoch für User: {user_id}")
+            
+            # 3. Original-Bild hochladen
+            original_path, original_url = await storage.upload_original_image_async(
+                user_id=user_id,
+                file_content=upload.content(),
+                file_name=file_name,
+                content_type=upload.content_type
+            )
+            
+            # 4. Pending-Eintrag in Datenbank erstellen
+            try:
+                clothing_item = await db.create_pending_clothing_item_async(
+                    user_id=user_id,
+                    original_image_url=original_url,
+                    original_filename=upload.filename,
+                    content_hash=content_hash
+                )
+            except APIError as e:
+                # Unique-Index (user_id, content_hash): paralleler Upload desselben Bildes war schneller
+                if e.code != '23505':
+                    raise
+                await storage.delete_image_async(storage.original_bucket, original_path)
+                existing_item = await db.find_clothing_item_by_hash_async(user_id, content_hash)
+                if not existing_item:
+                    raise
+                return duplicate_upload_response(existing_item)
         
-        # 4. Job zur Verarbeitungs-Queue hinzufügen
-        job_added = queue.add_clothing_processing_job(
+        # 5. Job zur Verarbeitungs-Queue hinzufügen
+        await enqueue_processing_job(
+            queue, db, storage,
             clothing_id=clothing_item['id'],
             user_id=user_id,
-            file_content=file_content,
-            file_name=file.filename or "clothing.jpg",
-            content_type=file.content_type,
-            priority=0  # Normal priority
+            storage_path=original_path,
+            file_name=file_name,
+            content_type=upload.content_type,
+            file_size=file_size,
+            content_hash=content_hash
         )
         
-        if not job_added:
-            logger.error(f"❌ Job konnte nicht zur Queue hinzugefügt werden: {clothing_item['id']}")
-            # Fallback: Markiere als failed
-            db.mark_processing_failed(clothing_item['id'], "Queue-Fehler: Job konnte nicht hinzugefügt werden")
-        
         logger.info(f"✅ Kleidungsstück empfangen: {clothing_item['id']}")
         
-        # 5. Sofortige Bestätigung zurückgeben
+        # 6. Sofortige Bestätigung zurückgeben
         return ClothingUploadResponse(
             id=clothing_item['id'],
             status=ProcessingStatus.PENDING.value,
@@ -193,20 +413,324 @@ async def upload_clothing_item(
     except Exception as e:
         logger.error(f"❌ Fehler beim Upload: {e}")
         raise HTTPException(status_code=500, detail=f"Upload fehlgeschlagen: {str(e)}")
+    finally:
+        if upload is not None:
+            upload.close()
 
-@app.get("/clothing/{clothing_id}/status", response_model=ClothingStatusResponse)
-async def get_clothing_status(
+@app.post("/upload-clothing/batch", response_model=BatchUploadResponse, openapi_extra=BATCH_UPLOAD_OPENAPI)
+async def upload_clothing_batch(
+    request: Request,
+    user_id: str = Depends(get_current_user_id),
+    storage: StorageManager = Depends(get_storage_manager),
+    db: DatabaseManager = Depends(get_database_manager),
+    queue: QueueManager = Depends(get_queue_manager)
+):
+    """
+    📦 **BATCH-UPLOAD**: Viele Kleidungsstücke in einem Request (Onboarding)
+    
+    **Workflow:**
+    1. ✅ Dateien als Stream empfangen und einzeln validieren (ungültige werden abgelehnt, nicht der ganze Batch)
+    2. ♻️ Duplikat-Check für alle Hashes auf einmal (auch gleiche Datei mehrfach im Batch)
+    3. 📤 Originale parallel hochladen
+    4. 💾 Alle Pending-Einträge mit einem Bulk-Insert
+    5. 📋 Alle Jobs mit einer Redis-Pipeline einreihen
+    6. 🚀 Ergebnis pro Datei (Reihenfolge wie im Request)
+    """
+    uploads = []
+    try:
+        # 1. Empfang + Validierung pro Datei
+        try:
+            uploads = await receive_uploads(request, max_files=UPLOAD_BATCH_MAX_FILES, collect_errors=True)
+        except UploadError as e:
+            raise HTTPException(status_code=e.status_code, detail=str(e))
+        
+        results = [BatchUploadResult(index=i, file_name=upload.filename, status=BATCH_REJECTED)
+                   for i, upload in enumerate(uploads)]
+        valid = {}
+        for i, upload in enumerate(uploads):
+            is_valid, error_message = (False, str(upload.error)) if upload.error else \
+                storage.validate_image_file(upload.content_type, upload.size)
+            if is_valid:
+                valid[i] = upload
+            else:
+                results[i].error = error_message
+        
+        # 2. Duplikate: vorhandene Kleidungsstücke und Wiederholungen innerhalb des Batches
+        existing = await db.find_clothing_items_by_hashes_async(
+            user_id, list({upload.content_hash for upload in valid.values()})
+        )
+        jobs = []
+        new_files = {}   # content_hash → Index der ersten Datei mit diesem Inhalt
+        repeated = {}    # Index → Index der ersten Datei mit gleichem Inhalt
+        for i, upload in valid.items():
+            existing_item = existing.get(upload.content_hash)
+            if existing_item:
+                results[i] = await batch_duplicate_result(results[i], existing_item, user_id, storage, db, queue, jobs)
+            elif upload.content_hash in new_files:
+                repeated[i] = new_files[upload.content_hash]
+            else:
+                new_files[upload.content_hash] = i
+        
+        # 3. Originale parallel hochladen (begrenzt, damit der Storage nicht überrannt wird)
+        semaphore = asyncio.Semaphore(UPLOAD_BATCH_CONCURRENCY)
+        
+        async def upload_original(i: int) -> Tuple[str, str]:
+            async with semaphore:
+                return await storage.upload_original_image_async(
+                    user_id=user_id,
+                    file_content=uploads[i].content(),
+                    file_name=uploads[i].filename or "clothing.jpg",
+                    content_type=uploads[i].content_type
+                )
+        
+        indexes = list(new_files.values())
+        outcomes = await asyncio.gather(*(upload_original(i) for i in indexes), return_exceptions=True)
+        stored = {}
+        for i, outcome in zip(indexes, outcomes):
+            if isinstance(outcome, Exception):
+                results[i].error = f"Upload fehlgeschlagen: {outcome}"
+            else:
+                stored[i] = outcome
+        
+        # 4. Bulk-Insert aller Pending-Einträge
+        if stored:
+            try:
+                created = await db.create_pending_clothing_items_async([
+                    {
+                        'user_id': user_id,
+                        'original_image_url': original_url,
+                        'original_filename': uploads[i].filename,
+                        'content_hash': uploads[i].content_hash
+                    }
+                    for i, (_, original_url) in stored.items()
+                ])
+            except Exception as e:
+                logger.error(f"❌ Bulk-Insert fehlgeschlagen: {e}")
+                created = [e] * len(stored)
+            
+            for (i, (original_path, _)), clothing_item in zip(stored.items(), created):
+                upload = uploads[i]
+                if isinstance(clothing_item, Exception):
+                    await storage.delete_image_async(storage.original_bucket, original_path)
+                    results[i].error = f"Speichern fehlgeschlagen: {clothing_item}"
+                elif clothing_item is None:
+                    # Paralleler Upload desselben Bildes war schneller
+                    await storage.delete_image_async(storage.original_bucket, original_path)
+                    existing_item = await db.find_clothing_item_by_hash_async(user_id, upload.content_hash)
+                    results[i] = batch_result(results[i], existing_item, duplicate=True)
+                else:
+                    results[i] = batch_result(results[i], clothing_item)
+                    jobs.append({
+                        'clothing_id': clothing_item['id'],
+                        'user_id': user_id,
+                        'storage_path': original_path,
+                        'file_name': upload.filename or "clothing.jpg",
+                        'content_type': upload.content_type,
+                        'file_size': upload.size,
+                        'storage_bucket': storage.original_bucket,
+                        'content_hash': upload.content_hash
+                    })
+        
+        for i, first in repeated.items():
+            results[i] = results[first].model_copy(update={
+                'index': i, 'file_name': uploads[i].filename, 'duplicate': results[first].id is not None
+            })
+        
+        # 5. Alle Jobs mit einer Pipeline einreihen
+        if jobs and not await queue.add_clothing_processing_jobs_async(jobs):
+            error_message = "Queue-Fehler: Job konnte nicht hinzugefügt werden"
+            await asyncio.gather(*(db.mark_processing_failed_async(job['clothing_id'], error_message) for job in jobs))
+            failed_ids = {job['clothing_id'] for job in jobs}
+            for result in results:
+                if result.id in failed_ids:
+                    result.status, result.error = ProcessingStatus.FAILED.value, error_message
+        
+        accepted = sum(1 for result in results if result.id and not result.duplicate and not result.error)
+        duplicates = sum(1 for result in results if result.duplicate)
+        logger.info(f"📦 Batch-Upload von User {user_id}: {accepted} neu, {duplicates} Duplikate, "
+                    f"{len(results) - accepted - duplicates} abgelehnt")
+        
+        # 6. Ergebnis pro Datei
+        return BatchUploadResponse(
+            accepted=accepted,
+            duplicates=duplicates,
+            rejected=len(results) - accepted - duplicates,
+            results=results
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Fehler beim Batch-Upload: {e}")
+        raise HTTPException(status_code=500, detail=f"Batch-Upload fehlgeschlagen: {str(e)}")
+    finally:
+        for upload in uploads:
+            upload.close()
+
+def batch_result(result: BatchUploadResult, clothing_item: Optional[Dict[str, Any]],
+                 duplicate: bool = False) -> BatchUploadResult:
+    """Trägt ID und Status eines Kleidungsstücks in das Ergebnis einer Datei ein"""
+    if not clothing_item:
+        return result.model_copy(update={'error': "Kleidungsstück nicht gefunden"})
+    return result.model_copy(update={
+        'id': clothing_item['id'],
+        'status': clothing_item.get('processing_status', ProcessingStatus.PENDING.value),
+        'duplicate': duplicate,
+        'error': None
+    })
+
+async def batch_duplicate_result(result: BatchUploadResult, existing_item: Dict[str, Any], user_id: str,
+                                 storage: StorageManager, db: DatabaseManager, queue: QueueManager,
+                                 jobs: List[Dict[str, Any]]) -> BatchUploadResult:
+    """
+    Ergebnis für ein bereits vorhandenes Bild im Batch
+    Fehlgeschlagene Duplikate werden zurückgesetzt und ihr Job in die gemeinsame Pipeline gelegt.
+    """
+    original_path = storage.path_from_public_url(existing_item['image_url'], storage.original_bucket)
+    if original_path and await is_reprocessable_duplicate(queue, existing_item):
+        logger.info(f"♻️ Fehlgeschlagenes Duplikat wird erneut verarbeitet: {existing_item['id']}")
+        reset_item = await db.reset_failed_clothing_item_async(existing_item['id'])
+        if not reset_item:
+            # Paralleler Re-Upload hat das Kleidungsstück bereits zurückgesetzt
+            return batch_result(result, await db.get_clothing_item_async(existing_item['id']), duplicate=True)
+        existing_item = reset_item
+        jobs.append({
+            'clothing_id': existing_item['id'],
+            'user_id': user_id,
+            'storage_path': original_path,
+            'file_name': existing_item.get('original_filename') or os.path.basename(original_path),
+            'content_type': mimetypes.guess_type(original_path)[0] or 'image/jpeg',
+            'storage_bucket': storage.original_bucket
+        })
+    return batch_result(result, existing_item, duplicate=True)
+
+@app.post("/upload-clothing/signed-url", response_model=SignedUploadResponse)
+async def create_signed_upload(
+    upload: SignedUploadRequest,
+    user_id: str = Depends(get_current_user_id),
+    storage: StorageManager = Depends(get_storage_manager),
+    db: DatabaseManager = Depends(get_database_manager),
+    queue: QueueManager = Depends(get_queue_manager)
+):
+    """
+    📤 **DIREKT-UPLOAD (Phase 1)**: Signierte Upload-URL für den Original-Bucket ausstellen
+    
+    Die Bilddaten gehen vom Client direkt in Supabase Storage, die API verarbeitet nur Metadaten.
+    
+    **Workflow:**
+    1. ✅ Angekündigten Typ und Größe validieren
+    2. ♻️ Optionaler Duplikat-Check per content_hash
+    3. 🔏 Signierte Upload-URL erstellen
+    4. 💾 Eintrag im Status `uploading` anlegen
+    5. ➡️ Client lädt per PUT auf `upload_url` hoch und ruft danach `/upload-clothing/{id}/finalize`
+    """
+    try:
+        # 1. Angekündigte Datei validieren (tatsächliche Werte prüft finalize)
+        is_valid, error_message = storage.validate_image_file(upload.content_type, upload.file_size)
+        if not is_valid:
+            raise HTTPException(status_code=400, detail=error_message)
+        
+        # 2. Duplikat-Check (nur per Nutzer, der Hash landet nicht im Job/Analyse-Cache)
+        if upload.content_hash:
+            existing_item = await db.find_clothing_item_by_hash_async(user_id, upload.content_hash)
+            if existing_item:
+                return await signed_upload_duplicate(existing_item, user_id, storage, db, queue)
+        
+        # 3. Signierte Upload-URL
+        signed = await storage.create_signed_upload_url_async(user_id, upload.content_type)
+        
+        # 4. Eintrag im Status UPLOADING (wird vom Orphan-Sweep nicht eingereiht)
+        try:
+            clothing_item = await db.create_pending_clothing_item_async(
+                user_id=user_id,
+                original_image_url=signed['public_url'],
+                original_filename=upload.file_name,
+                content_hash=upload.content_hash,
+                status=ProcessingStatus.UPLOADING
+            )
+        except APIError as e:
+            # Unique-Index (user_id, content_hash): paralleler Upload desselben Bildes war schneller
+            if e.code != '23505':
+                raise
+            existing_item = await db.find_clothing_item_by_hash_async(user_id, upload.content_hash)
+            if not existing_item:
+                raise
+            return await signed_upload_duplicate(existing_item, user_id, storage, db, queue)
+        
+        logger.info(f"🔏 Direkt-Upload vorbereitet: {clothing_item['id']}")
+        
+        return SignedUploadResponse(
+            id=clothing_item['id'],
+            status=ProcessingStatus.UPLOADING.value,
+            created_at=clothing_item['created_at'],
+            upload_url=signed['signed_url'],
+            token=signed['token'],
+            path=signed['path']
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Fehler beim Erstellen der Upload-URL: {e}")
+        raise HTTPException(status_code=500, detail=f"Upload-URL fehlgeschlagen: {str(e)}")
+
+async def signed_upload_duplicate(existing_item: Dict[str, Any], user_id: str, storage: StorageManager,
+                                  db: DatabaseManager, queue: QueueManager) -> SignedUploadResponse:
+    """
+    Antwort auf einen Direkt-Upload eines bereits vorhandenen Bildes
+    Fehlgeschlagene Duplikate werden mit dem vorhandenen Storage-Objekt erneut eingereiht,
+    nicht abgeschlossene Direkt-Uploads bekommen eine neue URL für denselben Pfad.
+    """
+    status = existing_item.get('processing_status', ProcessingStatus.PENDING.value)
+    original_path = storage.path_from_public_url(existing_item['image_url'], storage.original_bucket)
+    response = SignedUploadResponse(
+        id=existing_item['id'],
+        status=status,
+        created_at=existing_item['created_at'],
+        duplicate=True
+    )
+    
+    if status == ProcessingStatus.UPLOADING.value and original_path:
+        signed = await storage.create_signed_upload_url_async(user_id, file_path=original_path)
+        response.upload_url, response.token, response.path = signed['signed_url'], signed['token'], signed['path']
+    elif original_path and await is_reprocessable_duplicate(queue, existing_item):
+        # Größe und Typ des vorhandenen Objekts für den Job (fehlt es, bleibt das Kleidungsstück fehlgeschlagen)
+        object_info = await storage.get_object_info_async(storage.original_bucket, original_path)
+        if object_info and await db.reset_failed_clothing_item_async(existing_item['id']):
+            logger.info(f"♻️ Fehlgeschlagenes Duplikat wird erneut verarbeitet: {existing_item['id']}")
+            await enqueue_processing_job(
+                queue, db, storage,
+                clothing_id=existing_item['id'],
+                user_id=user_id,
+                storage_path=original_path,
+                file_name=existing_item.get('original_filename') or os.path.basename(original_path),
+                content_type=object_info['content_type'] or mimetypes.guess_type(original_path)[0] or 'image/jpeg',
+                file_size=object_info['size'],
+                content_hash=existing_item.get('content_hash')
+            )
+            response.status = ProcessingStatus.PENDING.value
+    
+    logger.info(f"♻️ Bild bereits vorhanden für User {user_id}: {existing_item['id']}")
+    return response
+
+@app.post("/upload-clothing/{clothing_id}/finalize", response_model=ClothingUploadResponse)
+async def finalize_signed_upload(
     clothing_id: str,
     user_id: str = Depends(get_current_user_id),
-    db: DatabaseManager = Depends(get_database_manager)
+    storage: StorageManager = Depends(get_storage_manager),
+    db: DatabaseManager = Depends(get_database_manager),
+    queue: QueueManager = Depends(get_queue_manager)
 ):
     """
-    📊 **STATUS-CHECK**: Aktuellen Verarbeitungsstatus abrufen
+    ✅ **DIREKT-UPLOAD (Phase 2)**: Hochgeladenes Objekt prüfen und Verarbeitung starten
     
-    Für Frontend-Polling um Verarbeitungsfortschritt zu verfolgen
+    **Workflow:**
+    1. 🔍 Größe und Typ des Objekts aus den Storage-Metadaten prüfen (kein Download)
+    2. 💾 Status `uploading` → `pending` (idempotent bei wiederholtem Aufruf)
+    3. 📋 Job zur Redis-Queue hinzufügen
     """
     try:
-        clothing_item = db.get_clothing_item(clothing_id)
+        clothing_item = await db.get_clothing_item_async(clothing_id)
         
         if not clothing_item:
             raise HTTPException(status_code=404, detail="Kleidungsstück nicht gefunden")
@@ -215,39 +739,222 @@ async def get_clothing_status(
         if clothing_item['user_id'] != user_id:
             raise HTTPException(status_code=403, detail="Zugriff verweigert")
         
-        return ClothingStatusResponse(
-            id=clothing_item['id'],
-            status=clothing_item.get('processing_status', 'unknown'),
-            category=clothing_item.get('category'),
-            color=clothing_item.get('color'),
-            style=clothing_item.get('style'),
-            season=clothing_item.get('season'),
-            material=clothing_item.get('material'),
-            occasion=clothing_item.get('occasion'),
-            confidence=clothing_item.get('ai_confidence'),
-            image_url=clothing_item.get('image_url'),
-            extracted_image_url=clothing_item.get('extracted_image_url'),
-            processing_error=clothing_item.get('processing_error'),
-            updated_at=clothing_item.get('updated_at')
+        # Bereits abgeschlossen (Client-Retry): aktuellen Stand zurückgeben
+        if clothing_item.get('processing_status') != ProcessingStatus.UPLOADING.value:
+            return ClothingUploadResponse(
+                id=clothing_item['id'],
+                status=clothing_item.get('processing_status', ProcessingStatus.PENDING.value),
+                message="Upload bereits abgeschlossen.",
+                created_at=clothing_item['created_at']
+            )
+        
+        # 1. Objekt prüfen
+        original_path = storage.path_from_public_url(clothing_item['image_url'], storage.original_bucket)
+        object_info = await storage.get_object_info_async(storage.original_bucket, original_path)
+        if not object_info:
+            raise HTTPException(status_code=409, detail="Datei wurde noch nicht hochgeladen")
+        
+        is_valid, error_message = storage.validate_image_file(object_info['content_type'], object_info['size'])
+        if not is_valid:
+            await storage.delete_image_async(storage.original_bucket, original_path)
+            await db.mark_processing_failed_async(clothing_id, f"Ungültiger Upload: {error_message}")
+            raise HTTPException(status_code=400, detail=error_message)
+        
+        # 2. Statusübergang (paralleler Finalize-Aufruf: nur einer reiht den Job ein)
+        clothing_item = await db.finalize_upload_async(clothing_id)
+        if clothing_item:
+            # 3. Job zur Verarbeitungs-Queue hinzufügen (Hash berechnet der Worker selbst)
+            await enqueue_processing_job(
+                queue, db, storage,
+                clothing_id=clothing_id,
+                user_id=user_id,
+                storage_path=original_path,
+                file_name=clothing_item.get('original_filename') or os.path.basename(original_path),
+                content_type=object_info['content_type'],
+                file_size=object_info['size']
+            )
+            logger.info(f"✅ Direkt-Upload empfangen: {clothing_id}")
+        
+        return ClothingUploadResponse(
+            id=clothing_id,
+            status=ProcessingStatus.PENDING.value,
+            message="Kleidungsstück empfangen! Verarbeitung läuft im Hintergrund.",
+            created_at=(clothing_item or {}).get('created_at') or datetime.now().isoformat()
         )
         
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Fehler beim Abschließen des Uploads: {e}")
+        raise HTTPException(status_code=500, detail=f"Upload-Abschluss fehlgeschlagen: {str(e)}")
+
+@app.get("/clothing/{clothing_id}/status", response_model=ClothingStatusResponse,
+         responses={304: {"description": "Status unverändert (If-None-Match)"}})
+async def get_clothing_status(
+    clothing_id: str,
+    request: Request,
+    response: Response,
+    user_id: str = Depends(get_current_user_id),
+    db: DatabaseManager = Depends(get_database_manager),
+    status_cache: StatusCache = Depends(get_status_cache)
+):
+    """
+    📊 **STATUS-CHECK**: Aktuellen Verarbeitungsstatus abrufen
+    
+    Für Frontend-Polling um Verarbeitungsfortschritt zu verfolgen. Liest aus dem Redis Status-Cache
+    (Supabase nur bei einem Miss); mit `If-None-Match` liefert ein unveränderter Status 304 ohne Body.
+    """
+    try:
+        record = await status_cache.get_async(clothing_id)
+        
+        if record is None:
+            clothing_item = await db.get_clothing_item_async(clothing_id)
+            
+            if not clothing_item:
+                raise HTTPException(status_code=404, detail="Kleidungsstück nicht gefunden")
+            
+            record = await status_cache.put_async(clothing_item, only_missing=True)
+        
+        # RLS-Check: Nur eigene Kleidungsstücke
+        if record.get('user_id') != user_id:
+            raise HTTPException(status_code=403, detail="Zugriff verweigert")
+        
+        # no-cache: Browser darf speichern, muss aber per ETag revalidieren (304 statt Body)
+        headers = {"ETag": record['etag'], "Cache-Control": "private, no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), record['etag']):
+            return Response(status_code=304, headers=headers)
+        
+        response.headers.update(headers)
+        return ClothingStatusResponse(**{
+            field: value for field, value in record.items() if field in ClothingStatusResponse.model_fields
+        })
+        
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"❌ Fehler beim Status-Check: {e}")
         raise HTTPException(status_code=500, detail=f"Status-Check fehlgeschlagen: {str(e)}")
 
+# ======================
+# STATUS-EVENTS (SSE / WEBSOCKET)
+# ======================
+
+STATUS_EVENTS_MAX_IDS = 500
+
+def parse_clothing_ids(ids: Optional[str]) -> Set[str]:
+    """Kommagetrennte Kleidungsstück-IDs für den Event-Filter (leer = alle des Nutzers)"""
+    clothing_ids = {clothing_id.strip() for clothing_id in (ids or "").split(",") if clothing_id.strip()}
+    if len(clothing_ids) > STATUS_EVENTS_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"Zu viele IDs. Maximum: {STATUS_EVENTS_MAX_IDS}")
+    return clothing_ids
+
+@app.get("/clothing/events")
+async def stream_clothing_events(
+    request: Request,
+    ids: Optional[str] = None,
+    last_event_id: Optional[str] = None,
+    user_id: str = Depends(get_stream_user_id),
+    status_events: StatusEvents = Depends(get_status_events)
+):
+    """
+    📡 **STATUS-EVENTS**: Statuswechsel aller Kleidungsstücke des Nutzers per Server-Sent Events
+    
+    Ersetzt das Polling von /clothing/{id}/status: eine Verbindung für beliebig viele Uploads.
+    Optional `ids` (kommagetrennt) als Filter. Nach einem Verbindungsabbruch sendet EventSource
+    automatisch den Header `Last-Event-ID`, verpasste Events werden nachgeliefert
+    (alternativ `?last_event_id=`, z.B. nach einem Neuladen der Seite).
+    """
+    clothing_ids = parse_clothing_ids(ids)
+    resume_id = request.headers.get("last-event-id") or last_event_id
+    
+    async def event_stream():
+        yield "retry: 3000\n\n"
+        async with aclosing(status_events.events(user_id, resume_id, clothing_ids)) as events:
+            async for event in events:
+                if event is None:
+                    yield ": ping\n\n"
+                    continue
+                event_id = event.pop('id')
+                yield f"id: {event_id}\nevent: status\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.websocket("/clothing/events/ws")
+async def websocket_clothing_events(websocket: WebSocket):
+    """
+    📡 **STATUS-EVENTS**: Wie /clothing/events, aber per WebSocket
+    
+    Auth per `?token=` oder Authorization Header, Filter per `?ids=`, Resume per `?last_event_id=`.
+    Der Client kann den Filter jederzeit mit `{"ids": [...]}` ersetzen (leere Liste = alle).
+    Server sendet `{"type": "status", "id": ..., "clothing_id": ..., "status": ...}`
+    bzw. `{"type": "ping"}` als Keepalive.
+    """
+    status_events: StatusEvents = websocket.app.state.services.status_events
+    params = websocket.query_params
+    authorization = websocket.headers.get("authorization", "")
+    token = authorization[7:] if authorization.lower().startswith("bearer ") else params.get("token")
+    
+    try:
+        user_id = user_id_from_token(token or "")
+        clothing_ids = parse_clothing_ids(params.get("ids"))
+    except HTTPException:
+        await websocket.close(code=1008)
+        return
+    
+    await websocket.accept()
+    
+    async def send_events():
+        async with aclosing(status_events.events(user_id, params.get("last_event_id"), clothing_ids)) as events:
+            async for event in events:
+                await websocket.send_json({"type": "ping"} if event is None else {"type": "status", **event})
+    
+    async def receive_filters():
+        # Hält die Verbindung lesend offen (erkennt Disconnects) und übernimmt neue Filter
+        while True:
+            message = await websocket.receive_json()
+            if isinstance(message, dict) and isinstance(message.get("ids"), list):
+                clothing_ids.clear()
+                clothing_ids.update(str(clothing_id) for clothing_id in message["ids"][:STATUS_EVENTS_MAX_IDS])
+    
+    tasks = [asyncio.create_task(send_events()), asyncio.create_task(receive_filters())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            error = task.exception()
+            if error and not isinstance(error, WebSocketDisconnect):
+                logger.warning(f"⚠️ Status-WebSocket beendet: {error}")
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
 @app.get("/queue/stats")
 async def get_queue_stats(
-    queue: QueueManager = Depends(get_queue_manager)
+    queue: QueueManager = Depends(get_queue_manager),
+    analysis_cache: AnalysisCache = Depends(get_analysis_cache),
+    token_budget: TokenBudget = Depends(get_token_budget),
+    cascade_stats: CascadeStats = Depends(get_cascade_stats),
+    status_events: StatusEvents = Depends(get_status_events),
+    status_cache: StatusCache = Depends(get_status_cache)
 ):
     """
     📊 **QUEUE-STATS**: Aktuelle Queue-Statistiken abrufen
     
-    Zeigt Anzahl wartender Jobs in der Verarbeitungsqueue
+    Zeigt Anzahl wartender Jobs in der Verarbeitungsqueue, Hit/Miss des Analyse-Caches
+    die Auslastung des flottenweiten OpenAI Token-Budgets, Trefferquoten der Modell-Kaskade,
+    offene Status-Event-Verbindungen dieses API-Prozesses und Hit/Miss des Status-Caches
     """
     try:
-        stats = queue.get_queue_stats()
+        stats = await queue.get_queue_stats_async()
+        stats['analysis_cache'] = await analysis_cache.get_stats_async()
+        stats['openai_budget'] = await token_budget.get_stats_async()
+        stats['analysis_cascade'] = await cascade_stats.get_stats_async()
+        stats['status_events'] = status_events.get_stats()
+        stats['status_cache'] = await status_cache.get_stats_async()
         return stats
         
     except Exception as e:
@@ -262,14 +969,16 @@ async def health_check(
 ):
     """Überprüft die API, Storage, Database, Queue und KI-Verbindung"""
     try:
-        storage_healthy = storage.health_check()
-        db_healthy = db.health_check()
-        queue_healthy = queue.health_check()
+        storage_healthy, db_healthy, queue_healthy = await asyncio.gather(
+            storage.health_check_async(),
+            db.health_check_async(),
+            queue.health_check_async()
+        )
         
         overall_status = "healthy" if (storage_healthy and db_healthy and queue_healthy) else "unhealthy"
         
         # Queue Stats hinzufügen
-        queue_stats = queue.get_queue_stats() if queue_healthy else {"error": "Queue nicht erreichbar"}
+        queue_stats = await queue.get_queue_stats_async() if queue_healthy else {"error": "Queue nicht erreichbar"}
         
         return {
             "status": overall_status,
@@ -1,13 +1,108 @@
 import os
-import json
-import base64
+import time
 import logging
 import redis
-from typing import Dict, Any, Optional
+import redis.asyncio as aioredis
+from typing import Dict, Any, Optional, List, Tuple, Union
 from datetime import datetime
+from job_codec import JobCodec
+from redis_utils import decode_response
 
 logger = logging.getLogger(__name__)
 
+QUEUE_BACKENDS = ("list", "streams")
+
+# Verschiebt fällige Retries aus dem Sorted Set (Score = Fälligkeit) in die Retry-Queue
+# bzw. zurück in den Stream; im List-Backend pro Job ein Signal-Token für blockierende Worker
+# KEYS: scheduled, target, signal | ARGV: now, limit, backend, signal_max
+PROMOTE_DUE_JOBS_LUA = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+for _, job in ipairs(due) do
+    redis.call('ZREM', KEYS[1], job)
+    if ARGV[3] == 'streams' then
+        redis.call('XADD', KEYS[2], '*', 'job', job)
+    else
+        redis.call('RPUSH', KEYS[2], job)
+        redis.call('RPUSH', KEYS[3], '1')
+    end
+end
+if #due > 0 and ARGV[3] ~= 'streams' then
+    redis.call('LTRIM', KEYS[3], -tonumber(ARGV[4]), -1)
+end
+return #due
+"""
+
+# Fair Scheduling: Job in die Sub-Queue des Nutzers auf seiner Prioritätsstufe legen.
+# Der Nutzer kommt in den Round-Robin-Ring der Stufe, sobald er einen wartenden Job hat.
+# KEYS: user_queue, ring, served, counts, signal | ARGV: job, user_id, level, now, signal_max
+ENQUEUE_FAIR_LUA = """
+if redis.call('LLEN', KEYS[2]) == 0 then
+    -- Stufe war leer: Aging beginnt jetzt
+    redis.call('HSET', KEYS[3], ARGV[3], ARGV[4])
+end
+if redis.call('RPUSH', KEYS[1], ARGV[1]) == 1 then
+    redis.call('RPUSH', KEYS[2], ARGV[2])
+end
+redis.call('HINCRBY', KEYS[4], ARGV[3], 1)
+redis.call('RPUSH', KEYS[5], '1')
+redis.call('LTRIM', KEYS[5], -tonumber(ARGV[5]), -1)
+return 1
+"""
+
+# Fair Scheduling: wählt die Stufe mit der höchsten effektiven Priorität
+# (Stufe + Wartezeit seit letzter Bedienung / Aging-Intervall, gegen Starvation),
+# nimmt reihum den nächsten Nutzer dieser Stufe und verschiebt dessen ältesten Job In-Flight
+# KEYS: inflight, served, counts, ring der Stufe 0..n-1 | ARGV: prefix, now, aging_seconds
+# Nur Single-Node (bzw. Sentinel): die Sub-Queue des gewählten Nutzers steht erst im Skript fest
+# und wird aus dem Präfix gebildet, ist also nicht in KEYS deklariert. Redis Cluster wird nicht
+# unterstützt (dafür müssten alle Queue-Keys per Hash-Tag im selben Slot liegen).
+CLAIM_FAIR_LUA = """
+local prefix = ARGV[1]
+local now = tonumber(ARGV[2])
+local aging = tonumber(ARGV[3])
+local best_level, best_score = nil, nil
+for level = 0, #KEYS - 4 do
+    if redis.call('LLEN', KEYS[4 + level]) > 0 then
+        local served = tonumber(redis.call('HGET', KEYS[2], level) or now)
+        local score = level + (now - served) / aging
+        if best_score == nil or score > best_score then
+            best_level, best_score = level, score
+        end
+    end
+end
+if best_level == nil then
+    return false
+end
+local ring = KEYS[4 + best_level]
+local user = redis.call('LMOVE', ring, ring, 'LEFT', 'RIGHT')
+local user_queue = prefix .. ':p' .. best_level .. ':u:' .. user
+local job = redis.call('LPOP', user_queue)
+if redis.call('LLEN', user_queue) == 0 then
+    redis.call('LREM', ring, -1, user)
+end
+redis.call('HSET', KEYS[2], best_level, now)
+redis.call('HINCRBY', KEYS[3], best_level, -1)
+if job then
+    redis.call('RPUSH', KEYS[1], job)
+end
+return job
+"""
+
+# Verschiebt alle In-Flight-Jobs eines Workers mit abgelaufener Lease zurück an den
+# Anfang der Haupt-Queue (atomar, damit mehrere Reaper denselben Worker nicht doppelt aufräumen)
+# KEYS: lease, inflight, queue, workers | ARGV: worker_id
+REQUEUE_EXPIRED_LEASE_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return -1
+end
+local moved = 0
+while redis.call('RPOPLPUSH', KEYS[2], KEYS[3]) do
+    moved = moved + 1
+end
+redis.call('SREM', KEYS[4], ARGV[1])
+return moved
+"""
+
 
 class QueueManager:
     """
@@ -15,60 +110,181 @@ class QueueManager:
     Verwaltet die Redis-Queue für asynchrone Verarbeitung
     """
     
-    def __init__(self):
-        """Initialisiert Redis Connection"""
-        self.redis_client = redis.Redis(
+    def __init__(self, max_connections: Optional[int] = None, backend: Optional[str] = None):
+        """
+        Initialisiert Redis Connection Pool
+        
+        Args:
+            max_connections: Maximale Anzahl Verbindungen im Pool
+                             (falls nicht gesetzt: ENV REDIS_MAX_CONNECTIONS, default 20)
+            backend: Queue-Backend "list" oder "streams"
+                     (falls nicht gesetzt: ENV QUEUE_BACKEND, default "list")
+        """
+        self.backend = (backend or os.getenv('QUEUE_BACKEND', 'list')).lower()
+        if self.backend not in QUEUE_BACKENDS:
+            raise ValueError(f"Unbekanntes Queue-Backend: {self.backend} (erlaubt: {', '.join(QUEUE_BACKENDS)})")
+        
+        self.max_connections = max_connections or int(os.getenv('REDIS_MAX_CONNECTIONS', 20))
+        
+        # Jobs sind binär (msgpack-Umschlag), daher ohne decode_responses;
+        # Textantworten (Worker-Namen, Consumer) werden gezielt dekodiert
+        self.connection_pool = redis.ConnectionPool(
             host=os.getenv('REDIS_HOST', 'localhost'),
             port=int(os.getenv('REDIS_PORT', 6379)),
             db=int(os.getenv('REDIS_DB', 0)),
-            decode_responses=True
+            max_connections=self.max_connections
         )
+        self.redis_client = redis.Redis(connection_pool=self.connection_pool)
+        
+        # Async Client für die FastAPI-Endpoints (blockiert den Event Loop nicht)
+        self.async_connection_pool = aioredis.ConnectionPool(
+            host=os.getenv('REDIS_HOST', 'localhost'),
+            port=int(os.getenv('REDIS_PORT', 6379)),
+            db=int(os.getenv('REDIS_DB', 0)),
+            max_connections=self.max_connections
+        )
+        self.async_redis_client = aioredis.Redis(connection_pool=self.async_connection_pool)
         
         # Queue Namen
         self.queue_name = "clothing_processing_queue"
         self.retry_queue = "clothing_processing_retry"
         
+        # Reliable Queue: In-Flight-Listen und Leases pro Worker
+        self.inflight_prefix = "clothing_processing_inflight"
+        self.lease_prefix = "clothing_processing_lease"
+        self.workers_key = "clothing_processing_workers"
+        self.tracked_key = "clothing_processing_tracked"  # clothing_ids mit Queue-Eintrag
+        self.lease_ttl = int(os.getenv('QUEUE_LEASE_TTL', 60))
+        
+        self._requeue_script = self.redis_client.register_script(REQUEUE_EXPIRED_LEASE_LUA)
+        
+        # Fair Scheduling (List-Backend): Prioritätsstufen mit Round-Robin über Nutzer-Sub-Queues
+        self.priority_levels = int(os.getenv('QUEUE_PRIORITY_LEVELS', 3))
+        self.priority_aging = float(os.getenv('QUEUE_PRIORITY_AGING', 30))  # Sekunden pro Stufe
+        self.fair_prefix = f"{self.queue_name}:fair"
+        self.fair_served_key = f"{self.fair_prefix}:served"
+        self.fair_counts_key = f"{self.fair_prefix}:counts"
+        self.fair_ring_keys = [self._fair_ring_key(level) for level in range(self.priority_levels)]
+        self.signal_key = "clothing_processing_signal"
+        self.signal_max = 10000  # Obergrenze der Signal-Liste (wartende Worker brauchen nur eins pro Job)
+        self._claim_fair_script = self.redis_client.register_script(CLAIM_FAIR_LUA)
+        
+        # Verzögerte Retries: Sorted Set mit Fälligkeit als Score
+        self.scheduled_key = "clothing_processing_scheduled"
+        self._promote_script = self.redis_client.register_script(PROMOTE_DUE_JOBS_LUA)
+        
+        # Streams-Backend: ein Stream, eine Consumer Group, jeder Worker ist ein Consumer
+        self.stream_name = "clothing_processing_stream"
+        self.consumer_group = "clothing_workers"
+        self.stream_claim_idle_ms = self.lease_ttl * 1000
+        self._group_ready = False
+        
+        # Serialisierung der Jobs (JOB_FORMAT / JOB_COMPRESSION)
+        self.codec = JobCodec()
+        
+    def _build_job(self, clothing_id: str, user_id: str, storage_path: str,
+                   file_name: str, content_type: str, priority: int,
+                   file_size: Optional[int], storage_bucket: str,
+                   content_hash: Optional[str] = None) -> Union[bytes, str]:
+        """Baut den serialisierten Claim-Check-Job"""
+        job_data = {
+            'clothing_id': clothing_id,
+            'user_id': user_id,
+            'storage_bucket': storage_bucket,
+            'storage_path': storage_path,
+            'file_name': file_name,
+            'content_type': content_type,
+            'file_size': file_size,
+            'created_at': datetime.utcnow().isoformat(),
+            'retry_count': 0,
+            'priority': priority
+        }
+        if content_hash:
+            job_data['content_hash'] = content_hash
+        return self.codec.encode(job_data)
+    
+    def _priority_level(self, priority: int) -> int:
+        """Begrenzt eine Priorität auf die konfigurierten Stufen (0 = normal)"""
+        return max(0, min(int(priority or 0), self.priority_levels - 1))
+    
+    def _fair_ring_key(self, level: int) -> str:
+        """Key des Round-Robin-Rings (Nutzer mit wartenden Jobs) einer Prioritätsstufe"""
+        return f"{self.fair_prefix}:p{level}:ring"
+    
+    def _queue_job(self, pipe, clothing_id: str, user_id: str, job_payload: Union[bytes, str], priority: int) -> None:
+        """
+        Hängt die Enqueue-Befehle an eine (sync oder async) Pipeline an
+        
+        List-Backend: Sub-Queue des Nutzers auf seiner Prioritätsstufe (Fair Scheduling)
+        Streams-Backend: FIFO, die Priorität bleibt nur als Metadatum im Job
+        """
+        if self.backend == 'streams':
+            pipe.xadd(self.stream_name, {'job': job_payload})
+        else:
+            level = self._priority_level(priority)
+            pipe.eval(
+                ENQUEUE_FAIR_LUA, 5,
+                f"{self.fair_prefix}:p{level}:u:{user_id}", self._fair_ring_key(level),
+                self.fair_served_key, self.fair_counts_key, self.signal_key,
+                job_payload, user_id, level, time.time(), self.signal_max
+            )
+        pipe.sadd(self.tracked_key, clothing_id)
+    
     def add_clothing_processing_job(self, clothing_id: str, user_id: str, 
-                                  file_content: bytes, file_name: str, 
-                                  content_type: str, priority: int = 0) -> bool:
+                                  storage_path: str, file_name: str, 
+                                  content_type: str, priority: int = 0,
+                                  file_size: Optional[int] = None,
+                                  storage_bucket: str = "clothing-images-original",
+                                  content_hash: Optional[str] = None) -> bool:
         """
         Fügt einen Kleidungsstück-Verarbeitungsjob zur Queue hinzu
         
+        Claim-Check: Der Job enthält nur den Storage-Pfad des bereits hochgeladenen
+        Originals, der Worker lädt die Bilddaten selbst aus dem Storage.
+        
         Args:
             clothing_id: UUID des Kleidungsstücks
             user_id: UUID des Nutzers
-            file_content: Binäre Dateidaten
+            storage_path: Pfad des Original-Bildes im Storage
             file_name: Dateiname
             content_type: MIME-Type
             priority: Priorität (0 = normal, höher = wichtiger)
+            file_size: Dateigröße in Bytes (optional, nur Metadaten)
+            storage_bucket: Bucket des Original-Bildes
+            content_hash: SHA-256 (hex) des Original-Bildes (Key für den Analyse-Cache)
             
         Returns:
             True wenn Job erfolgreich hinzugefügt
         """
         try:
-            # File Content als Base64 kodieren
-            file_content_b64 = base64.b64encode(file_content).decode('utf-8')
-            
-            job_data = {
-                'clothing_id': clothing_id,
-                'user_id': user_id,
-                'file_content_b64': file_content_b64,
-                'file_name': file_name,
-                'content_type': content_type,
-                'created_at': datetime.utcnow().isoformat(),
-                'retry_count': 0,
-                'priority': priority
-            }
+            job_payload = self._build_job(clothing_id, user_id, storage_path, file_name,
+                                       content_type, priority, file_size, storage_bucket, content_hash)
+            
+            pipe = self.redis_client.pipeline(transaction=True)
+            self._queue_job(pipe, clothing_id, user_id, job_payload, priority)
+            pipe.execute()
+            
+            logger.info(f"✅ Job hinzugefügt zur Queue: {clothing_id} (Priorität: {priority})")
+            return True
             
-            # Job zu Queue hinzufügen
-            job_json = json.dumps(job_data)
+        except Exception as e:
+            logger.error(f"❌ Fehler beim Hinzufügen des Jobs zur Queue: {e}")
+            return False
+    
+    async def add_clothing_processing_job_async(self, clothing_id: str, user_id: str,
+                                                storage_path: str, file_name: str,
+                                                content_type: str, priority: int = 0,
+                                                file_size: Optional[int] = None,
+                                                storage_bucket: str = "clothing-images-original",
+                                                content_hash: Optional[str] = None) -> bool:
+        """Async-Variante von add_clothing_processing_job (für FastAPI-Endpoints)"""
+        try:
+            job_payload = self._build_job(clothing_id, user_id, storage_path, file_name,
+                                       content_type, priority, file_size, storage_bucket, content_hash)
             
-            if priority > 0:
-                # High priority - an den Anfang der Queue
-                self.redis_client.lpush(self.queue_name, job_json)
-            else:
-                # Normal priority - an das Ende der Queue
-                self.redis_client.rpush(self.queue_name, job_json)
+            pipe = self.async_redis_client.pipeline(transaction=True)
+            self._queue_job(pipe, clothing_id, user_id, job_payload, priority)
+            await pipe.execute()
             
             logger.info(f"✅ Job hinzugefügt zur Queue: {clothing_id} (Priorität: {priority})")
             return True
@@ -77,6 +293,36 @@ class QueueManager:
             logger.error(f"❌ Fehler beim Hinzufügen des Jobs zur Queue: {e}")
             return False
     
+    async def add_clothing_processing_jobs_async(self, jobs: List[Dict[str, Any]]) -> bool:
+        """
+        Fügt viele Jobs mit einer einzigen Pipeline (ein Round-Trip, MULTI/EXEC) hinzu
+        
+        Args:
+            jobs: Liste von Dicts mit den Argumenten von add_clothing_processing_job
+            
+        Returns:
+            True wenn alle Jobs hinzugefügt wurden (alles oder nichts)
+        """
+        if not jobs:
+            return True
+        try:
+            pipe = self.async_redis_client.pipeline(transaction=True)
+            for job in jobs:
+                job_payload = self._build_job(
+                    job['clothing_id'], job['user_id'], job['storage_path'], job['file_name'],
+                    job['content_type'], job.get('priority', 0), job.get('file_size'),
+                    job.get('storage_bucket', "clothing-images-original"), job.get('content_hash')
+                )
+                self._queue_job(pipe, job['clothing_id'], job['user_id'], job_payload, job.get('priority', 0))
+            await pipe.execute()
+            
+            logger.info(f"✅ {len(jobs)} Jobs hinzugefügt zur Queue (Pipeline)")
+            return True
+            
+        except Exception as e:
+            logger.error(f"❌ Fehler beim Hinzufügen der Jobs zur Queue: {e}")
+            return False
+    
     def get_queue_stats(self) -> Dict[str, Any]:
         """
         Holt Statistiken über die Queue
@@ -85,15 +331,52 @@ class QueueManager:
             Dict mit Queue-Statistiken
         """
         try:
-            main_queue_length = self.redis_client.llen(self.queue_name)
-            retry_queue_length = self.redis_client.llen(self.retry_queue)
+            if self.backend == 'streams':
+                return self._get_stream_stats()
             
+            workers = sorted(decode_response(w) for w in self.redis_client.smembers(self.workers_key))
+            
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.zcard(self.scheduled_key)
+            pipe.zrange(self.scheduled_key, 0, 0, withscores=True)
+            pipe.hgetall(self.fair_counts_key)
+            pipe.llen(self.queue_name)
+            pipe.llen(self.retry_queue)
+            for worker_id in workers:
+                pipe.llen(self._inflight_key(worker_id))
+            scheduled, next_due, level_counts, *counts = pipe.execute()
+            
+            stats = self._format_stats(workers, counts, level_counts)
+            stats.update(self._format_scheduled_stats(scheduled, next_due))
+            return stats
+        except Exception as e:
+            logger.error(f"❌ Fehler beim Holen der Queue-Stats: {e}")
             return {
-                'main_queue_length': main_queue_length,
-                'retry_queue_length': retry_queue_length,
-                'total_pending': main_queue_length + retry_queue_length,
+                'error': str(e),
                 'timestamp': datetime.utcnow().isoformat()
             }
+    
+    async def get_queue_stats_async(self) -> Dict[str, Any]:
+        """Async-Variante von get_queue_stats"""
+        try:
+            if self.backend == 'streams':
+                return await self._get_stream_stats_async()
+            
+            workers = sorted(decode_response(w) for w in await self.async_redis_client.smembers(self.workers_key))
+            
+            pipe = self.async_redis_client.pipeline(transaction=False)
+            pipe.zcard(self.scheduled_key)
+            pipe.zrange(self.scheduled_key, 0, 0, withscores=True)
+            pipe.hgetall(self.fair_counts_key)
+            pipe.llen(self.queue_name)
+            pipe.llen(self.retry_queue)
+            for worker_id in workers:
+                pipe.llen(self._inflight_key(worker_id))
+            scheduled, next_due, level_counts, *counts = await pipe.execute()
+            
+            stats = self._format_stats(workers, counts, level_counts)
+            stats.update(self._format_scheduled_stats(scheduled, next_due))
+            return stats
         except Exception as e:
             logger.error(f"❌ Fehler beim Holen der Queue-Stats: {e}")
             return {
@@ -101,6 +384,372 @@ class QueueManager:
                 'timestamp': datetime.utcnow().isoformat()
             }
     
+    def _format_stats(self, workers: List[str], counts: List[int],
+                      level_counts: Dict[bytes, bytes]) -> Dict[str, Any]:
+        """Baut das Stats-Dict aus den Pipeline-Ergebnissen"""
+        per_level = {int(level): max(int(count), 0) for level, count in level_counts.items()}
+        main_queue_length = counts[0] + sum(per_level.values())
+        retry_queue_length = counts[1]
+        in_flight = dict(zip(workers, counts[2:]))
+        
+        return {
+            'backend': 'list',
+            'main_queue_length': main_queue_length,
+            'retry_queue_length': retry_queue_length,
+            'total_pending': main_queue_length + retry_queue_length,
+            'pending_per_priority': per_level,
+            'in_flight': sum(in_flight.values()),
+            'in_flight_per_worker': in_flight,
+            'active_workers': len(workers),
+            'timestamp': datetime.utcnow().isoformat()
+        }
+    
+    def _format_scheduled_stats(self, scheduled: int, next_due: List[Tuple[str, float]]) -> Dict[str, Any]:
+        """Baut die Stats für eingeplante (verzögerte) Retries"""
+        return {
+            'scheduled_retries': scheduled,
+            'next_retry_due_at': datetime.utcfromtimestamp(next_due[0][1]).isoformat() if next_due else None
+        }
+    
+    # ======================
+    # RELIABLE QUEUE (IN-FLIGHT + LEASES)
+    # ======================
+    
+    def _inflight_key(self, worker_id: str) -> str:
+        """Key der In-Flight-Liste eines Workers"""
+        return f"{self.inflight_prefix}:{worker_id}"
+    
+    def _lease_key(self, worker_id: str) -> str:
+        """Key der Lease eines Workers"""
+        return f"{self.lease_prefix}:{worker_id}"
+    
+    def register_worker(self, worker_id: str) -> None:
+        """
+        Meldet einen Worker an und vergibt die erste Lease
+        
+        Args:
+            worker_id: Eindeutige ID des Worker-Prozesses
+        """
+        if self.backend == 'streams':
+            self._ensure_consumer_group()
+            logger.info(f"📝 Worker registriert als Consumer: {worker_id} (Gruppe: {self.consumer_group})")
+            return
+        
+        pipe = self.redis_client.pipeline(transaction=True)
+        pipe.sadd(self.workers_key, worker_id)
+        pipe.set(self._lease_key(worker_id), datetime.utcnow().isoformat(), ex=self.lease_ttl)
+        pipe.execute()
+        logger.info(f"📝 Worker registriert: {worker_id} (Lease: {self.lease_ttl}s)")
+    
+    def heartbeat(self, worker_id: str) -> None:
+        """
+        Verlängert die Lease eines Workers
+        Solange die Lease lebt, bleiben seine In-Flight-Jobs unangetastet
+        """
+        if self.backend == 'streams':
+            self._stream_heartbeat(worker_id)
+            return
+        
+        self.redis_client.set(self._lease_key(worker_id), datetime.utcnow().isoformat(), ex=self.lease_ttl)
+    
+    def unregister_worker(self, worker_id: str) -> int:
+        """
+        Meldet einen Worker ab (nach dem Drain)
+        Übrig gebliebene In-Flight-Jobs werden zurück in die Queue gelegt
+        
+        Returns:
+            Anzahl zurückgelegter Jobs
+        """
+        if self.backend == 'streams':
+            return self._stream_unregister(worker_id)
+        
+        self.redis_client.delete(self._lease_key(worker_id))
+        moved = self._requeue_worker(worker_id)
+        logger.info(f"👋 Worker abgemeldet: {worker_id}")
+        return max(moved, 0)
+    
+    def claim_job(self, worker_id: str, timeout: int = 2) -> Optional[Tuple[bytes, Dict[str, Any]]]:
+        """
+        Holt den nächsten Job und verschiebt ihn atomar in die In-Flight-Liste des Workers
+        (Retry-Queue zuerst, dann blockierend die Haupt-Queue)
+        
+        Args:
+            worker_id: ID des Workers
+            timeout: Blockierendes Warten in Sekunden
+            
+        Returns:
+            Tuple (receipt, job_data) oder None wenn keine Jobs vorhanden
+            (receipt: serialisierter Job bzw. Stream-ID, wird für ack_job benötigt)
+        """
+        if self.backend == 'streams':
+            return self._stream_claim_job(worker_id, timeout)
+        
+        job_payload = self._claim_list_job(worker_id)
+        if job_payload is None:
+            # Blockierend auf neue Jobs warten (Enqueue legt ein Signal-Token ab)
+            if self.redis_client.blpop(self.signal_key, timeout=timeout):
+                job_payload = self._claim_list_job(worker_id)
+        
+        if job_payload is None:
+            return None
+        
+        return job_payload, self.codec.decode(job_payload)
+    
+    def _claim_list_job(self, worker_id: str) -> Optional[bytes]:
+        """
+        Nicht-blockierender Claim im List-Backend, Reihenfolge:
+        fällige Retries, zurückgelegte/Legacy-Jobs der Haupt-Queue, dann Fair Scheduling
+        
+        Retry- und Haupt-Queue haben Vorrang vor den Fair-Queues. In die Haupt-Queue schreiben nur
+        noch der Reaper und Instanzen vor dem Umstieg (Legacy-Jobs); solange sie endlich sind, halten
+        sie die Fair-Queues nur auf, bis sie leer sind. Ein dauerhafter Zufluss dorthin (alte
+        API-Instanzen während eines langen Rollouts) würde die Fair-Queues aushungern.
+        """
+        inflight_key = self._inflight_key(worker_id)
+        
+        for source in (self.retry_queue, self.queue_name):
+            job_payload = self.redis_client.lmove(source, inflight_key, 'LEFT', 'RIGHT')
+            if job_payload is not None:
+                return job_payload
+        
+        return self._claim_fair_script(
+            keys=[inflight_key, self.fair_served_key, self.fair_counts_key, *self.fair_ring_keys],
+            args=[self.fair_prefix, time.time(), self.priority_aging]
+        )
+    
+    def ack_job(self, worker_id: str, receipt: bytes, clothing_id: str, finished: bool = True) -> None:
+        """
+        Bestätigt einen Job und entfernt ihn aus der In-Flight-Liste
+        
+        Args:
+            worker_id: ID des Workers
+            receipt: Beleg wie von claim_job geliefert (serialisierter Job bzw. Stream-ID)
+            clothing_id: UUID des Kleidungsstücks
+            finished: True wenn der Job endgültig erledigt ist (kein Retry mehr folgt)
+        """
+        pipe = self.redis_client.pipeline(transaction=True)
+        if self.backend == 'streams':
+            pipe.xack(self.stream_name, self.consumer_group, receipt)
+            pipe.xdel(self.stream_name, receipt)
+        else:
+            pipe.lrem(self._inflight_key(worker_id), 1, receipt)
+        if finished:
+            pipe.srem(self.tracked_key, clothing_id)
+        pipe.execute()
+    
+    def schedule_retry(self, job_data: Dict[str, Any], delay_seconds: float) -> float:
+        """
+        Plant einen Retry mit Verzögerung ein (Sorted Set, Score = Fälligkeit)
+        
+        Args:
+            job_data: Job-Daten (inkl. erhöhtem retry_count)
+            delay_seconds: Verzögerung bis der Job wieder verarbeitet werden darf
+            
+        Returns:
+            Fälligkeit als Unix-Timestamp
+        """
+        due_at = time.time() + delay_seconds
+        job_data['retry_due_at'] = datetime.utcfromtimestamp(due_at).isoformat()
+        self.redis_client.zadd(self.scheduled_key, {self.codec.encode(job_data): due_at})
+        return due_at
+    
+    def promote_due_jobs(self, limit: int = 100) -> int:
+        """
+        Mover: verschiebt fällige Retries in die Retry-Queue (bzw. den Stream)
+        und weckt pro Job einen per BLPOP wartenden Worker (List-Backend)
+        
+        Args:
+            limit: Maximale Anzahl Jobs pro Aufruf
+            
+        Returns:
+            Anzahl verschobener Jobs
+        """
+        target = self.stream_name if self.backend == 'streams' else self.retry_queue
+        moved = self._promote_script(
+            keys=[self.scheduled_key, target, self.signal_key],
+            args=[time.time(), limit, self.backend, self.signal_max]
+        )
+        if moved:
+            logger.info(f"⏰ {moved} fällige Retries in die Queue verschoben")
+        return moved
+    
+    def requeue_expired_leases(self) -> int:
+        """
+        Reaper: legt In-Flight-Jobs von Workern mit abgelaufener Lease zurück in die Queue
+        (abgestürzte oder OOM-gekillte Worker, Rolling Restarts)
+        
+        Returns:
+            Anzahl zurückgelegter Jobs
+        """
+        if self.backend == 'streams':
+            # Stalled Messages werden beim Claim per XAUTOCLAIM übernommen
+            return 0
+        
+        total = 0
+        for worker_id in map(decode_response, self.redis_client.smembers(self.workers_key)):
+            moved = self._requeue_worker(worker_id)
+            if moved > 0:
+                logger.warning(f"♻️ {moved} Jobs von Worker {worker_id} (Lease abgelaufen) zurück in die Queue")
+            if moved >= 0:
+                total += moved
+        return total
+    
+    def _requeue_worker(self, worker_id: str) -> int:
+        """Führt das Requeue-Skript für einen Worker aus (-1 wenn Lease noch gültig)"""
+        return self._requeue_script(
+            keys=[self._lease_key(worker_id), self._inflight_key(worker_id),
+                  self.queue_name, self.workers_key],
+            args=[worker_id]
+        )
+    
+    def is_tracked(self, clothing_id: str) -> bool:
+        """Prüft ob für ein Kleidungsstück ein Job in Queue, Retry oder In-Flight existiert"""
+        return bool(self.redis_client.sismember(self.tracked_key, clothing_id))
+    
+    async def is_tracked_async(self, clothing_id: str) -> bool:
+        """Async-Variante von is_tracked"""
+        return bool(await self.async_redis_client.sismember(self.tracked_key, clothing_id))
+    
+    # ======================
+    # STREAMS BACKEND (CONSUMER GROUP)
+    # ======================
+    
+    def _ensure_consumer_group(self) -> None:
+        """Legt Stream und Consumer Group an (idempotent)"""
+        if self._group_ready:
+            return
+        try:
+            self.redis_client.xgroup_create(self.stream_name, self.consumer_group, id='0', mkstream=True)
+            logger.info(f"✅ Consumer Group angelegt: {self.consumer_group}")
+        except redis.ResponseError as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+        self._group_ready = True
+    
+    def _stream_claim_job(self, worker_id: str, timeout: int) -> Optional[Tuple[bytes, Dict[str, Any]]]:
+        """
+        Holt den nächsten Job aus dem Stream
+        Zuerst werden hängengebliebene Messages anderer Consumer übernommen (XAUTOCLAIM),
+        danach neue Messages gelesen (XREADGROUP)
+        """
+        self._ensure_consumer_group()
+        
+        _, claimed, *_ = self.redis_client.xautoclaim(
+            self.stream_name, self.consumer_group, worker_id,
+            min_idle_time=self.stream_claim_idle_ms, start_id='0-0', count=1
+        )
+        messages = [m for m in claimed if m and m[1]]
+        if messages:
+            logger.warning(f"♻️ Hängengebliebene Message übernommen: {decode_response(messages[0][0])}")
+        else:
+            response = self.redis_client.xreadgroup(
+                self.consumer_group, worker_id, {self.stream_name: '>'},
+                count=1, block=timeout * 1000
+            )
+            messages = response[0][1] if response else []
+        
+        if not messages:
+            return None
+        
+        message_id, fields = messages[0]
+        return message_id, self.codec.decode(fields[b'job'])
+    
+    def _stream_heartbeat(self, worker_id: str) -> None:
+        """
+        Setzt die Idle-Zeit der eigenen Pending Messages zurück (XCLAIM auf sich selbst),
+        damit laufende Jobs nicht per XAUTOCLAIM von anderen Consumern übernommen werden
+        """
+        pending = self.redis_client.xpending_range(
+            self.stream_name, self.consumer_group, min='-', max='+', count=1000, consumername=worker_id
+        )
+        message_ids = [entry['message_id'] for entry in pending]
+        if message_ids:
+            self.redis_client.xclaim(
+                self.stream_name, self.consumer_group, worker_id,
+                min_idle_time=0, message_ids=message_ids, justid=True
+            )
+    
+    def _stream_unregister(self, worker_id: str) -> int:
+        """
+        Entfernt den Consumer aus der Gruppe, sofern er keine Pending Messages mehr hat
+        (sonst bleibt er bestehen, damit XAUTOCLAIM die Messages übernehmen kann)
+        """
+        pending = self.redis_client.xpending_range(
+            self.stream_name, self.consumer_group, min='-', max='+', count=1, consumername=worker_id
+        )
+        if pending:
+            logger.warning(f"⚠️ Consumer {worker_id} hat noch Pending Messages - bleibt registriert")
+            return 0
+        
+        self.redis_client.xgroup_delconsumer(self.stream_name, self.consumer_group, worker_id)
+        logger.info(f"👋 Consumer abgemeldet: {worker_id}")
+        return 0
+    
+    def _get_stream_stats(self) -> Dict[str, Any]:
+        """Queue-Statistiken für das Streams-Backend"""
+        self._ensure_consumer_group()
+        
+        pipe = self.redis_client.pipeline(transaction=False)
+        pipe.xlen(self.stream_name)
+        pipe.xinfo_groups(self.stream_name)
+        pipe.xinfo_consumers(self.stream_name, self.consumer_group)
+        pipe.zcard(self.scheduled_key)
+        pipe.zrange(self.scheduled_key, 0, 0, withscores=True)
+        stream_length, groups, consumers, scheduled, next_due = pipe.execute()
+        
+        stats = self._format_stream_stats(stream_length, groups, consumers)
+        stats.update(self._format_scheduled_stats(scheduled, next_due))
+        return stats
+    
+    async def _get_stream_stats_async(self) -> Dict[str, Any]:
+        """Async-Variante von _get_stream_stats"""
+        try:
+            await self.async_redis_client.xgroup_create(self.stream_name, self.consumer_group,
+                                                        id='0', mkstream=True)
+        except redis.ResponseError as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+        
+        pipe = self.async_redis_client.pipeline(transaction=False)
+        pipe.xlen(self.stream_name)
+        pipe.xinfo_groups(self.stream_name)
+        pipe.xinfo_consumers(self.stream_name, self.consumer_group)
+        pipe.zcard(self.scheduled_key)
+        pipe.zrange(self.scheduled_key, 0, 0, withscores=True)
+        stream_length, groups, consumers, scheduled, next_due = await pipe.execute()
+        
+        stats = self._format_stream_stats(stream_length, groups, consumers)
+        stats.update(self._format_scheduled_stats(scheduled, next_due))
+        return stats
+    
+    def _format_stream_stats(self, stream_length: int, groups: List[Dict[str, Any]],
+                             consumers: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Baut das Stats-Dict für das Streams-Backend"""
+        group = next((g for g in groups if decode_response(g['name']) == self.consumer_group), {})
+        pending = group.get('pending', 0)
+        lag = group.get('lag')  # 'lag' erst ab Redis 7
+        if lag is None:
+            # Bestätigte Messages werden gelöscht: Stream-Länge = wartend + pending
+            lag = max(stream_length - pending, 0)
+        
+        per_consumer = {
+            decode_response(c['name']): {'pending': c['pending'], 'idle_ms': c['idle']}
+            for c in consumers
+        }
+        
+        return {
+            'backend': 'streams',
+            'main_queue_length': lag,
+            'retry_queue_length': 0,
+            'total_pending': lag,
+            'stream_length': stream_length,
+            'in_flight': pending,
+            'in_flight_per_worker': {name: c['pending'] for name, c in per_consumer.items()},
+            'consumers': per_consumer,
+            'active_workers': len(consumers),
+            'timestamp': datetime.utcnow().isoformat()
+        }
+    
     def health_check(self) -> bool:
         """
         Überprüft die Redis-Verbindung
@@ -115,6 +764,15 @@ class QueueManager:
             logger.error(f"❌ Redis Health Check fehlgeschlagen: {e}")
             return False
     
+    async def health_check_async(self) -> bool:
+        """Async-Variante von health_check"""
+        try:
+            await self.async_redis_client.ping()
+            return True
+        except Exception as e:
+            logger.error(f"❌ Redis Health Check fehlgeschlagen: {e}")
+            return False
+    
     def clear_queue(self, queue_name: Optional[str] = None) -> int:
         """
         Leert eine Queue (nur für Development/Testing)
@@ -143,12 +801,29 @@ class QueueManager:
         """
         try:
             # Schaut sich das erste Element in der Queue an
-            job_json = self.redis_client.lindex(self.queue_name, 0)
+            job_payload = self.redis_client.lindex(self.queue_name, 0)
             
-            if job_json:
-                return json.loads(job_json)
+            if job_payload:
+                return self.codec.decode(job_payload)
             return None
             
         except Exception as e:
             logger.error(f"❌ Fehler beim Peek der Queue: {e}")
-            return None 
\ No newline at end of file
+            return None
+    
+    def close(self) -> None:
+        """Schließt den Redis Connection Pool"""
+        try:
+            self.redis_client.close()
+            self.connection_pool.disconnect()
+            logger.info("🔌 Redis Connection Pool geschlossen")
+        except Exception as e:
+            logger.error(f"❌ Fehler beim Schließen des Redis Pools: {e}")
+    
+    async def aclose(self) -> None:
+        """Schließt den async Redis Connection Pool"""
+        try:
+            await self.async_redis_client.aclose()
+            await self.async_connection_pool.disconnect()
+        except Exception as e:
+            logger.error(f"❌ Fehler beim Schließen des async Redis Pools: {e}")
@@ -0,0 +1,196 @@
+import os
+import re
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional, Mapping
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitedError(Exception):
+    """
+    OpenAI hat den Request gedrosselt (429), auch nach den Wiederholungen im Limiter
+    Kein echter Fehler der Analyse: der Job wird mit der Rate-Limit-Policy erneut eingeplant
+    statt mit dem Fallback-Ergebnis (confidence 0.0) abgeschlossen.
+    """
+
+    status_code = 429  # retry_policy.classify_error -> ERROR_RATE_LIMIT
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD-Limiter für gleichzeitige OpenAI-Requests eines Worker-Prozesses (asyncio)
+    Additive Increase: +1 Slot pro `limit` erfolgreichen Requests, solange die
+    x-ratelimit-remaining-* Header genug Reserve zeigen.
+    Multiplicative Decrease: bei 429 wird das Limit halbiert und alle Requests pausieren
+    bis `retry-after` (bzw. bis zum Reset, wenn remaining 0 erreicht).
+    """
+
+    def __init__(self, initial: float = None, min_limit: int = 1, max_limit: int = None,
+                 decrease_factor: float = 0.5, headroom: float = None):
+        """
+        Args:
+            initial: Start-Limit (falls nicht gesetzt: ENV OPENAI_INITIAL_CONCURRENCY)
+            min_limit: Untergrenze
+            max_limit: Obergrenze (falls nicht gesetzt: ENV OPENAI_MAX_CONCURRENCY)
+            decrease_factor: Faktor bei Drosselung
+            headroom: Anteil verbleibender Requests/Tokens, unter dem nicht mehr erhöht wird
+                      (falls nicht gesetzt: ENV OPENAI_RATE_LIMIT_HEADROOM)
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit or int(os.getenv('OPENAI_MAX_CONCURRENCY', 32))
+        self.limit = float(initial or int(os.getenv('OPENAI_INITIAL_CONCURRENCY', 4)))
+        self.decrease_factor = decrease_factor
+        self.headroom = headroom if headroom is not None else float(os.getenv('OPENAI_RATE_LIMIT_HEADROOM', 0.1))
+
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._last_decrease = 0.0
+        self._condition: Optional[asyncio.Condition] = None
+
+        # Zähler für Stats
+        self.successes = 0
+        self.throttles = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        """Belegt einen Slot für die Dauer eines Requests"""
+        condition = self._get_condition()
+        async with condition:
+            while True:
+                pause = self.paused_until - time.monotonic()
+                if pause > 0:
+                    try:
+                        await asyncio.wait_for(condition.wait(), timeout=pause)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                if self.in_flight < int(self.limit):
+                    break
+                await condition.wait()
+            self.in_flight += 1
+
+        try:
+            yield
+        finally:
+            async with condition:
+                self.in_flight -= 1
+                condition.notify_all()
+
+    def _get_condition(self) -> asyncio.Condition:
+        """Condition wird im Event Loop des Aufrufers erstellt"""
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        return self._condition
+
+    def on_success(self, headers: Mapping[str, str]) -> None:
+        """
+        Wertet die Rate-Limit-Header einer erfolgreichen Antwort aus
+
+        Args:
+            headers: HTTP-Header der OpenAI-Antwort
+        """
+        self.successes += 1
+        low = False
+
+        for kind in ('requests', 'tokens'):
+            remaining = _to_float(headers.get(f'x-ratelimit-remaining-{kind}'))
+            limit = _to_float(headers.get(f'x-ratelimit-limit-{kind}'))
+            if remaining is None:
+                continue
+
+            if remaining <= 0:
+                # Fenster erschöpft: bis zum Reset pausieren statt in 429 zu laufen
+                reset = parse_duration(headers.get(f'x-ratelimit-reset-{kind}'))
+                if reset:
+                    self.paused_until = max(self.paused_until, time.monotonic() + reset)
+                low = True
+            elif limit and remaining / limit < self.headroom:
+                low = True
+
+        if not low and self.limit < self.max_limit:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def on_throttle(self, headers: Optional[Mapping[str, str]]) -> float:
+        """
+        Reagiert auf eine 429-Antwort: Limit senken, alle Requests pausieren
+
+        Args:
+            headers: HTTP-Header der 429-Antwort (optional)
+
+        Returns:
+            Wartezeit in Sekunden bis zum nächsten Versuch
+        """
+        self.throttles += 1
+        now = time.monotonic()
+        retry_after = retry_after_seconds(headers) or 1.0
+
+        # Eine 429-Welle zählt nur einmal (parallele Requests laufen gleichzeitig ins Limit)
+        if now - self._last_decrease > retry_after:
+            previous = self.limit
+            self.limit = max(float(self.min_limit), self.limit * self.decrease_factor)
+            self._last_decrease = now
+            logger.warning(f"🚦 OpenAI 429 - Concurrency {previous:.1f} → {self.limit:.1f}, "
+                           f"Pause {retry_after:.1f}s")
+
+        self.paused_until = max(self.paused_until, now + retry_after)
+        return retry_after
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Aktueller Zustand des Limiters"""
+        return {
+            'limit': round(self.limit, 2),
+            'in_flight': self.in_flight,
+            'paused_for': round(max(0.0, self.paused_until - time.monotonic()), 2),
+            'successes': self.successes,
+            'throttles': self.throttles
+        }
+
+
+def retry_after_seconds(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """Liest retry-after-ms / retry-after (Sekunden oder HTTP-Datum)"""
+    if not headers:
+        return None
+
+    retry_after_ms = _to_float(headers.get('retry-after-ms'))
+    if retry_after_ms is not None:
+        return retry_after_ms / 1000
+
+    value = headers.get('retry-after')
+    seconds = _to_float(value)
+    if seconds is not None:
+        return seconds
+    if value:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+    return None
+
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h)')
+_DURATION_UNITS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parst Reset-Angaben der OpenAI-Header wie "20ms", "1s" oder "6m0s" in Sekunden"""
+    if not value:
+        return None
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return _to_float(value)
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,9 @@
+from typing import Union
+
+
+def decode_response(value: Union[bytes, str]) -> str:
+    """
+    Dekodiert eine Redis-Antwort zu str
+    Alle Clients laufen ohne decode_responses (Jobs sind binär), Textwerte werden gezielt dekodiert.
+    """
+    return value.decode('utf-8') if isinstance(value, bytes) else value
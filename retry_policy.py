@@ -0,0 +1,99 @@
+import os
+import random
+from typing import Dict, Any
+
+
+# Fehlerklassen für die Retry-Logik
+ERROR_TRANSIENT = "transient"    # Netzwerk, Timeouts, 5xx - kurzer Backoff
+ERROR_RATE_LIMIT = "rate_limit"  # 429 / Quota - langer Backoff, mehr Versuche
+ERROR_PERMANENT = "permanent"    # Ungültige Daten, 4xx - kein Retry
+
+
+class RetryPolicy:
+    """
+    Retry-Policy einer Fehlerklasse
+    Exponentieller Backoff mit "Full Jitter": delay = random(0, min(max_delay, base * 2^n))
+    """
+
+    def __init__(self, max_retries: int, base_delay: float = 5.0, max_delay: float = 300.0):
+        """
+        Args:
+            max_retries: Maximale Anzahl Retries
+            base_delay: Basis-Verzögerung in Sekunden
+            max_delay: Obergrenze der Verzögerung in Sekunden
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def should_retry(self, retry_count: int) -> bool:
+        """Prüft ob nach `retry_count` bisherigen Retries ein weiterer erlaubt ist"""
+        return retry_count < self.max_retries
+
+    def backoff(self, retry_count: int) -> float:
+        """
+        Berechnet die Verzögerung bis zum nächsten Versuch
+
+        Args:
+            retry_count: Anzahl bisheriger Retries (0 = erster Retry)
+
+        Returns:
+            Verzögerung in Sekunden
+        """
+        ceiling = min(self.max_delay, self.base_delay * (2 ** retry_count))
+        # Mindestens base_delay/2, damit ein Retry nie sofort wieder anläuft
+        return max(self.base_delay / 2, random.uniform(0, ceiling))
+
+
+def default_policies() -> Dict[str, RetryPolicy]:
+    """Retry-Policies pro Fehlerklasse (über ENV anpassbar)"""
+    max_retries = int(os.getenv('MAX_RETRIES', '3'))
+    return {
+        ERROR_TRANSIENT: RetryPolicy(
+            max_retries=max_retries,
+            base_delay=float(os.getenv('RETRY_BASE_DELAY', 5)),
+            max_delay=float(os.getenv('RETRY_MAX_DELAY', 300))
+        ),
+        ERROR_RATE_LIMIT: RetryPolicy(
+            max_retries=int(os.getenv('RATE_LIMIT_MAX_RETRIES', max_retries * 2)),
+            base_delay=float(os.getenv('RATE_LIMIT_BASE_DELAY', 30)),
+            max_delay=float(os.getenv('RATE_LIMIT_MAX_DELAY', 900))
+        ),
+        ERROR_PERMANENT: RetryPolicy(max_retries=0),
+    }
+
+
+def classify_error(error: Exception) -> str:
+    """
+    Ordnet einen Fehler einer Fehlerklasse zu
+
+    Args:
+        error: Aufgetretene Exception
+
+    Returns:
+        ERROR_TRANSIENT, ERROR_RATE_LIMIT oder ERROR_PERMANENT
+    """
+    status_code = _status_code(error)
+    name = type(error).__name__
+
+    if status_code == 429 or name == "RateLimitError":
+        return ERROR_RATE_LIMIT
+    if status_code is not None and 400 <= status_code < 500 and status_code not in (408, 409):
+        return ERROR_PERMANENT
+    if isinstance(error, (ValueError, KeyError, TypeError)) or name == "UnidentifiedImageError":
+        return ERROR_PERMANENT
+    return ERROR_TRANSIENT
+
+
+def _status_code(error: Exception) -> Any:
+    """Liest einen HTTP-Statuscode aus OpenAI-, httpx- oder PostgREST-Fehlern"""
+    for attr in ("status_code", "code"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+        if isinstance(value, str) and value.isdigit():
+            return int(value)
+
+    response = getattr(error, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
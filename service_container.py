@@ -0,0 +1,79 @@
+import os
+import logging
+from typing import Optional
+
+from storage_manager import StorageManager
+from database_manager import DatabaseManager
+from queue_manager import QueueManager
+from analysis_cache import AnalysisCache
+from token_budget import TokenBudget
+from cascade_stats import CascadeStats
+from status_events import StatusEvents
+from status_cache import StatusCache
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceContainer:
+    """
+    Service Container für Wardroberry
+    Hält prozessweit langlebige Instanzen von Storage-, Database- und Queue-Manager,
+    damit nicht jeder Request neue Supabase-Clients oder Redis-Verbindungen aufbaut
+    """
+
+    def __init__(self, redis_max_connections: Optional[int] = None):
+        """
+        Initialisiert den Container (Services werden erst mit startup() erstellt)
+
+        Args:
+            redis_max_connections: Größe des Redis Connection Pools
+                                   (falls nicht gesetzt: ENV REDIS_MAX_CONNECTIONS)
+        """
+        self.redis_max_connections = redis_max_connections or int(os.getenv('REDIS_MAX_CONNECTIONS', 20))
+
+        self.storage: Optional[StorageManager] = None
+        self.db: Optional[DatabaseManager] = None
+        self.queue: Optional[QueueManager] = None
+        self.analysis_cache: Optional[AnalysisCache] = None
+        self.token_budget: Optional[TokenBudget] = None
+        self.cascade_stats: Optional[CascadeStats] = None
+        self.status_events: Optional[StatusEvents] = None
+        self.status_cache: Optional[StatusCache] = None
+
+    async def startup(self) -> None:
+        """Erstellt alle Services (sync + async Clients) einmalig beim Start der Anwendung"""
+        self.storage = StorageManager()
+        self.queue = QueueManager(max_connections=self.redis_max_connections)
+        self.status_cache = StatusCache(self.queue.redis_client, self.queue.async_redis_client)
+        self.db = DatabaseManager(status_cache=self.status_cache)
+        self.analysis_cache = AnalysisCache(self.queue.redis_client, self.queue.async_redis_client)
+        self.token_budget = TokenBudget(self.queue.redis_client, self.queue.async_redis_client)
+        self.cascade_stats = CascadeStats(self.queue.redis_client, self.queue.async_redis_client)
+        self.status_events = StatusEvents(self.queue.redis_client, self.queue.async_redis_client)
+
+        await self.storage.init_async()
+        await self.db.init_async()
+        await self.status_events.start()
+
+        logger.info(f"✅ Service Container initialisiert (Redis Pool: {self.redis_max_connections})")
+
+    async def shutdown(self) -> None:
+        """Schließt alle Verbindungen beim Herunterfahren der Anwendung"""
+        if self.status_events is not None:
+            await self.status_events.stop()
+
+        for service in (self.queue, self.db, self.storage):
+            if service is not None:
+                await service.aclose()
+                service.close()
+
+        self.storage = None
+        self.db = None
+        self.queue = None
+        self.analysis_cache = None
+        self.token_budget = None
+        self.cascade_stats = None
+        self.status_events = None
+        self.status_cache = None
+
+        logger.info("🔌 Service Container geschlossen")
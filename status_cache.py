@@ -0,0 +1,184 @@
+import os
+import json
+import hashlib
+import logging
+from typing import Dict, Any, Optional
+from redis_utils import decode_response
+
+logger = logging.getLogger(__name__)
+
+# Spalten der clothes Tabelle → Felder des kompakten Status-Eintrags (= ClothingStatusResponse)
+STATUS_FIELDS = {
+    'id': 'id',
+    'user_id': 'user_id',
+    'processing_status': 'status',
+    'category': 'category',
+    'color': 'color',
+    'style': 'style',
+    'season': 'season',
+    'material': 'material',
+    'occasion': 'occasion',
+    'ai_confidence': 'confidence',
+    'image_url': 'image_url',
+    'extracted_image_url': 'extracted_image_url',
+    'medium_image_url': 'medium_image_url',
+    'thumbnail_url': 'thumbnail_url',
+    'processing_error': 'processing_error',
+    'updated_at': 'updated_at',
+}
+
+# Pflichtfelder von ClothingStatusResponse: Einträge ohne sie werden nicht ausgeliefert (Cache-Miss)
+REQUIRED_FIELDS = ('id', 'status', 'updated_at')
+
+# Endzustände: danach ändert sich der Status nicht mehr, Eintrag läuft schnell aus
+FINAL_STATUSES = ('completed', 'failed')
+
+
+def status_record(clothing_item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Baut den kompakten Status-Eintrag aus einer Zeile der clothes Tabelle
+
+    Args:
+        clothing_item: Zeile aus Supabase (select('*') oder Rückgabe eines Updates)
+
+    Returns:
+        Dict mit den Feldern von ClothingStatusResponse, user_id (RLS-Check) und etag
+    """
+    record = {
+        field: clothing_item[column]
+        for column, field in STATUS_FIELDS.items()
+        if clothing_item.get(column) is not None
+    }
+    record.setdefault('status', 'unknown')
+    payload = json.dumps(record, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    record['etag'] = f'"{hashlib.sha1(payload).hexdigest()[:20]}"'
+    return record
+
+
+def is_complete(record: Dict[str, Any]) -> bool:
+    """Prüft, ob ein Status-Eintrag alle Pflichtfelder der Antwort enthält"""
+    return all(record.get(field) is not None for field in REQUIRED_FIELDS)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Prüft einen If-None-Match Header (Liste, "*" und schwache ETags) gegen den aktuellen ETag"""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(',')]
+    return '*' in candidates or etag in (candidate.removeprefix('W/') for candidate in candidates)
+
+
+class StatusCache:
+    """
+    Redis-Cache für den Verarbeitungsstatus einzelner Kleidungsstücke
+    Der DatabaseManager schreibt jeden Statuswechsel durch (Worker und API), der Status-Endpoint
+    liest zuerst hier und fällt nur bei einem Miss auf Supabase zurück. Einträge laufen per TTL aus,
+    nach "completed"/"failed" deutlich schneller.
+    """
+
+    def __init__(self, redis_client, async_redis_client=None, ttl: int = None, final_ttl: int = None):
+        """
+        Args:
+            redis_client: Sync Redis Client (Worker)
+            async_redis_client: Async Redis Client (API)
+            ttl: Lebensdauer während der Verarbeitung in Sekunden (falls nicht gesetzt: ENV STATUS_CACHE_TTL)
+            final_ttl: Lebensdauer nach completed/failed (falls nicht gesetzt: ENV STATUS_CACHE_FINAL_TTL)
+        """
+        self.redis_client = redis_client
+        self.async_redis_client = async_redis_client
+        self.ttl = ttl or int(os.getenv('STATUS_CACHE_TTL', 3600))
+        self.final_ttl = final_ttl or int(os.getenv('STATUS_CACHE_FINAL_TTL', 300))
+
+        self.prefix = "status_cache"
+        self.stats_key = f"{self.prefix}:stats"
+
+    def _entry_key(self, clothing_id: str) -> str:
+        """Key eines Status-Eintrags"""
+        return f"{self.prefix}:{clothing_id}"
+
+    def _entry(self, clothing_item: Dict[str, Any]) -> tuple:
+        """Key, Eintrag und TTL für eine Zeile"""
+        record = status_record(clothing_item)
+        ttl = self.final_ttl if record['status'] in FINAL_STATUSES else self.ttl
+        return self._entry_key(record['id']), record, ttl
+
+    def put(self, clothing_item: Dict[str, Any]) -> None:
+        """
+        Schreibt den Status einer aktualisierten Zeile durch (Fehler werden nur geloggt)
+        Unvollständige Zeilen (z.B. ohne updated_at) löschen den Eintrag, der nächste Abruf liest aus Supabase.
+
+        Args:
+            clothing_item: Zeile nach dem Update
+        """
+        try:
+            key, record, ttl = self._entry(clothing_item)
+            if not is_complete(record):
+                self.redis_client.delete(key)
+                return
+            self.redis_client.set(key, json.dumps(record, ensure_ascii=False), ex=ttl)
+        except Exception as e:
+            logger.warning(f"⚠️ Status-Cache Schreibfehler: {e}")
+
+    async def put_async(self, clothing_item: Dict[str, Any], only_missing: bool = False) -> Dict[str, Any]:
+        """
+        Async-Variante von put
+
+        Args:
+            clothing_item: Zeile nach dem Update bzw. aus dem DB-Fallback
+            only_missing: Nur anlegen, wenn kein Eintrag existiert (DB-Fallback: ein zwischenzeitlich
+                          vom Worker geschriebener, neuerer Status wird nicht überschrieben)
+
+        Returns:
+            Der Status-Eintrag
+        """
+        key, record, ttl = self._entry(clothing_item)
+        try:
+            if not is_complete(record):
+                if not only_missing:
+                    await self.async_redis_client.delete(key)
+                return record
+            await self.async_redis_client.set(key, json.dumps(record, ensure_ascii=False), ex=ttl, nx=only_missing)
+        except Exception as e:
+            logger.warning(f"⚠️ Status-Cache Schreibfehler: {e}")
+        return record
+
+    async def get_async(self, clothing_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Holt den Status-Eintrag und zählt Hit/Miss
+
+        Args:
+            clothing_id: UUID des Kleidungsstücks
+
+        Returns:
+            Status-Eintrag oder None bei Cache-Miss (auch wenn Redis nicht erreichbar
+            oder der Eintrag unvollständig ist)
+        """
+        try:
+            pipe = self.async_redis_client.pipeline(transaction=False)
+            pipe.get(self._entry_key(clothing_id))
+            pipe.hincrby(self.stats_key, 'lookups', 1)
+            cached, _ = await pipe.execute()
+
+            record = json.loads(cached) if cached is not None else None
+            if record is None or not is_complete(record):
+                await self.async_redis_client.hincrby(self.stats_key, 'misses', 1)
+                return None
+            return record
+        except Exception as e:
+            logger.warning(f"⚠️ Status-Cache Lesefehler: {e}")
+            return None
+
+    async def get_stats_async(self) -> Dict[str, Any]:
+        """Hit/Miss-Zähler des Status-Endpoints"""
+        counters = await self.async_redis_client.hgetall(self.stats_key)
+        counters = {decode_response(key): int(value) for key, value in counters.items()}
+        lookups = counters.get('lookups', 0)
+        misses = counters.get('misses', 0)
+
+        return {
+            'hits': lookups - misses,
+            'misses': misses,
+            'hit_rate': round((lookups - misses) / lookups, 4) if lookups else None,
+            'ttl_seconds': self.ttl,
+            'final_ttl_seconds': self.final_ttl
+        }
@@ -0,0 +1,261 @@
+import os
+import re
+import json
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, Set, List, AsyncIterator
+from redis_utils import decode_response
+
+logger = logging.getLogger(__name__)
+
+# Event an den Stream des Nutzers anhängen (Verlauf für Last-Event-ID) und mit seiner ID
+# per Pub/Sub verteilen - atomar, damit Live- und Verlaufs-IDs übereinstimmen
+# KEYS: stream, channel | ARGV: event (JSON), maxlen, ttl
+PUBLISH_LUA = """
+local id = redis.call('XADD', KEYS[1], 'MAXLEN', '~', ARGV[2], '*', 'event', ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+redis.call('PUBLISH', KEYS[2], id .. ' ' .. ARGV[1])
+return id
+"""
+
+# Felder des Kleidungsstücks, die bei "completed" mitgeschickt werden (Client braucht keinen Abruf mehr)
+COMPLETED_FIELDS = (
+    'category', 'color', 'style', 'season', 'material', 'occasion', 'ai_confidence',
+    'extracted_image_url', 'medium_image_url', 'thumbnail_url'
+)
+
+EVENT_ID_PATTERN = re.compile(r"^\d+-\d+$")
+
+
+class _Subscriber:
+    """Eine offene SSE/WebSocket-Verbindung: lokale Queue + Flag für verpasste Events"""
+
+    def __init__(self, max_queue: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.lagging = False
+
+
+class StatusEvents:
+    """
+    Push-Statusupdates für Kleidungsstücke über Redis
+    Worker: publish() schreibt jeden Statuswechsel in einen gekappten Stream pro Nutzer
+    und verteilt ihn per Pub/Sub. API: eine PSUBSCRIBE-Verbindung pro Prozess verteilt
+    die Events an alle offenen Verbindungen; verpasste Events (Reconnect mit Last-Event-ID,
+    überlaufende Queue, Redis-Reconnect) werden aus dem Stream nachgelesen.
+    """
+
+    def __init__(self, redis_client, async_redis_client=None):
+        """
+        Args:
+            redis_client: Sync Redis Client (Worker, publish)
+            async_redis_client: Async Redis Client (API, Verteilung an Verbindungen)
+        """
+        self.redis_client = redis_client
+        self.async_redis_client = async_redis_client
+        self.prefix = "clothing_status"
+        self.stream_maxlen = int(os.getenv('STATUS_STREAM_MAXLEN', 1000))
+        self.stream_ttl = int(os.getenv('STATUS_STREAM_TTL', 86400))
+        self.keepalive = float(os.getenv('STATUS_EVENTS_KEEPALIVE', 15))
+        self.subscriber_queue_size = 100
+
+        self._publish_script = redis_client.register_script(PUBLISH_LUA) if redis_client is not None else None
+        self._subscribers: Dict[str, Set[_Subscriber]] = {}
+        self._listener: Optional[asyncio.Task] = None
+
+    def _stream_key(self, user_id: str) -> str:
+        return f"{self.prefix}:stream:{user_id}"
+
+    def _channel(self, user_id: str) -> str:
+        return f"{self.prefix}:user:{user_id}"
+
+    # ======================
+    # WORKER: PUBLIZIEREN
+    # ======================
+
+    def publish(self, user_id: str, clothing_id: str, status: str,
+                clothing_item: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> Optional[str]:
+        """
+        Veröffentlicht einen Statuswechsel (Fehler werden nur geloggt, der Job läuft weiter)
+
+        Args:
+            user_id: UUID des Nutzers
+            clothing_id: UUID des Kleidungsstücks
+            status: Neuer Status (ProcessingStatus.value oder "retrying" bei geplantem Retry)
+            clothing_item: Aktualisierte Zeile (für updated_at und Ergebnisfelder bei "completed")
+            error: Fehlermeldung bei "failed"
+
+        Returns:
+            Event-ID oder None bei Fehler
+        """
+        event = {'clothing_id': clothing_id, 'status': status}
+        clothing_item = clothing_item or {}
+        event['updated_at'] = clothing_item.get('updated_at') or datetime.now(timezone.utc).isoformat()
+        if error:
+            event['processing_error'] = error
+        if status == 'completed':
+            event.update({field: clothing_item[field] for field in COMPLETED_FIELDS if field in clothing_item})
+
+        try:
+            event_id = self._publish_script(
+                keys=[self._stream_key(user_id), self._channel(user_id)],
+                args=[json.dumps(event, ensure_ascii=False), self.stream_maxlen, self.stream_ttl]
+            )
+            return decode_response(event_id)
+        except Exception as e:
+            logger.warning(f"⚠️ Status-Event für {clothing_id} nicht veröffentlicht: {e}")
+            return None
+
+    # ======================
+    # API: VERTEILEN
+    # ======================
+
+    async def start(self) -> None:
+        """Startet den Pub/Sub-Listener (einmal pro API-Prozess)"""
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        """Beendet den Listener"""
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    async def _listen(self) -> None:
+        """PSUBSCRIBE auf alle Nutzer-Kanäle, mit Reconnect"""
+        pattern = f"{self.prefix}:user:*"
+        channel_prefix = len(self._channel(""))
+        delay = 1.0
+        while True:
+            pubsub = self.async_redis_client.pubsub()
+            try:
+                await pubsub.psubscribe(pattern)
+                # Während des Reconnects verpasste Events aus dem Stream nachholen lassen
+                self._mark_all_lagging()
+                delay = 1.0
+                async for message in pubsub.listen():
+                    if message['type'] != 'pmessage':
+                        continue
+                    user_id = decode_response(message['channel'])[channel_prefix:]
+                    subscribers = self._subscribers.get(user_id)
+                    if not subscribers:
+                        continue
+                    event_id, _, payload = decode_response(message['data']).partition(' ')
+                    self._dispatch(subscribers, event_id, payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Status-Event Listener getrennt, neuer Versuch in {delay:.0f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    def _dispatch(self, subscribers: Set[_Subscriber], event_id: str, payload: str) -> None:
+        for subscriber in subscribers:
+            if subscriber.lagging:
+                continue
+            try:
+                subscriber.queue.put_nowait((event_id, payload))
+            except asyncio.QueueFull:
+                # Langsamer Client: Queue verwerfen, er liest ab seiner letzten ID aus dem Stream nach
+                subscriber.lagging = True
+                _drain(subscriber.queue)
+                subscriber.queue.put_nowait(None)
+
+    def _mark_all_lagging(self) -> None:
+        for subscribers in self._subscribers.values():
+            for subscriber in subscribers:
+                subscriber.lagging = True
+                _drain(subscriber.queue)
+                subscriber.queue.put_nowait(None)
+
+    async def events(self, user_id: str, last_event_id: Optional[str] = None,
+                     clothing_ids: Optional[Set[str]] = None) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Liefert die Status-Events eines Nutzers, optional ab einer Event-ID
+
+        Args:
+            user_id: UUID des Nutzers
+            last_event_id: Zuletzt empfangene Event-ID (Events danach werden nachgeliefert)
+            clothing_ids: Nur Events dieser Kleidungsstücke (None = alle des Nutzers)
+
+        Yields:
+            Event-Dict mit "id" oder None als Keepalive-Takt
+        """
+        # Ohne Resume ab dem aktuellen Ende des Streams (Basis für das Nachlesen nach einem Redis-Reconnect)
+        if last_event_id and EVENT_ID_PATTERN.match(last_event_id):
+            last_id = last_event_id
+        else:
+            last_id = await self._latest_id(user_id)
+
+        # Erst abonnieren, dann nachlesen: keine Lücke, Doppelte werden per ID verworfen
+        subscriber = _Subscriber(self.subscriber_queue_size)
+        subscriber.queue.put_nowait(None)
+        self._subscribers.setdefault(user_id, set()).add(subscriber)
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(subscriber.queue.get(), self.keepalive)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+
+                if item is None:
+                    # Nachholen aus dem Stream (Resume, Überlauf, Redis-Reconnect); Live-Events
+                    # ab jetzt wieder annehmen, Überschneidungen filtert der ID-Vergleich
+                    subscriber.lagging = False
+                    entries = await self._read_since(user_id, last_id)
+                else:
+                    entries = [item]
+
+                for event_id, payload in entries:
+                    if _id_tuple(event_id) <= _id_tuple(last_id):
+                        continue
+                    last_id = event_id
+                    event = json.loads(payload)
+                    if clothing_ids and event.get('clothing_id') not in clothing_ids:
+                        continue
+                    event['id'] = event_id
+                    yield event
+        finally:
+            subscribers = self._subscribers.get(user_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[user_id]
+
+    async def _latest_id(self, user_id: str) -> str:
+        """ID des letzten Events im Stream des Nutzers ("0-0" wenn leer)"""
+        entries = await self.async_redis_client.xrevrange(self._stream_key(user_id), count=1)
+        return decode_response(entries[0][0]) if entries else "0-0"
+
+    async def _read_since(self, user_id: str, last_id: str) -> List[tuple]:
+        """Events aus dem Stream nach last_id"""
+        entries = await self.async_redis_client.xrange(self._stream_key(user_id), min=f"({last_id}", max="+")
+        return [(decode_response(entry_id), decode_response(fields[b'event'])) for entry_id, fields in entries]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Offene Verbindungen dieses API-Prozesses"""
+        return {
+            'users': len(self._subscribers),
+            'connections': sum(len(subscribers) for subscribers in self._subscribers.values()),
+            'listener_running': self._listener is not None and not self._listener.done()
+        }
+
+
+def _id_tuple(event_id: str) -> tuple:
+    milliseconds, _, sequence = event_id.partition('-')
+    return int(milliseconds), int(sequence or 0)
+
+
+def _drain(queue: asyncio.Queue) -> None:
+    while not queue.empty():
+        queue.get_nowait()
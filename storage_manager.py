@@ -1,9 +1,14 @@
 import os
 import logging
-from typing import Optional, BinaryIO, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from io import FileIO
+from typing import Optional, BinaryIO, Tuple, Dict, Any, Union
 from uuid import uuid4
 import mimetypes
 from supabase import create_client, Client
+from supabase._async.client import AsyncClient, create_client as create_async_client
+from gotrue import AsyncMemoryStorage
+from supabase.lib.client_options import ClientOptions
 
 
 class StorageManager:
@@ -23,9 +28,32 @@ class StorageManager:
         if not self.supabase_url or not self.supabase_key:
             raise ValueError("Supabase URL und Key müssen gesetzt sein")
         
-        self.client: Client = create_client(self.supabase_url, self.supabase_key)
+        # Langlebiger Client: die HTTP-Session (Keep-Alive) wird über alle Requests wiederverwendet
+        options = ClientOptions(
+            storage_client_timeout=int(os.getenv('SUPABASE_STORAGE_TIMEOUT', 20))
+        )
+        self.client: Client = create_client(self.supabase_url, self.supabase_key, options=options)
+        self.client_options = options
+        
+        # Async Client für die FastAPI-Endpoints (wird in init_async() erstellt)
+        self.async_client: Optional[AsyncClient] = None
+        
         self.original_bucket = "clothing-images-original"  # Originale Uploads
         self.processed_bucket = "clothing-images-processed"  # Verarbeitete/extrahierte Bilder
+        
+        # Threads für parallele Uploads der Derivate (der sync HTTP-Client ist thread-safe)
+        self._upload_pool = ThreadPoolExecutor(
+            max_workers=int(os.getenv('STORAGE_UPLOAD_CONCURRENCY', 4)),
+            thread_name_prefix="storage-upload"
+        )
+    
+    async def init_async(self) -> None:
+        """Erstellt den async Supabase Client (muss im laufenden Event Loop aufgerufen werden)"""
+        if self.async_client is None:
+            # Der async Auth-Client braucht einen async Session-Storage
+            async_options = self.client_options.replace(storage=AsyncMemoryStorage())
+            self.async_client = await create_async_client(self.supabase_url, self.supabase_key,
+                                                          options=async_options)
     
     def validate_image_file(self, content_type: str, file_size: int) -> tuple[bool, str]:
         """
@@ -79,8 +107,7 @@ class StorageManager:
         """
         try:
             # Eindeutigen Dateinamen generieren
-            file_extension = self._get_file_extension(content_type)
-            unique_filename = f"{user_id}/{uuid4()}{file_extension}"
+            unique_filename = self._new_original_path(user_id, content_type)
             
             # In Supabase Storage hochladen
             result = self.client.storage.from_(self.original_bucket).upload(
@@ -105,8 +132,95 @@ class StorageManager:
             self.logger.error(f"Fehler beim Hochladen des Original-Bildes: {e}")
             raise
     
+    async def upload_original_image_async(self, user_id: str, file_content: Union[bytes, FileIO],
+                                          file_name: str, content_type: str) -> Tuple[str, str]:
+        """
+        Async-Variante von upload_original_image (für FastAPI-Endpoints)
+        file_content darf eine Datei (FileIO) sein: httpx streamt sie dann in Chunks statt sie zu puffern
+        """
+        try:
+            unique_filename = self._new_original_path(user_id, content_type)
+            bucket = self.async_client.storage.from_(self.original_bucket)
+            
+            result = await bucket.upload(
+                path=unique_filename,
+                file=file_content,
+                file_options={
+                    "content-type": content_type,
+                    "upsert": False
+                }
+            )
+            
+            if result.status_code not in [200, 201]:
+                raise Exception(f"Upload fehlgeschlagen: {result}")
+            
+            public_url = await bucket.get_public_url(unique_filename)
+            
+            self.logger.info(f"Original-Bild hochgeladen: {unique_filename}")
+            return unique_filename, public_url
+            
+        except Exception as e:
+            self.logger.error(f"Fehler beim Hochladen des Original-Bildes: {e}")
+            raise
+    
+    async def create_signed_upload_url_async(self, user_id: str, content_type: str = None,
+                                             file_path: str = None) -> Dict[str, str]:
+        """
+        Erstellt eine signierte Upload-URL für ein Original-Bild (Client lädt direkt in den Storage)
+        
+        Args:
+            user_id: UUID des Nutzers (erster Pfadteil, für RLS)
+            content_type: Angekündigter MIME-Type (bestimmt die Dateiendung)
+            file_path: Vorhandener Pfad (neue URL für einen nicht abgeschlossenen Upload)
+            
+        Returns:
+            Dict mit path, signed_url, token und public_url
+        """
+        try:
+            unique_filename = file_path or self._new_original_path(user_id, content_type)
+            bucket = self.async_client.storage.from_(self.original_bucket)
+            
+            signed = await bucket.create_signed_upload_url(unique_filename)
+            public_url = await bucket.get_public_url(unique_filename)
+            
+            self.logger.info(f"Signierte Upload-URL erstellt: {unique_filename}")
+            return {
+                'path': unique_filename,
+                'signed_url': signed['signed_url'],
+                'token': signed['token'],
+                'public_url': public_url
+            }
+            
+        except Exception as e:
+            self.logger.error(f"Fehler beim Erstellen der signierten Upload-URL: {e}")
+            raise
+    
+    async def get_object_info_async(self, bucket_name: str, file_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Liest Größe und MIME-Type eines Storage-Objekts aus den Metadaten (ohne Download)
+        
+        Args:
+            bucket_name: Name des Storage Buckets
+            file_path: Pfad zur Datei
+            
+        Returns:
+            Dict mit size und content_type oder None wenn das Objekt nicht existiert
+        """
+        folder, _, name = file_path.rpartition('/')
+        entries = await self.async_client.storage.from_(bucket_name).list(
+            folder, {"search": name, "limit": 10}
+        )
+        for entry in entries:
+            if entry.get('name') == name and entry.get('metadata'):
+                metadata = entry['metadata']
+                return {
+                    'size': int(metadata.get('size') or metadata.get('contentLength') or 0),
+                    'content_type': metadata.get('mimetype')
+                }
+        return None
+    
     def upload_processed_image(self, user_id: str, clothing_id: str, file_content: bytes, 
-                             content_type: str) -> Tuple[str, str]:
+                             content_type: str, variant: str = "full") -> Tuple[str, str]:
         """
         Lädt das verarbeitete/extrahierte Bild hoch
         
@@ -115,13 +229,13 @@ class StorageManager:
             clothing_id: UUID des Kleidungsstücks
             file_content: Verarbeitete Bilddaten
             content_type: MIME-Type
+            variant: Derivat ("full", "medium", "thumb")
             
         Returns:
             Tuple (file_path, public_url)
         """
         try:
-            file_extension = self._get_file_extension(content_type)
-            unique_filename = f"{user_id}/{clothing_id}_processed{file_extension}"
+            unique_filename = self.processed_path(user_id, clothing_id, variant, content_type)
             
             result = self.client.storage.from_(self.processed_bucket).upload(
                 path=unique_filename,
@@ -144,6 +258,50 @@ class StorageManager:
             self.logger.error(f"Fehler beim Hochladen des verarbeiteten Bildes: {e}")
             raise
     
+    def upload_processed_images(self, user_id: str, clothing_id: str,
+                                images: Dict[str, Tuple[bytes, str]]) -> Dict[str, Tuple[str, str]]:
+        """
+        Lädt alle Derivate eines Kleidungsstücks parallel hoch
+        
+        Args:
+            user_id: UUID des Nutzers
+            clothing_id: UUID des Kleidungsstücks
+            images: Dict Variante → (Bilddaten, MIME-Type)
+            
+        Returns:
+            Dict Variante → (file_path, public_url)
+        """
+        futures = {
+            variant: self._upload_pool.submit(self.upload_processed_image, user_id, clothing_id,
+                                              file_content, content_type, variant)
+            for variant, (file_content, content_type) in images.items()
+        }
+        return {variant: future.result() for variant, future in futures.items()}
+    
+    def processed_path(self, user_id: str, clothing_id: str, variant: str, content_type: str) -> str:
+        """Deterministischer Storage-Pfad eines Derivats (Retries überschreiben statt zu duplizieren)"""
+        return f"{user_id}/{clothing_id}/{variant}{self._get_file_extension(content_type)}"
+    
+    def download_image(self, bucket_name: str, file_path: str) -> bytes:
+        """
+        Lädt ein Bild aus Supabase Storage herunter
+        
+        Args:
+            bucket_name: Name des Storage Buckets
+            file_path: Pfad zur Datei
+            
+        Returns:
+            Binärdaten der Datei
+        """
+        try:
+            file_content = self.client.storage.from_(bucket_name).download(file_path)
+            self.logger.info(f"Bild heruntergeladen: {file_path} ({len(file_content)} Bytes)")
+            return file_content
+            
+        except Exception as e:
+            self.logger.error(f"Fehler beim Herunterladen des Bildes: {e}")
+            raise
+    
     def delete_image(self, bucket_name: str, file_path: str) -> bool:
         """
         Löscht ein Bild aus Supabase Storage
@@ -169,6 +327,39 @@ class StorageManager:
             self.logger.error(f"Fehler beim Löschen des Bildes: {e}")
             return False
     
+    async def delete_image_async(self, bucket_name: str, file_path: str) -> bool:
+        """Async-Variante von delete_image"""
+        try:
+            await self.async_client.storage.from_(bucket_name).remove([file_path])
+            self.logger.info(f"Bild gelöscht: {file_path}")
+            return True
+        except Exception as e:
+            self.logger.error(f"Fehler beim Löschen des Bildes: {e}")
+            return False
+    
+    def path_from_public_url(self, public_url: str, bucket_name: str) -> Optional[str]:
+        """
+        Ermittelt den Storage-Pfad aus einer Public URL
+        
+        Args:
+            public_url: Public URL wie von get_public_url geliefert
+            bucket_name: Name des Storage Buckets
+            
+        Returns:
+            Pfad innerhalb des Buckets oder None wenn die URL nicht passt
+        """
+        marker = f"/object/public/{bucket_name}/"
+        if not public_url or marker not in public_url:
+            return None
+        
+        path = public_url.split(marker, 1)[1]
+        return path.split('?', 1)[0] or None
+    
+    def _new_original_path(self, user_id: str, content_type: str) -> str:
+        """Generiert einen eindeutigen Storage-Pfad für ein Original-Bild"""
+        file_extension = self._get_file_extension(content_type)
+        return f"{user_id}/{uuid4()}{file_extension}"
+    
     def _get_file_extension(self, content_type: str) -> str:
         """Ermittelt Dateierweiterung basierend auf MIME-Type"""
         extensions = {
@@ -193,4 +384,33 @@ class StorageManager:
             return True
         except Exception as e:
             self.logger.error(f"Storage-Verbindung fehlgeschlagen: {e}")
-            return False 
\ No newline at end of file
+            return False
+    
+    async def health_check_async(self) -> bool:
+        """Async-Variante von health_check"""
+        try:
+            await self.async_client.storage.list_buckets()
+            return True
+        except Exception as e:
+            self.logger.error(f"Storage-Verbindung fehlgeschlagen: {e}")
+            return False
+    
+    def close(self) -> None:
+        """Schließt die HTTP-Session des Storage-Clients"""
+        self._upload_pool.shutdown(wait=False)
+        try:
+            self.client.storage.session.close()
+            self.logger.info("Storage-Client geschlossen")
+        except Exception as e:
+            self.logger.error(f"Fehler beim Schließen des Storage-Clients: {e}")
+    
+    async def aclose(self) -> None:
+        """Schließt die HTTP-Session des async Storage-Clients"""
+        if self.async_client is None:
+            return
+        try:
+            await self.async_client.storage.session.aclose()
+        except Exception as e:
+            self.logger.error(f"Fehler beim Schließen des async Storage-Clients: {e}")
+        finally:
+            self.async_client = None
@@ -0,0 +1,250 @@
+import re
+import json
+from typing import Dict, Any, Optional, Iterable
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Erlaubte Werte pro Feld (Reihenfolge = Reihenfolge im Prompt und im JSON-Schema)
+CATEGORIES = (
+    "Oberteil", "Hose", "Kleid", "Rock", "Jacke", "Mantel", "Pullover",
+    "T-Shirt", "Hemd", "Bluse", "Shorts", "Jeans", "Schuhe", "Stiefel",
+    "Sneaker", "Sandalen", "Accessoire", "Gürtel", "Mütze", "Schal"
+)
+COLORS = (
+    "schwarz", "weiß", "grau", "braun", "beige", "rot", "rosa", "orange",
+    "gelb", "grün", "blau", "lila", "bunt", "gemustert"
+)
+STYLES = (
+    "casual", "elegant", "sportlich", "business", "vintage", "modern",
+    "bohemian", "minimalistisch", "extravagant"
+)
+SEASONS = ("Frühling", "Sommer", "Herbst", "Winter", "Ganzjährig", "Übergangszeit")
+OCCASIONS = ("Alltag", "Arbeit", "Sport", "Freizeit", "Ausgehen", "Formal", "Strand", "Zuhause")
+
+LABELS = {
+    "category": CATEGORIES,
+    "color": COLORS,
+    "style": STYLES,
+    "season": SEASONS,
+    "occasion": OCCASIONS
+}
+
+# Standardwert, falls ein Label nicht erkannt wird
+DEFAULTS = {
+    "category": "Oberteil",
+    "color": "unbekannt",
+    "style": "casual",
+    "season": "Ganzjährig",
+    "material": "unbekannt",
+    "occasion": "Alltag"
+}
+
+# Synonyme (englische Antworten, Umschreibungen, Schreibvarianten) → erlaubter Wert
+ALIASES = {
+    "category": {
+        "top": "Oberteil", "tshirt": "T-Shirt", "t shirt": "T-Shirt", "tee": "T-Shirt", "shirt": "Hemd",
+        "blouse": "Bluse", "pulli": "Pullover", "sweater": "Pullover", "hoodie": "Pullover",
+        "sweatshirt": "Pullover", "strickjacke": "Jacke", "jacket": "Jacke", "coat": "Mantel",
+        "dress": "Kleid", "skirt": "Rock", "pants": "Hose", "trousers": "Hose", "jeanshose": "Jeans",
+        "kurze hose": "Shorts", "shoes": "Schuhe", "schuh": "Schuhe", "boots": "Stiefel",
+        "sneakers": "Sneaker", "turnschuhe": "Sneaker", "sandals": "Sandalen", "belt": "Gürtel",
+        "hat": "Mütze", "cap": "Mütze", "beanie": "Mütze", "scarf": "Schal", "accessory": "Accessoire"
+    },
+    "color": {
+        "black": "schwarz", "white": "weiß", "weiss": "weiß", "gray": "grau", "grey": "grau",
+        "brown": "braun", "red": "rot", "pink": "rosa", "yellow": "gelb", "green": "grün",
+        "gruen": "grün", "blue": "blau", "navy": "blau", "dunkelblau": "blau", "hellblau": "blau",
+        "purple": "lila", "violett": "lila", "mehrfarbig": "bunt", "multicolor": "bunt",
+        "patterned": "gemustert", "creme": "beige", "cream": "beige"
+    },
+    "style": {
+        "sporty": "sportlich", "sport": "sportlich", "athletic": "sportlich", "boho": "bohemian",
+        "minimalist": "minimalistisch", "minimal": "minimalistisch", "retro": "vintage",
+        "formal": "elegant", "lässig": "casual", "freizeit": "casual"
+    },
+    "season": {
+        "spring": "Frühling", "summer": "Sommer", "autumn": "Herbst", "fall": "Herbst",
+        "ganzjahr": "Ganzjährig", "ganzjaehrig": "Ganzjährig", "all season": "Ganzjährig",
+        "all year": "Ganzjährig", "übergang": "Übergangszeit", "transition": "Übergangszeit"
+    },
+    "occasion": {
+        "everyday": "Alltag", "casual": "Alltag", "work": "Arbeit", "office": "Arbeit", "büro": "Arbeit",
+        "sports": "Sport", "leisure": "Freizeit", "party": "Ausgehen", "evening": "Ausgehen",
+        "beach": "Strand", "home": "Zuhause"
+    }
+}
+
+# Frozensets für die Prüfung gültiger Werte
+ALLOWED = {field: frozenset(values) for field, values in LABELS.items()}
+
+
+def _lookup_key(value: str) -> str:
+    """Vergleichsschlüssel: Groß-/Kleinschreibung, Bindestriche/Unterstriche und Leerzeichen vereinheitlicht"""
+    return re.sub(r"[\s_\-]+", " ", value.strip().casefold())
+
+
+def _build_index(values: Iterable[str], aliases: Dict[str, str]) -> Dict[str, str]:
+    """Vorberechnete Zuordnung Schlüssel → erlaubter Wert (inkl. Varianten ohne Leerzeichen)"""
+    index = {}
+    for alias, value in aliases.items():
+        index[_lookup_key(alias)] = value
+    for value in values:
+        index[_lookup_key(value)] = value
+    for key, value in list(index.items()):
+        index.setdefault(key.replace(" ", ""), value)
+    return index
+
+
+_INDEX = {field: _build_index(values, ALIASES.get(field, {})) for field, values in LABELS.items()}
+
+
+def normalize_label(field: str, value: Any) -> Optional[str]:
+    """
+    Ordnet einen Wert der AI dem erlaubten Label zu (exakt, Groß-/Kleinschreibung, Synonyme)
+
+    Args:
+        field: Feldname (category, color, style, season, occasion)
+        value: Rohwert aus der AI-Antwort
+
+    Returns:
+        Erlaubter Wert oder None wenn nicht zuordenbar
+    """
+    if not isinstance(value, str):
+        return None
+    if value in ALLOWED[field]:
+        return value
+    return _INDEX[field].get(_lookup_key(value))
+
+
+def parse_confidence(value: Any) -> Optional[float]:
+    """Confidence als Zahl 0-1 (akzeptiert auch "0.8" und "80%"), None wenn nicht lesbar"""
+    if isinstance(value, str):
+        value = value.strip()
+        percent = value.endswith("%")
+        try:
+            value = float(value.rstrip("%").replace(",", ".")) / (100 if percent else 1)
+        except ValueError:
+            return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    if value > 1:
+        value = value / 100
+    return min(1.0, max(0.0, float(value)))
+
+
+def normalize_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Validiert und normalisiert ein AI-Analyseergebnis (live, Micro-Batch und Backfill)
+
+    Args:
+        result: Rohes AI-Ergebnis
+
+    Returns:
+        Ergebnis mit erlaubten Labels (sonst Standardwert), Material und Confidence
+    """
+    # Labels über Taxonomie (Groß-/Kleinschreibung, Synonyme), sonst Standardwert
+    normalized = {
+        field: normalize_label(field, result.get(field)) or DEFAULTS[field]
+        for field in LABELS
+    }
+    material = result.get("material")
+    normalized["material"] = material.strip() if isinstance(material, str) and material.strip() \
+        else DEFAULTS["material"]
+
+    confidence = parse_confidence(result.get("confidence"))
+    normalized["confidence"] = confidence if confidence is not None else 0.8
+
+    return normalized
+
+
+# ======================
+# JSON-SCHEMA (Structured Outputs)
+# ======================
+
+def _item_schema(with_index: bool = False) -> Dict[str, Any]:
+    """JSON-Schema eines Analyseergebnisses, Enums aus der Taxonomie"""
+    properties = {
+        "category": {"type": "string", "enum": list(CATEGORIES)},
+        "color": {"type": "string", "enum": list(COLORS)},
+        "style": {"type": "string", "enum": list(STYLES)},
+        "season": {"type": "string", "enum": list(SEASONS)},
+        "material": {"type": "string"},
+        "occasion": {"type": "string", "enum": list(OCCASIONS)},
+        "confidence": {"type": "number"}
+    }
+    if with_index:
+        properties = {"index": {"type": "integer"}, **properties}
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False
+    }
+
+
+ANALYSIS_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "clothing_analysis", "strict": True, "schema": _item_schema()}
+}
+
+# Structured Outputs verlangen ein Objekt als Wurzel, daher {"results": [...]}
+BATCH_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "clothing_analysis_batch",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {"results": {"type": "array", "items": _item_schema(with_index=True)}},
+            "required": ["results"],
+            "additionalProperties": False
+        }
+    }
+}
+
+
+# ======================
+# TOLERANTER PARSER
+# ======================
+
+_FENCE = re.compile(r"^```[a-zA-Z]*\s*|\s*```$")
+
+
+def parse_json_response(content: str) -> Any:
+    """
+    Parst eine Modellantwort als JSON, auch mit Markdown-Fences oder Text drumherum
+
+    Args:
+        content: Antworttext des Modells
+
+    Returns:
+        Geparstes JSON (dict oder list)
+
+    Raises:
+        ValueError: Kein JSON in der Antwort
+    """
+    text = _FENCE.sub("", content.strip())
+    try:
+        return _loads(text)
+    except ValueError:
+        pass
+
+    # Äußerstes Objekt/Array aus umgebendem Text schneiden
+    starts = [position for position in (text.find("{"), text.find("[")) if position >= 0]
+    if starts:
+        start = min(starts)
+        end = text.rfind("}" if text[start] == "{" else "]")
+        if end > start:
+            try:
+                return _loads(text[start:end + 1])
+            except ValueError:
+                pass
+    raise ValueError(f"Antwort ist kein JSON: {content[:200]}")
+
+
+def _loads(text: str) -> Any:
+    """orjson falls installiert, sonst json (beide werfen ValueError-Unterklassen)"""
+    return orjson.loads(text) if orjson is not None else json.loads(text)
@@ -0,0 +1,228 @@
+"""
+Lokaler Stub der OpenAI Files- und Batch-API für backfill.py (nur Standardbibliothek)
+
+Unterstützt genau die Aufrufe des Backfills: Datei hochladen, Batch starten, Batch abfragen,
+Ergebnisdatei herunterladen. Ein Batch ist nach `polls_until_complete` Abfragen fertig; die
+Antwort pro Request liefert `responder` (Standard: gültige Analyse für jedes Kleidungsstück).
+
+Verwendung (manuell gegen backfill.py):
+    python tests/batch_api_stub.py --port 8089
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=test python backfill.py run --poll-interval 1
+"""
+import json
+import time
+import uuid
+import argparse
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+
+DEFAULT_ANALYSIS = {
+    "category": "Hose",
+    "color": "blau",
+    "style": "casual",
+    "season": "Ganzjährig",
+    "material": "Denim",
+    "occasion": "Alltag",
+    "confidence": 0.9
+}
+
+
+def default_responder(custom_id: str, body: Dict[str, Any]) -> Optional[str]:
+    """Antwort-Content einer Chat Completion (None = Request schlägt im Batch fehl)"""
+    return json.dumps(DEFAULT_ANALYSIS)
+
+
+class BatchAPIStub:
+    """In-Memory Files-/Batch-API auf einem lokalen Port (Thread)"""
+
+    def __init__(self, polls_until_complete: int = 1,
+                 responder: Callable[[str, Dict[str, Any]], Optional[str]] = default_responder):
+        """
+        Args:
+            polls_until_complete: Abfragen (batches.retrieve) bis ein Batch "completed" ist
+            responder: Liefert den Content pro custom_id (None = Fehler-Zeile)
+        """
+        self.polls_until_complete = polls_until_complete
+        self.responder = responder
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.batches: Dict[str, Dict[str, Any]] = {}
+        self.polls: Dict[str, int] = {}
+        self.fail_batch_creates = 0  # nächste N batches.create mit 400 ablehnen (Abbruch simulieren)
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self, port: int = 0) -> "BatchAPIStub":
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub._handle(self, "GET")
+
+            def do_POST(self):
+                stub._handle(self, "POST")
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    # ======================
+    # HTTP
+    # ======================
+
+    def _handle(self, handler: BaseHTTPRequestHandler, method: str) -> None:
+        path = handler.path.split("?", 1)[0].rstrip("/")
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = handler.rfile.read(length) if length else b""
+
+        with self._lock:
+            if method == "POST" and path == "/v1/files":
+                status, payload = 200, self._create_file(handler.headers.get("Content-Type", ""), body)
+            elif method == "POST" and path == "/v1/batches":
+                status, payload = self._create_batch(json.loads(body))
+            elif method == "GET" and path.startswith("/v1/batches/"):
+                status, payload = self._retrieve_batch(path.rsplit("/", 1)[1])
+            elif method == "GET" and path.startswith("/v1/files/") and path.endswith("/content"):
+                file_id = path.split("/")[3]
+                if file_id not in self.files:
+                    status, payload = _not_found(file_id)
+                else:
+                    return _send(handler, 200, self.files[file_id]["content"], "application/octet-stream")
+            else:
+                status, payload = _not_found(path)
+
+        _send(handler, status, json.dumps(payload).encode(), "application/json")
+
+    def _create_file(self, content_type: str, body: bytes) -> Dict[str, Any]:
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode() + body
+        )
+        content, filename, purpose = b"", "upload.jsonl", "batch"
+        for part in message.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            if name == "file":
+                content = part.get_payload(decode=True)
+                filename = part.get_filename() or filename
+            elif name == "purpose":
+                purpose = part.get_payload(decode=True).decode()
+        return self._store_file(content, filename, purpose)
+
+    def _store_file(self, content: bytes, filename: str, purpose: str) -> Dict[str, Any]:
+        file_object = {
+            "id": f"file-{uuid.uuid4().hex[:12]}",
+            "object": "file",
+            "bytes": len(content),
+            "created_at": int(time.time()),
+            "filename": filename,
+            "purpose": purpose,
+            "status": "processed"
+        }
+        self.files[file_object["id"]] = {**file_object, "content": content}
+        return file_object
+
+    def _create_batch(self, request: Dict[str, Any]) -> tuple:
+        if self.fail_batch_creates:
+            self.fail_batch_creates -= 1
+            return 400, {"error": {"message": "Stub: batches.create abgelehnt", "type": "invalid_request_error"}}
+        if request["input_file_id"] not in self.files:
+            return _not_found(request["input_file_id"])
+
+        lines = self.files[request["input_file_id"]]["content"].decode().splitlines()
+        batch = {
+            "id": f"batch_{uuid.uuid4().hex[:12]}",
+            "object": "batch",
+            "endpoint": request["endpoint"],
+            "input_file_id": request["input_file_id"],
+            "completion_window": request["completion_window"],
+            "status": "in_progress",
+            "created_at": int(time.time()),
+            "output_file_id": None,
+            "error_file_id": None,
+            "errors": None,
+            "metadata": request.get("metadata"),
+            "request_counts": {"total": len(lines), "completed": 0, "failed": 0}
+        }
+        self.batches[batch["id"]] = batch
+        self.polls[batch["id"]] = 0
+        return 200, batch
+
+    def _retrieve_batch(self, batch_id: str) -> tuple:
+        batch = self.batches.get(batch_id)
+        if batch is None:
+            return _not_found(batch_id)
+
+        self.polls[batch_id] += 1
+        if batch["status"] == "in_progress" and self.polls[batch_id] >= self.polls_until_complete:
+            self._complete(batch)
+        return 200, batch
+
+    def _complete(self, batch: Dict[str, Any]) -> None:
+        """Beantwortet alle Requests der Eingabedatei und legt die Ergebnisdatei an"""
+        output, failed = [], 0
+        for line in self.files[batch["input_file_id"]]["content"].decode().splitlines():
+            request = json.loads(line)
+            content = self.responder(request["custom_id"], request["body"])
+            if content is None:
+                failed += 1
+                response = {"status_code": 500, "body": {"error": {"message": "Stub-Fehler"}}}
+            else:
+                response = {"status_code": 200, "body": {
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content}}]
+                }}
+            output.append(json.dumps({"id": f"req_{uuid.uuid4().hex[:8]}", "custom_id": request["custom_id"],
+                                      "response": response, "error": None}))
+
+        output_file = self._store_file(("\n".join(output) + "\n").encode(), "output.jsonl", "batch_output")
+        total = batch["request_counts"]["total"]
+        batch.update({
+            "status": "completed",
+            "output_file_id": output_file["id"],
+            "completed_at": int(time.time()),
+            "request_counts": {"total": total, "completed": total - failed, "failed": failed}
+        })
+
+
+def _send(handler: BaseHTTPRequestHandler, status: int, body: bytes, content_type: str) -> None:
+    handler.send_response(status)
+    handler.send_header("Content-Type", content_type)
+    handler.send_header("Content-Length", str(len(body)))
+    handler.end_headers()
+    handler.wfile.write(body)
+
+
+def _not_found(what: str) -> tuple:
+    return 404, {"error": {"message": f"Nicht gefunden: {what}", "type": "invalid_request_error"}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lokaler Stub der OpenAI Batch API")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--polls", type=int, default=2, help="Abfragen bis ein Batch fertig ist")
+    args = parser.parse_args()
+
+    stub = BatchAPIStub(polls_until_complete=args.polls).start(args.port)
+    print(f"Batch API Stub läuft: OPENAI_BASE_URL={stub.base_url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
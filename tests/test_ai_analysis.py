@@ -0,0 +1,95 @@
+"""Fehlerbehandlung der Einzelanalyse: Fallback nur für unbrauchbare Antworten, sonst Retry über den Worker"""
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from openai import APIConnectionError, InternalServerError, RateLimitError
+
+from ai import ClothingAI
+from rate_limiter import RateLimitedError
+from retry_policy import classify_error, ERROR_RATE_LIMIT, ERROR_TRANSIENT
+
+REQUEST = httpx.Request('POST', 'https://api.openai.local/v1/chat/completions')
+
+
+class FakeRawResponse:
+    """with_raw_response-Ergebnis mit festem Antworttext"""
+
+    def __init__(self, content: str):
+        self.headers = httpx.Headers()
+        self.content = content
+
+    def parse(self):
+        message = SimpleNamespace(content=self.content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+class FakeAsyncClient:
+    """AsyncOpenAI-Ersatz: jeder Request liefert `outcome` (Exception wird geworfen)"""
+
+    def __init__(self, outcome):
+        self.outcome = outcome
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(with_raw_response=self))
+
+    async def create(self, **request):
+        self.calls += 1
+        if isinstance(self.outcome, Exception):
+            raise self.outcome
+        return self.outcome
+
+
+def status_error(error_class, status_code: int):
+    response = httpx.Response(status_code, request=REQUEST)
+    return error_class("OpenAI-Fehler", response=response, body=None)
+
+
+@pytest.fixture
+def make_ai(monkeypatch):
+    def make(outcome, max_attempts='1'):
+        monkeypatch.setenv('OPENAI_MAX_ATTEMPTS', max_attempts)
+        ai = ClothingAI(api_key='test')
+        ai.async_client = FakeAsyncClient(outcome)
+        return ai
+    return make
+
+
+@pytest.mark.parametrize('error', [
+    APIConnectionError(request=REQUEST),
+    status_error(InternalServerError, 503)
+], ids=['connection', '5xx'])
+def test_transient_errors_are_raised(make_ai, error):
+    ai = make_ai(error)
+
+    with pytest.raises(type(error)) as raised:
+        ai.analyze_clothing_image(b'image')
+
+    assert classify_error(raised.value) == ERROR_TRANSIENT
+
+
+def test_rate_limit_is_raised_for_retry(make_ai):
+    ai = make_ai(status_error(RateLimitError, 429))
+
+    with pytest.raises(RateLimitedError) as raised:
+        ai.analyze_clothing_image(b'image')
+
+    assert classify_error(raised.value) == ERROR_RATE_LIMIT
+
+
+def test_unparseable_answer_uses_fallback(make_ai):
+    ai = make_ai(FakeRawResponse('kein JSON'))
+
+    result = ai.analyze_clothing_image(b'image')
+
+    assert result == ai._get_fallback_result()
+    assert ai.async_client.calls == len(ai.cascade)
+
+
+def test_max_attempts_is_at_least_one(make_ai):
+    ai = make_ai(APIConnectionError(request=REQUEST), max_attempts='0')
+
+    with pytest.raises(APIConnectionError):
+        ai.analyze_clothing_image(b'image')
+
+    assert ai.max_attempts == 1
+    assert ai.async_client.calls == 1
@@ -0,0 +1,128 @@
+"""Backfill gegen den lokalen Batch-API-Stub: prepare → submit → poll → apply, inkl. Fortsetzung aus state.json"""
+import json
+
+import pytest
+from openai import BadRequestError
+
+from ai import ClothingAI
+from backfill import Backfill, CHUNK_APPLIED, CHUNK_SUBMITTED, CHUNK_UPLOADED
+from batch_api_stub import BatchAPIStub
+
+
+class FakeDatabase:
+    """Die beiden DatabaseManager-Methoden, die der Backfill nutzt (clothes Tabelle im Speicher)"""
+
+    def __init__(self, count: int):
+        self.rows = {
+            f"{i:08d}-0000-0000-0000-000000000000": {'image_url': f"https://storage.local/{i}.jpg"}
+            for i in range(count)
+        }
+        self.updates = {}
+
+    def get_clothing_items_page(self, after_id=None, limit=1000, status=None):
+        ids = sorted(clothing_id for clothing_id in self.rows if after_id is None or clothing_id > after_id)
+        return [{'id': clothing_id, **self.rows[clothing_id]} for clothing_id in ids[:limit]]
+
+    def bulk_update_clothing_analysis(self, analyses, chunk_size=500):
+        existing = {clothing_id: analysis for clothing_id, analysis in analyses.items() if clothing_id in self.rows}
+        self.updates.update(existing)
+        return len(existing)
+
+
+@pytest.fixture
+def stub():
+    stub = BatchAPIStub(polls_until_complete=2).start()
+    yield stub
+    stub.stop()
+
+
+@pytest.fixture
+def ai(stub, monkeypatch):
+    monkeypatch.setenv('OPENAI_BASE_URL', stub.base_url)
+    return ClothingAI(api_key='test')
+
+
+def make_backfill(db, ai, work_dir):
+    return Backfill(db, ai, str(work_dir), chunk_size=4, page_size=3, max_active=2)
+
+
+def test_full_run(stub, ai, tmp_path):
+    db = FakeDatabase(10)
+
+    make_backfill(db, ai, tmp_path).run(poll_interval=0)
+
+    state = json.loads((tmp_path / 'state.json').read_text())
+    assert [chunk['count'] for chunk in state['chunks']] == [4, 4, 2]
+    assert all(chunk['status'] == CHUNK_APPLIED for chunk in state['chunks'])
+    assert state['prepared_all'] is True
+    assert set(db.updates) == set(db.rows)
+    assert db.updates[next(iter(db.rows))] == {
+        'category': 'Hose', 'color': 'blau', 'style': 'casual', 'season': 'Ganzjährig',
+        'occasion': 'Alltag', 'material': 'Denim', 'confidence': 0.9
+    }
+    assert len(stub.batches) == 3
+
+
+def test_resume_from_state_after_interruption(stub, ai, tmp_path):
+    db = FakeDatabase(10)
+
+    # Erster Lauf: vorbereitet, erster Batch gestartet, zweiter bricht nach dem Upload ab
+    first = make_backfill(db, ai, tmp_path)
+    assert first.prepare(limit=8) == 8
+    stub.fail_batch_creates = 1
+    with pytest.raises(BadRequestError):
+        first.submit()
+    statuses = [chunk['status'] for chunk in json.loads((tmp_path / 'state.json').read_text())['chunks']]
+    assert statuses == [CHUNK_UPLOADED, 'prepared']
+    uploads = len(stub.files)
+
+    # Neuer Prozess mit demselben Arbeitsverzeichnis: kein erneuter Upload, Cursor bleibt erhalten
+    resumed = make_backfill(db, ai, tmp_path)
+    assert resumed.submit() == 2
+    assert len(stub.files) == uploads + 1
+    assert [chunk['status'] for chunk in resumed.state.chunks] == [CHUNK_SUBMITTED, CHUNK_SUBMITTED]
+
+    assert resumed.poll() == 0      # Stub: erst die zweite Abfrage liefert "completed"
+    assert resumed.poll() == 2
+    assert resumed.apply() == 8
+
+    # Restliche Zeilen ab dem gespeicherten Cursor, bereits angewendete Chunks bleiben unberührt
+    again = make_backfill(db, ai, tmp_path)
+    again.run(poll_interval=0)
+    assert [chunk['count'] for chunk in again.state.chunks] == [4, 4, 2]
+    assert set(db.updates) == set(db.rows)
+    assert len(stub.batches) == 3
+
+
+def test_invalid_results_are_counted_as_errors(stub, ai, tmp_path):
+    db = FakeDatabase(4)
+    broken = sorted(db.rows)[:2]
+    stub.responder = lambda custom_id, body: (
+        None if custom_id == broken[0] else "kein JSON" if custom_id == broken[1]
+        else json.dumps({'category': 'hose', 'color': 'BLAU', 'confidence': '80%'})
+    )
+
+    backfill = make_backfill(db, ai, tmp_path)
+    backfill.run(poll_interval=0)
+
+    chunk = backfill.state.chunks[0]
+    assert chunk['applied'] == 2 and chunk['errors'] == 2
+    assert set(db.updates) == set(sorted(db.rows)[2:])
+    # Normalisierung über die Taxonomie (Synonyme, Prozent-Confidence, Standardwerte)
+    assert db.updates[sorted(db.rows)[2]]['category'] == 'Hose'
+    assert db.updates[sorted(db.rows)[2]]['color'] == 'blau'
+    assert db.updates[sorted(db.rows)[2]]['confidence'] == 0.8
+
+
+def test_rows_deleted_before_apply_are_not_recreated(stub, ai, tmp_path):
+    db = FakeDatabase(4)
+    backfill = make_backfill(db, ai, tmp_path)
+    backfill.prepare()
+    backfill.submit()
+    deleted = sorted(db.rows)[0]
+    del db.rows[deleted]
+
+    backfill.run(poll_interval=0)
+
+    assert deleted not in db.updates
+    assert backfill.state.chunks[0]['applied'] == 3
@@ -0,0 +1,102 @@
+"""Fair Scheduling im List-Backend: Lua-Skripte gegen fakeredis (mit Lua-Unterstützung)"""
+import json
+import time
+
+import fakeredis
+import pytest
+
+import queue_manager
+from queue_manager import QueueManager
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    server = fakeredis.FakeServer()
+
+    def fake_redis(connection_pool=None, **kwargs):
+        decode = connection_pool.connection_kwargs.get('decode_responses', False)
+        return fakeredis.FakeRedis(server=server, decode_responses=decode)
+
+    monkeypatch.setattr(queue_manager.redis, 'Redis', fake_redis)
+    queue = QueueManager(backend='list')
+    queue.register_worker('worker-1')
+    return queue
+
+
+def enqueue(queue, clothing_id, user_id, priority=0):
+    assert queue.add_clothing_processing_job(clothing_id, user_id, f"{user_id}/{clothing_id}.jpg",
+                                             f"{clothing_id}.jpg", 'image/jpeg', priority=priority)
+
+
+def drain(queue):
+    order = []
+    while (claimed := queue.claim_job('worker-1', timeout=0.1)) is not None:
+        receipt, job_data = claimed
+        order.append(job_data['clothing_id'])
+        queue.ack_job('worker-1', receipt, job_data['clothing_id'])
+    return order
+
+
+def test_users_alternate_within_a_level(queue):
+    for number in range(3):
+        enqueue(queue, f"a{number}", 'user-a')
+    enqueue(queue, 'b0', 'user-b')
+    enqueue(queue, 'b1', 'user-b')
+
+    assert drain(queue) == ['a0', 'b0', 'a1', 'b1', 'a2']
+
+
+def test_higher_priority_is_claimed_first(queue):
+    enqueue(queue, 'normal', 'user-a')
+    enqueue(queue, 'urgent', 'user-b', priority=2)
+    enqueue(queue, 'high', 'user-c', priority=1)
+
+    assert drain(queue) == ['urgent', 'high', 'normal']
+
+
+def test_priority_is_clamped_to_levels(queue):
+    enqueue(queue, 'normal', 'user-a')
+    enqueue(queue, 'too-high', 'user-b', priority=99)
+
+    assert drain(queue) == ['too-high', 'normal']
+    assert queue.get_queue_stats()['total_pending'] == 0
+
+
+def test_waiting_level_is_promoted_by_aging(queue):
+    enqueue(queue, 'old-normal', 'user-a')
+    enqueue(queue, 'fresh-urgent', 'user-b', priority=2)
+    # Stufe 0 wurde vor 3.5 Aging-Intervallen zuletzt bedient → effektiv über Stufe 2
+    queue.redis_client.hset(queue.fair_served_key, 0, time.time() - 3.5 * queue.priority_aging)
+
+    assert drain(queue) == ['old-normal', 'fresh-urgent']
+
+
+def test_legacy_main_queue_is_claimed_first_without_starving(queue):
+    enqueue(queue, 'fair', 'user-a')
+    for number in range(2):
+        queue.redis_client.rpush(queue.queue_name, json.dumps({'clothing_id': f"legacy{number}", 'user_id': 'user-b'}))
+
+    # Endliche Haupt-Queue (Reaper/Legacy) hat Vorrang, danach geht es mit den Fair-Queues weiter
+    assert drain(queue) == ['legacy0', 'legacy1', 'fair']
+
+
+def test_enqueue_wakes_blocked_worker(queue):
+    enqueue(queue, 'a0', 'user-a')
+    enqueue(queue, 'b0', 'user-b')
+
+    assert queue.redis_client.llen(queue.signal_key) == 2
+    assert queue.claim_job('worker-1', timeout=0.1)[1]['clothing_id'] == 'a0'
+
+
+def test_promoted_retries_signal_idle_workers(queue):
+    for number in range(3):
+        queue.schedule_retry({'clothing_id': f"r{number}", 'user_id': 'user-a', 'retry_count': 1}, -1)
+    queue.schedule_retry({'clothing_id': 'later', 'user_id': 'user-a', 'retry_count': 1}, 600)
+
+    assert queue.promote_due_jobs() == 3
+    assert queue.redis_client.llen(queue.signal_key) == 3
+    # Jeder wartende Worker wird per BLPOP geweckt und findet einen Job
+    for number in range(3):
+        assert queue.redis_client.blpop(queue.signal_key, timeout=1)
+        assert queue.claim_job('worker-1', timeout=0.1)[1]['clothing_id'] == f"r{number}"
+    assert queue.claim_job('worker-1', timeout=0.1) is None
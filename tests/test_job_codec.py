@@ -0,0 +1,111 @@
+"""Job-Umschlag: Roundtrip pro Kompression, Legacy-JSON über den MAGIC-Präfix, positionelle FIELDS_V1"""
+import json
+
+import msgpack
+import pytest
+
+import job_codec
+from job_codec import (
+    JobCodec, MAGIC, ENVELOPE_VERSION, FIELDS_V1, COMPRESSION_NONE, COMPRESSION_ZSTD, COMPRESSION_LZ4
+)
+
+JOB = {
+    'clothing_id': '6f1c2a8e-0000-4000-8000-000000000001',
+    'user_id': '9b2d4f10-0000-4000-8000-000000000002',
+    'storage_bucket': 'clothing-images-original',
+    'storage_path': '9b2d4f10-0000-4000-8000-000000000002/original.jpg',
+    'file_name': 'jeans.jpg',
+    'content_type': 'image/jpeg',
+    'file_size': 48123,
+    'created_at': '2026-01-02T03:04:05.678901',
+    'retry_count': 2,
+    'priority': 1,
+    'retry_due_at': '2026-01-02T03:05:00',
+    'last_error': 'Timeout'
+}
+
+
+@pytest.mark.parametrize('compression, expected', [
+    ('none', COMPRESSION_NONE),
+    ('zstd', COMPRESSION_ZSTD),
+    ('lz4', COMPRESSION_LZ4),
+])
+def test_roundtrip_per_compression(compression, expected):
+    if compression == 'lz4' and job_codec.lz4_frame is None:
+        pytest.skip("lz4 nicht installiert")
+    codec = JobCodec(job_format='msgpack', compression=compression, compression_threshold=1)
+    job = {**JOB, 'file_content': bytes(range(256)) * 8}
+
+    raw = codec.encode(job)
+
+    assert raw.startswith(MAGIC)
+    assert raw[len(MAGIC)] == ENVELOPE_VERSION and raw[len(MAGIC) + 1] == expected
+    assert codec.decode(raw) == job
+
+
+def test_small_payloads_stay_uncompressed():
+    codec = JobCodec(job_format='msgpack', compression='zstd', compression_threshold=10_000)
+
+    raw = codec.encode(JOB)
+
+    assert raw[len(MAGIC) + 1] == COMPRESSION_NONE
+    assert codec.decode(raw) == JOB
+
+
+def test_any_reader_decodes_any_compression():
+    writer = JobCodec(job_format='msgpack', compression='zstd', compression_threshold=1)
+    reader = JobCodec(job_format='json', compression='none')
+
+    assert reader.decode(writer.encode(JOB)) == JOB
+
+
+@pytest.mark.parametrize('raw', [json.dumps(JOB), json.dumps(JOB).encode()], ids=['str', 'bytes'])
+def test_legacy_json_is_routed_by_missing_magic(raw):
+    assert JobCodec(job_format='msgpack').decode(raw) == JOB
+
+
+def test_json_writer_stays_readable_for_old_workers():
+    raw = JobCodec(job_format='json').encode(JOB)
+
+    assert isinstance(raw, str) and json.loads(raw) == JOB
+
+
+def test_magic_cannot_start_json_or_utf8():
+    with pytest.raises(UnicodeDecodeError):
+        MAGIC.decode('utf-8')
+
+
+def test_unknown_envelope_version_is_rejected():
+    raw = JobCodec(job_format='msgpack', compression='none').encode(JOB)
+
+    with pytest.raises(ValueError):
+        JobCodec().decode(MAGIC + bytes((ENVELOPE_VERSION + 1,)) + raw[len(MAGIC) + 1:])
+
+
+def test_fields_v1_order_is_frozen():
+    # Positionen sind Teil des Formats: neue Felder nur anhängen bzw. als Extras, nie umsortieren
+    assert FIELDS_V1 == (
+        'clothing_id', 'user_id', 'storage_bucket', 'storage_path', 'file_name',
+        'content_type', 'file_size', 'created_at', 'retry_count', 'priority'
+    )
+
+
+def test_positional_v1_payload_written_by_hand_decodes():
+    values = ['c-1', 'u-1', 'bucket', 'u-1/a.jpg', 'a.jpg', 'image/png', 10, None, 0, 0]
+    payload = msgpack.packb([values, {'content_hash': 'abc'}], use_bin_type=True)
+
+    job = JobCodec().decode(MAGIC + bytes((ENVELOPE_VERSION, COMPRESSION_NONE)) + payload)
+
+    assert job == {
+        'clothing_id': 'c-1', 'user_id': 'u-1', 'storage_bucket': 'bucket', 'storage_path': 'u-1/a.jpg',
+        'file_name': 'a.jpg', 'content_type': 'image/png', 'file_size': 10, 'retry_count': 0, 'priority': 0,
+        'content_hash': 'abc'
+    }
+
+
+def test_shorter_positional_list_from_older_writer_decodes():
+    payload = msgpack.packb([['c-1', 'u-1', 'bucket', 'u-1/a.jpg'], {}], use_bin_type=True)
+
+    job = JobCodec().decode(MAGIC + bytes((ENVELOPE_VERSION, COMPRESSION_NONE)) + payload)
+
+    assert job == {'clothing_id': 'c-1', 'user_id': 'u-1', 'storage_bucket': 'bucket', 'storage_path': 'u-1/a.jpg'}
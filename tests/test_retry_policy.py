@@ -0,0 +1,143 @@
+"""Retry-Policy: Fehlerklassen, Backoff mit Full Jitter und retry-after beim Einplanen"""
+import random
+
+import pytest
+from PIL import UnidentifiedImageError
+
+from rate_limiter import RateLimitedError
+from retry_policy import RetryPolicy, classify_error, ERROR_PERMANENT, ERROR_RATE_LIMIT, ERROR_TRANSIENT
+from worker import ClothingProcessor
+
+
+class StatusError(Exception):
+    """HTTP-Fehler mit Statuscode als Attribut (wie OpenAI/httpx)"""
+
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class CodeError(Exception):
+    """PostgREST-Fehler mit Statuscode als String in `code`"""
+
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
+
+
+class ResponseError(Exception):
+    """Fehler mit Statuscode nur an der Response"""
+
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.response = type('Response', (), {'status_code': status_code})()
+
+
+class RateLimitError(Exception):
+    """Erkennung über den Klassennamen (SDK-Fehler ohne Statuscode)"""
+
+
+class FakeQueue:
+    def __init__(self):
+        self.scheduled = []
+
+    def schedule_retry(self, job_data, delay):
+        self.scheduled.append((dict(job_data), delay))
+
+
+class FakeStatusEvents:
+    def publish(self, *args, **kwargs):
+        pass
+
+
+@pytest.mark.parametrize('error, expected', [
+    (StatusError(429), ERROR_RATE_LIMIT),
+    (CodeError('429'), ERROR_RATE_LIMIT),
+    (ResponseError(429), ERROR_RATE_LIMIT),
+    (RateLimitError("quota"), ERROR_RATE_LIMIT),
+    (RateLimitedError("Token-Budget erschöpft", 10), ERROR_RATE_LIMIT),
+    (StatusError(400), ERROR_PERMANENT),
+    (StatusError(401), ERROR_PERMANENT),
+    (StatusError(404), ERROR_PERMANENT),
+    (CodeError('413'), ERROR_PERMANENT),
+    (ResponseError(422), ERROR_PERMANENT),
+    (StatusError(408), ERROR_TRANSIENT),
+    (StatusError(409), ERROR_TRANSIENT),
+    (StatusError(500), ERROR_TRANSIENT),
+    (ResponseError(503), ERROR_TRANSIENT),
+    (ValueError("ungültig"), ERROR_PERMANENT),
+    (KeyError('category'), ERROR_PERMANENT),
+    (TypeError("None"), ERROR_PERMANENT),
+    (UnidentifiedImageError("kein Bild"), ERROR_PERMANENT),
+    (ConnectionError("reset"), ERROR_TRANSIENT),
+    (TimeoutError(), ERROR_TRANSIENT),
+    (CodeError('PGRST301'), ERROR_TRANSIENT),
+])
+def test_classify_error(error, expected):
+    assert classify_error(error) == expected
+
+
+@pytest.mark.parametrize('retry_count', range(10))
+def test_backoff_stays_below_cap(retry_count):
+    random.seed(retry_count)
+    policy = RetryPolicy(max_retries=10, base_delay=5, max_delay=300)
+    ceiling = min(300, 5 * 2 ** retry_count)
+
+    delays = [policy.backoff(retry_count) for _ in range(500)]
+
+    assert all(0 <= delay <= ceiling for delay in delays)
+    # Full Jitter, aber nie sofort: Untergrenze base_delay/2
+    assert min(delays) >= 2.5
+
+
+def test_backoff_is_jittered():
+    random.seed(1)
+    policy = RetryPolicy(max_retries=10, base_delay=5, max_delay=300)
+
+    delays = [policy.backoff(6) for _ in range(500)]
+
+    assert max(delays) > 150 > min(delays)
+
+
+@pytest.fixture
+def processor():
+    processor = ClothingProcessor.__new__(ClothingProcessor)
+    processor.queue = FakeQueue()
+    processor.status_events = FakeStatusEvents()
+    processor.retry_policies = {
+        ERROR_TRANSIENT: RetryPolicy(max_retries=3, base_delay=5, max_delay=300),
+        ERROR_RATE_LIMIT: RetryPolicy(max_retries=6, base_delay=30, max_delay=900),
+        ERROR_PERMANENT: RetryPolicy(max_retries=0),
+    }
+    return processor
+
+
+def failed_job(**fields):
+    return {'clothing_id': 'clothing-1', 'user_id': 'user-1', 'last_error': 'Fehler', **fields}
+
+
+def test_retry_after_is_honoured(processor):
+    assert processor.handle_failed_job(failed_job(error_class=ERROR_RATE_LIMIT, retry_after=1200))
+
+    job, delay = processor.queue.scheduled[0]
+    assert delay == 1200
+    assert job['retry_count'] == 1
+    # retry-after gilt nur für diesen Versuch
+    assert 'retry_after' not in job
+
+
+def test_backoff_wins_over_short_retry_after(processor):
+    processor.handle_failed_job(failed_job(error_class=ERROR_RATE_LIMIT, retry_after=1))
+
+    _, delay = processor.queue.scheduled[0]
+    assert 15 <= delay <= 30
+
+
+def test_permanent_error_is_not_retried(processor, monkeypatch):
+    failed = []
+    monkeypatch.setattr(processor, 'mark_job_failed', failed.append)
+
+    assert not processor.handle_failed_job(failed_job(error_class=ERROR_PERMANENT))
+
+    assert not processor.queue.scheduled
+    assert failed[0]['clothing_id'] == 'clothing-1'
@@ -0,0 +1,277 @@
+"""Direkt-Upload: /upload-clothing/signed-url und /upload-clothing/{id}/finalize"""
+import uuid
+import logging
+
+import jwt
+import pytest
+from fastapi.testclient import TestClient
+from postgrest.exceptions import APIError
+
+import main
+from database_manager import ProcessingStatus
+from storage_manager import StorageManager
+
+ORIGINAL_BUCKET = 'clothing-images-original'
+
+
+def auth_headers(user_id: str = 'user-1') -> dict:
+    return {'Authorization': 'Bearer ' + jwt.encode({'sub': user_id}, 'test')}
+
+
+class FakeBucket:
+    """Supabase Storage Bucket (nur die Aufrufe des StorageManagers beim Direkt-Upload)"""
+
+    def __init__(self, objects: dict):
+        self.objects = objects
+
+    async def create_signed_upload_url(self, path):
+        return {'signed_url': f"http://storage.local/upload/sign/{path}?token=t", 'token': 't', 'path': path}
+
+    async def get_public_url(self, path):
+        return f"http://storage.local/storage/v1/object/public/{ORIGINAL_BUCKET}/{path}"
+
+    async def list(self, folder, options):
+        return [
+            {'name': path.rpartition('/')[2], 'metadata': metadata}
+            for path, metadata in self.objects.items()
+            if path.rpartition('/')[0] == folder and path.rpartition('/')[2].startswith(options['search'])
+        ]
+
+    async def remove(self, paths):
+        for path in paths:
+            self.objects.pop(path, None)
+
+
+class FakeStorageClient:
+    def __init__(self, objects: dict):
+        self.storage = self
+        self.objects = objects
+
+    def from_(self, bucket_name):
+        return FakeBucket(self.objects)
+
+
+class FakeDatabase:
+    """clothes Tabelle im Speicher mit den bedingten Updates des DatabaseManagers"""
+
+    def __init__(self):
+        self.rows = {}
+
+    async def create_pending_clothing_item_async(self, user_id, original_image_url, original_filename=None,
+                                                 content_hash=None, status=ProcessingStatus.PENDING):
+        if content_hash and any(row['user_id'] == user_id and row.get('content_hash') == content_hash
+                                for row in self.rows.values()):
+            raise APIError({'code': '23505', 'message': 'duplicate key value violates unique constraint'})
+        clothing_id = str(uuid.uuid4())
+        self.rows[clothing_id] = {
+            'id': clothing_id, 'user_id': user_id, 'image_url': original_image_url,
+            'original_filename': original_filename, 'content_hash': content_hash,
+            'processing_status': status.value, 'created_at': '2026-01-01T00:00:00'
+        }
+        return self.rows[clothing_id]
+
+    async def find_clothing_item_by_hash_async(self, user_id, content_hash):
+        return next((row for row in self.rows.values()
+                     if row['user_id'] == user_id and row.get('content_hash') == content_hash), None)
+
+    async def get_clothing_item_async(self, clothing_id):
+        return self.rows.get(clothing_id)
+
+    async def finalize_upload_async(self, clothing_id):
+        return self._transition(clothing_id, ProcessingStatus.UPLOADING, ProcessingStatus.PENDING)
+
+    async def reset_failed_clothing_item_async(self, clothing_id):
+        return self._transition(clothing_id, ProcessingStatus.FAILED, ProcessingStatus.PENDING)
+
+    async def mark_processing_failed_async(self, clothing_id, error_message):
+        self.rows[clothing_id].update(processing_status=ProcessingStatus.FAILED.value, processing_error=error_message)
+
+    def _transition(self, clothing_id, expected, status):
+        row = self.rows.get(clothing_id)
+        if not row or row['processing_status'] != expected.value:
+            return None
+        row['processing_status'] = status.value
+        return row
+
+
+class FakeQueue:
+    def __init__(self):
+        self.jobs = []
+        self.tracked = set()
+
+    async def add_clothing_processing_job_async(self, **job):
+        self.jobs.append(job)
+        self.tracked.add(job['clothing_id'])
+        return True
+
+    async def is_tracked_async(self, clothing_id):
+        return clothing_id in self.tracked
+
+
+@pytest.fixture
+def objects():
+    return {}
+
+
+@pytest.fixture
+def db():
+    return FakeDatabase()
+
+
+@pytest.fixture
+def queue():
+    return FakeQueue()
+
+
+@pytest.fixture
+def client(objects, db, queue):
+    storage = StorageManager.__new__(StorageManager)
+    storage.logger = logging.getLogger('storage_manager')
+    storage.async_client = FakeStorageClient(objects)
+    storage.original_bucket = ORIGINAL_BUCKET
+
+    main.app.dependency_overrides = {
+        main.get_storage_manager: lambda: storage,
+        main.get_database_manager: lambda: db,
+        main.get_queue_manager: lambda: queue
+    }
+    yield TestClient(main.app)
+    main.app.dependency_overrides = {}
+
+
+def request_upload(client, user_id='user-1', content_type='image/png', file_size=50000, content_hash=None):
+    body = {'content_type': content_type, 'file_size': file_size}
+    if content_hash:
+        body['content_hash'] = content_hash
+    return client.post('/upload-clothing/signed-url', json=body, headers=auth_headers(user_id))
+
+
+def finalize(client, clothing_id, user_id='user-1'):
+    return client.post(f"/upload-clothing/{clothing_id}/finalize", headers=auth_headers(user_id))
+
+
+def test_signed_url_creates_uploading_row(client, db):
+    response = request_upload(client)
+
+    assert response.status_code == 200
+    upload = response.json()
+    assert upload['status'] == ProcessingStatus.UPLOADING.value
+    assert upload['path'].startswith('user-1/') and upload['path'] in upload['upload_url']
+    assert db.rows[upload['id']]['processing_status'] == ProcessingStatus.UPLOADING.value
+
+
+def test_signed_url_rejects_announced_type(client, db):
+    assert request_upload(client, content_type='text/plain').status_code == 400
+    assert not db.rows
+
+
+def test_finalize_without_object_is_conflict(client, db, queue):
+    upload = request_upload(client).json()
+
+    response = finalize(client, upload['id'])
+
+    assert response.status_code == 409
+    assert db.rows[upload['id']]['processing_status'] == ProcessingStatus.UPLOADING.value
+    assert not queue.jobs
+
+
+def test_finalize_enqueues_with_stored_metadata(client, objects, db, queue):
+    upload = request_upload(client).json()
+    objects[upload['path']] = {'size': 48123, 'mimetype': 'image/png'}
+
+    response = finalize(client, upload['id'])
+
+    assert response.status_code == 200
+    assert db.rows[upload['id']]['processing_status'] == ProcessingStatus.PENDING.value
+    assert len(queue.jobs) == 1
+    assert queue.jobs[0]['file_size'] == 48123
+    assert queue.jobs[0]['storage_path'] == upload['path']
+
+
+@pytest.mark.parametrize('metadata', [
+    {'size': 50000, 'mimetype': 'application/pdf'},
+    {'size': 50 * 1024 * 1024, 'mimetype': 'image/png'}
+], ids=['type', 'size'])
+def test_finalize_rejects_mismatching_object(client, objects, db, queue, metadata):
+    upload = request_upload(client).json()
+    objects[upload['path']] = metadata
+
+    response = finalize(client, upload['id'])
+
+    assert response.status_code == 400
+    assert upload['path'] not in objects
+    assert db.rows[upload['id']]['processing_status'] == ProcessingStatus.FAILED.value
+    assert not queue.jobs
+
+
+def test_double_finalize_enqueues_once(client, objects, queue):
+    upload = request_upload(client).json()
+    objects[upload['path']] = {'size': 50000, 'mimetype': 'image/png'}
+
+    first = finalize(client, upload['id'])
+    second = finalize(client, upload['id'])
+
+    assert first.status_code == second.status_code == 200
+    assert second.json()['message'] == "Upload bereits abgeschlossen."
+    assert len(queue.jobs) == 1
+
+
+def test_finalize_foreign_item_is_forbidden(client, objects, queue):
+    upload = request_upload(client).json()
+    objects[upload['path']] = {'size': 50000, 'mimetype': 'image/png'}
+
+    assert finalize(client, upload['id'], user_id='user-2').status_code == 403
+    assert not queue.jobs
+
+
+def test_duplicate_of_unfinished_upload_reuses_path(client, db):
+    upload = request_upload(client, content_hash='abc').json()
+
+    retry = request_upload(client, content_hash='abc').json()
+
+    assert retry['duplicate'] is True
+    assert retry['id'] == upload['id'] and retry['path'] == upload['path']
+    assert retry['upload_url']
+    assert len(db.rows) == 1
+
+
+def test_failed_duplicate_is_reenqueued_with_stored_metadata(client, objects, db, queue):
+    upload = request_upload(client, content_hash='abc').json()
+    objects[upload['path']] = {'size': 48123, 'mimetype': 'image/png'}
+    finalize(client, upload['id'])
+    db.rows[upload['id']]['processing_status'] = ProcessingStatus.FAILED.value
+    queue.jobs.clear()
+    queue.tracked.clear()
+
+    retry = request_upload(client, content_hash='abc').json()
+
+    assert retry['duplicate'] is True and retry['status'] == ProcessingStatus.PENDING.value
+    assert retry['upload_url'] is None
+    assert len(queue.jobs) == 1
+    assert queue.jobs[0]['file_size'] == 48123
+    assert queue.jobs[0]['content_type'] == 'image/png'
+    assert queue.jobs[0]['content_hash'] == 'abc'
+
+
+def test_failed_duplicate_with_pending_retry_is_not_reenqueued(client, objects, db, queue):
+    upload = request_upload(client, content_hash='abc').json()
+    objects[upload['path']] = {'size': 50000, 'mimetype': 'image/png'}
+    finalize(client, upload['id'])
+    db.rows[upload['id']]['processing_status'] = ProcessingStatus.FAILED.value
+    queue.jobs.clear()
+
+    retry = request_upload(client, content_hash='abc').json()
+
+    assert retry['status'] == ProcessingStatus.FAILED.value
+    assert not queue.jobs
+
+
+def test_failed_duplicate_without_object_stays_failed(client, db, queue):
+    upload = request_upload(client, content_hash='abc').json()
+    db.rows[upload['id']]['processing_status'] = ProcessingStatus.FAILED.value
+
+    retry = request_upload(client, content_hash='abc').json()
+
+    assert retry['status'] == ProcessingStatus.FAILED.value
+    assert db.rows[upload['id']]['processing_status'] == ProcessingStatus.FAILED.value
+    assert not queue.jobs
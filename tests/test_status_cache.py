@@ -0,0 +1,145 @@
+"""Status-Cache für GET /clothing/{id}/status: ETags, 304 und unvollständige Einträge"""
+import json
+
+import fakeredis
+import jwt
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from status_cache import StatusCache, etag_matches, status_record
+
+ITEM = {
+    'id': 'clothing-1', 'user_id': 'user-1', 'processing_status': 'completed', 'category': 'T-Shirt',
+    'color': 'blau', 'ai_confidence': 0.9, 'updated_at': '2026-01-01T12:00:00+00:00', 'content_hash': 'abc'
+}
+
+
+def auth_headers(user_id: str = 'user-1') -> dict:
+    return {'Authorization': 'Bearer ' + jwt.encode({'sub': user_id}, 'test')}
+
+
+class FakeDatabase:
+    """Nur der DB-Fallback des Status-Endpoints"""
+
+    def __init__(self, rows: dict):
+        self.rows = rows
+        self.reads = 0
+
+    async def get_clothing_item_async(self, clothing_id):
+        self.reads += 1
+        return self.rows.get(clothing_id)
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def cache(server):
+    return StatusCache(fakeredis.FakeRedis(server=server))
+
+
+@pytest.fixture
+def db():
+    return FakeDatabase({ITEM['id']: dict(ITEM)})
+
+
+@pytest.fixture
+def client(server, cache, db):
+    def status_cache():
+        # TestClient nutzt pro Request einen eigenen Event Loop: async Client je Request neu
+        cache.async_redis_client = fakeredis.aioredis.FakeRedis(server=server)
+        return cache
+
+    main.app.dependency_overrides = {
+        main.get_status_cache: status_cache,
+        main.get_database_manager: lambda: db
+    }
+    yield TestClient(main.app)
+    main.app.dependency_overrides = {}
+
+
+def get_status(client, if_none_match=None, user_id='user-1'):
+    headers = auth_headers(user_id)
+    if if_none_match:
+        headers['If-None-Match'] = if_none_match
+    return client.get(f"/clothing/{ITEM['id']}/status", headers=headers)
+
+
+@pytest.mark.parametrize('if_none_match, expected', [
+    (None, False),
+    ('', False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"xyz", "abc"', True),
+    ('*', True),
+    ('"xyz"', False),
+    ('abc', False),
+])
+def test_etag_matches(if_none_match, expected):
+    assert etag_matches(if_none_match, '"abc"') is expected
+
+
+def test_etag_changes_with_status():
+    processing = status_record({**ITEM, 'processing_status': 'processing'})
+
+    assert status_record(dict(ITEM))['etag'] == status_record(dict(ITEM))['etag']
+    assert status_record(dict(ITEM))['etag'] != processing['etag']
+
+
+def test_miss_reads_db_then_serves_from_cache(client, db):
+    first = get_status(client)
+    second = get_status(client)
+
+    assert first.status_code == second.status_code == 200
+    assert first.json()['status'] == 'completed' and first.json()['confidence'] == 0.9
+    assert first.headers['etag'] == second.headers['etag']
+    assert db.reads == 1
+
+
+def test_unchanged_status_is_not_modified(client):
+    etag = get_status(client).headers['etag']
+
+    response = get_status(client, if_none_match=etag)
+
+    assert response.status_code == 304
+    assert response.content == b''
+    assert response.headers['etag'] == etag
+
+
+def test_changed_status_returns_body(client, cache):
+    etag = get_status(client).headers['etag']
+    cache.put({**ITEM, 'processing_status': 'failed', 'processing_error': 'Kaputt'})
+
+    response = get_status(client, if_none_match=etag)
+
+    assert response.status_code == 200
+    assert response.json()['status'] == 'failed'
+    assert response.headers['etag'] != etag
+
+
+def test_foreign_item_is_forbidden(client):
+    assert get_status(client, user_id='user-2').status_code == 403
+
+
+def test_entry_without_updated_at_is_a_miss(client, cache, server, db):
+    partial = {key: value for key, value in status_record(dict(ITEM)).items() if key != 'updated_at'}
+    fakeredis.FakeRedis(server=server).set(cache._entry_key(ITEM['id']), json.dumps(partial))
+
+    response = get_status(client)
+
+    assert response.status_code == 200
+    assert response.json()['updated_at'] == ITEM['updated_at']
+    assert db.reads == 1
+
+
+def test_partial_update_drops_cached_entry(client, cache, db):
+    get_status(client)
+    cache.put({'id': ITEM['id'], 'processing_status': 'processing'})
+
+    response = get_status(client)
+
+    assert response.status_code == 200
+    assert db.reads == 2
@@ -0,0 +1,66 @@
+"""Flottenweites Token-Budget: Reserve-/Reconcile-Lua-Skripte und Lane-Anteile gegen fakeredis"""
+import asyncio
+
+import fakeredis
+import pytest
+
+from rate_limiter import RateLimitedError
+from token_budget import TokenBudget
+
+
+@pytest.fixture
+def budget(monkeypatch):
+    monkeypatch.setenv('OPENAI_BUDGET_MAX_WAIT', '0')
+    server = fakeredis.FakeServer()
+    return TokenBudget(fakeredis.FakeRedis(server=server), fakeredis.aioredis.FakeRedis(server=server),
+                       tpm=1000, lane_shares=[0.5, 1.0])
+
+
+def available(budget, bucket):
+    return budget.get_stats()['buckets'][bucket]['available_tokens']
+
+
+def test_reserve_takes_from_global_and_lane_bucket(budget):
+    assert asyncio.run(budget.acquire_async(300, priority=0))
+
+    # Nachfüllung während des Tests (1000 TPM ≈ 17 Tokens/s) ist vernachlässigbar
+    assert available(budget, 'global') == pytest.approx(700, abs=5)
+    assert available(budget, 'lane_0') == pytest.approx(200, abs=5)
+    assert available(budget, 'lane_1') == 1000
+    assert budget.get_stats()['reserved_requests'] == 1
+
+
+def test_reconcile_refunds_unused_tokens(budget):
+    async def request():
+        assert await budget.acquire_async(300, priority=0)
+        await budget.reconcile_async(300, 100, priority=0)
+    asyncio.run(request())
+
+    assert available(budget, 'global') == pytest.approx(900, abs=5)
+    assert available(budget, 'lane_0') == pytest.approx(400, abs=5)
+    stats = budget.get_stats()
+    assert stats['estimated_tokens'] == 300 and stats['actual_tokens'] == 100
+
+
+def test_reconcile_charges_underestimated_tokens(budget):
+    async def request():
+        assert await budget.acquire_async(100, priority=1)
+        await budget.reconcile_async(100, 400, priority=1)
+    asyncio.run(request())
+
+    assert available(budget, 'global') == pytest.approx(600, abs=5)
+
+
+def test_lane_share_keeps_reserve_for_higher_priority(budget):
+    async def requests():
+        assert await budget.acquire_async(450, priority=0)
+        # Lane 0 darf höchstens 50% belegen, obwohl global noch 550 frei sind
+        with pytest.raises(RateLimitedError) as raised:
+            await budget.acquire_async(100, priority=0)
+        assert raised.value.retry_after > 0
+        assert await budget.acquire_async(500, priority=1)
+    asyncio.run(requests())
+
+    stats = budget.get_stats()
+    assert stats['denied'] == 1
+    assert stats['reserved_requests'] == 2
@@ -0,0 +1,156 @@
+"""Upload-Streaming: Magic Bytes, Größenlimit, Spooling und SHA-256 pro Chunk"""
+import asyncio
+import hashlib
+
+import pytest
+
+from upload_stream import SpooledUpload, UploadError, receive_uploads, sniff_image_type
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 8
+JPEG = b"\xff\xd8\xff\xe0" + b"\x00" * 8
+BOUNDARY = "grenze"
+
+
+class FakeRequest:
+    """Starlette-Request mit festen Headern und Body in Chunks"""
+
+    def __init__(self, body: bytes, chunk_size: int = 1024, content_length: bool = True):
+        self.headers = {'content-type': f"multipart/form-data; boundary={BOUNDARY}"}
+        if content_length:
+            self.headers['content-length'] = str(len(body))
+        self.body = body
+        self.chunk_size = chunk_size
+        self.streamed = 0
+
+    async def stream(self):
+        for start in range(0, len(self.body), self.chunk_size):
+            self.streamed += 1
+            yield self.body[start:start + self.chunk_size]
+
+
+def multipart(*files) -> bytes:
+    body = b""
+    for filename, content in files:
+        body += (f"--{BOUNDARY}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{filename}\"\r\n"
+                 f"Content-Type: image/png\r\n\r\n").encode() + content + b"\r\n"
+    return body + f"--{BOUNDARY}--\r\n".encode()
+
+
+def make_upload(max_size=1024, spool_size=64):
+    return SpooledUpload('bild.png', 'image/png', max_size=max_size, spool_size=spool_size)
+
+
+@pytest.mark.parametrize('head, expected', [
+    (JPEG, 'image/jpeg'),
+    (PNG, 'image/png'),
+    (b"GIF89a" + b"\x00" * 6, 'image/gif'),
+    (b"RIFF\x10\x00\x00\x00WEBP", 'image/webp'),
+    (b"RIFF\x10\x00\x00\x00WAVE", None),
+    (b"%PDF-1.7\n\x00\x00\x00", None),
+    (b"", None),
+])
+def test_sniff_image_type(head, expected):
+    assert sniff_image_type(head) == expected
+
+
+def test_wrong_magic_is_rejected_with_first_chunk():
+    upload = make_upload()
+
+    with pytest.raises(UploadError) as raised:
+        upload.write(b"%PDF-1.7\n" + b"\x00" * 20)
+
+    assert raised.value.status_code == 400
+
+
+def test_magic_split_across_chunks_is_detected():
+    upload = make_upload()
+
+    for byte in PNG:
+        upload.write(bytes([byte]))
+    upload.finish()
+
+    assert upload.content_type == 'image/png'
+
+
+def test_tiny_file_is_sniffed_on_finish():
+    upload = make_upload()
+    upload.write(b"GIF8")
+
+    with pytest.raises(UploadError):
+        upload.finish()
+
+
+def test_size_limit_rejects_the_exceeding_chunk():
+    upload = make_upload(max_size=100)
+    upload.write(PNG + b"\x00" * 60)
+
+    with pytest.raises(UploadError) as raised:
+        upload.write(b"\x00" * 40)
+
+    assert raised.value.status_code == 413
+
+
+def test_small_upload_stays_in_memory():
+    upload = make_upload(spool_size=64)
+    data = PNG + b"klein"
+
+    upload.write(data)
+    upload.finish()
+
+    assert upload.content() == data
+    assert upload.size == len(data)
+
+
+def test_large_upload_is_spooled_to_disk():
+    upload = make_upload(spool_size=64)
+    data = PNG + bytes(range(256)) * 2
+
+    for start in range(0, len(data), 50):
+        upload.write(data[start:start + 50])
+    upload.finish()
+
+    spooled = upload.content()
+    assert not isinstance(spooled, bytes)
+    assert spooled.read() == data
+    upload.close()
+
+
+def test_hash_matches_the_bytes():
+    upload = make_upload(spool_size=64)
+    data = JPEG + b"inhalt" * 100
+
+    for start in range(0, len(data), 33):
+        upload.write(data[start:start + 33])
+
+    assert upload.content_hash == hashlib.sha256(data).hexdigest()
+
+
+def test_announced_body_above_limit_is_rejected_before_reading():
+    # Limit pro Request: max_size + MULTIPART_OVERHEAD (64KB)
+    request = FakeRequest(multipart(('gross.png', PNG + b"\x00" * 70 * 1024)))
+
+    with pytest.raises(UploadError) as raised:
+        asyncio.run(receive_uploads(request, max_size=1024))
+
+    assert raised.value.status_code == 413
+    assert request.streamed == 0
+
+
+def test_oversized_stream_is_aborted_early():
+    request = FakeRequest(multipart(('gross.png', PNG + b"\x00" * 4096)), chunk_size=256, content_length=False)
+
+    with pytest.raises(UploadError) as raised:
+        asyncio.run(receive_uploads(request, max_size=1024, spool_size=64))
+
+    assert raised.value.status_code == 413
+    assert request.streamed < len(request.body) // 256
+
+
+def test_collect_errors_keeps_valid_files():
+    request = FakeRequest(multipart(('a.png', PNG + b"a"), ('b.pdf', b"%PDF-1.7\n" + b"\x00" * 20)))
+
+    uploads = asyncio.run(receive_uploads(request, max_files=2, collect_errors=True))
+
+    assert [upload.error is None for upload in uploads] == [True, False]
+    assert uploads[0].content() == PNG + b"a"
+    assert uploads[0].content_hash == hashlib.sha256(PNG + b"a").hexdigest()
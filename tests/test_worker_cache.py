@@ -0,0 +1,130 @@
+"""Analyse-Cache im Worker: Lookup direkt nach dem Laden, Treffer überspringen Vorbereitung und AI-Analyse"""
+import hashlib
+from concurrent.futures import Future
+
+import pytest
+
+from worker import ClothingProcessor
+
+IMAGE = b"\x89PNG\r\n\x1a\n" + b"bild" * 10
+ANALYSIS = {'category': 'T-Shirt', 'color': 'blau', 'style': 'casual', 'season': 'Sommer',
+            'material': 'Baumwolle', 'occasion': 'Alltag', 'confidence': 0.9}
+
+
+class FakePool:
+    """Prozess-Pool, der synchron feste Ergebnisse pro Funktion liefert und die Aufrufe mitschreibt"""
+
+    RESULTS = {
+        'prepare_for_analysis': (b"klein", 'image/jpeg'),
+        'make_derivatives': {'thumb': (b"t", 'image/webp'), 'medium': (b"m", 'image/webp')},
+    }
+
+    def __init__(self):
+        self.calls = []
+
+    def submit(self, fn, *args, **kwargs):
+        self.calls.append(fn.__name__)
+        future = Future()
+        future.set_result(self.RESULTS[fn.__name__])
+        return future
+
+
+class FakeAnalysisCache:
+    def __init__(self, entries=None):
+        self.entries = dict(entries or {})
+        self.lookups = []
+
+    def get(self, content_hash):
+        self.lookups.append(content_hash)
+        return self.entries.get(content_hash)
+
+    def put(self, content_hash, analysis):
+        self.entries[content_hash] = analysis
+
+
+class FakeBatcher:
+    def __init__(self):
+        self.images = []
+
+    def analyze(self, image_content, content_type, priority=0):
+        self.images.append(image_content)
+        return dict(ANALYSIS)
+
+
+class FakeAI:
+    def extract_clothing(self, image_content):
+        return b"freigestellt", 'image/webp'
+
+
+class FakeStorage:
+    def upload_processed_images(self, user_id, clothing_id, images):
+        return {variant: (f"{clothing_id}/{variant}", f"https://storage.local/{variant}") for variant in images}
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.completed = None
+
+    def update_processing_status(self, clothing_id, status):
+        return {'id': clothing_id}
+
+    def complete_clothing_processing(self, clothing_id, **fields):
+        self.completed = fields
+        return {'id': clothing_id, **fields}
+
+
+class FakeStatusEvents:
+    def publish(self, *args, **kwargs):
+        pass
+
+
+def make_processor(cache_entries=None):
+    processor = ClothingProcessor.__new__(ClothingProcessor)
+    processor.db = FakeDatabase()
+    processor.storage = FakeStorage()
+    processor.ai = FakeAI()
+    processor.status_events = FakeStatusEvents()
+    processor.image_pool = FakePool()
+    processor.image_cache = None
+    processor.analysis_cache = FakeAnalysisCache(cache_entries)
+    processor.analysis_batcher = FakeBatcher()
+    processor.analysis_image_settings = {}
+    processor.color_mode = 'off'
+    return processor
+
+
+def job(**fields):
+    return {'clothing_id': 'clothing-1', 'user_id': 'user-1', 'file_content': IMAGE, **fields}
+
+
+def test_cache_hit_skips_preparation_and_analysis():
+    content_hash = hashlib.sha256(IMAGE).hexdigest()
+    processor = make_processor({content_hash: dict(ANALYSIS, category='Hose')})
+
+    assert processor.process_job(job())
+
+    assert processor.analysis_cache.lookups == [content_hash]
+    assert 'prepare_for_analysis' not in processor.image_pool.calls
+    assert not processor.analysis_batcher.images
+    assert processor.db.completed['category'] == 'Hose'
+    # Freisteller und Derivate gehören zum Kleidungsstück und entstehen trotzdem
+    assert processor.db.completed['thumbnail_url'] == 'https://storage.local/thumb'
+
+
+def test_cache_miss_analyzes_and_stores_result():
+    processor = make_processor()
+
+    assert processor.process_job(job())
+
+    assert processor.image_pool.calls == ['prepare_for_analysis', 'make_derivatives']
+    assert processor.analysis_batcher.images == [b"klein"]
+    assert processor.analysis_cache.entries[hashlib.sha256(IMAGE).hexdigest()] == ANALYSIS
+
+
+@pytest.mark.parametrize('job_hash', [None, 'vom-client'])
+def test_cache_key_is_computed_from_loaded_bytes(job_hash):
+    processor = make_processor()
+
+    processor.process_job(job(content_hash=job_hash))
+
+    assert processor.analysis_cache.lookups == [hashlib.sha256(IMAGE).hexdigest()]
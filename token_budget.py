@@ -0,0 +1,271 @@
+import os
+import asyncio
+import logging
+import random
+from typing import Dict, Any, List
+
+from rate_limiter import RateLimitedError
+from redis_utils import decode_response
+
+logger = logging.getLogger(__name__)
+
+# Token Bucket (Tokens + Requests) über mehrere Buckets (global + Lane), atomar:
+# genommen wird nur, wenn ALLE Buckets genug haben; sonst Wartezeit bis genug nachgefüllt ist.
+# Zeitbasis ist Redis TIME, damit Uhren der Worker-Hosts keine Rolle spielen.
+# KEYS: stats, bucket... | ARGV: tokens, requests, ttl, (tpm, rpm) pro Bucket
+RESERVE_LUA = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local need_tokens = tonumber(ARGV[1])
+local need_requests = tonumber(ARGV[2])
+local ttl = tonumber(ARGV[3])
+local state = {}
+local wait = 0
+for i = 2, #KEYS do
+    local tpm = tonumber(ARGV[2 + (i - 1) * 2])
+    local rpm = tonumber(ARGV[3 + (i - 1) * 2])
+    local values = redis.call('HMGET', KEYS[i], 'tokens', 'requests', 'ts')
+    local elapsed = math.max(0, now - (tonumber(values[3]) or now))
+    local tokens = math.min(tpm, (tonumber(values[1]) or tpm) + elapsed * tpm / 60)
+    local requests = math.min(rpm, (tonumber(values[2]) or rpm) + elapsed * rpm / 60)
+    if tokens < need_tokens then
+        wait = math.max(wait, (need_tokens - tokens) * 60 / tpm)
+    end
+    if requests < need_requests then
+        wait = math.max(wait, (need_requests - requests) * 60 / rpm)
+    end
+    state[i] = {tokens, requests}
+end
+if wait > 0 then
+    redis.call('HINCRBY', KEYS[1], 'denied', 1)
+    return {0, tostring(wait)}
+end
+for i = 2, #KEYS do
+    redis.call('HSET', KEYS[i], 'tokens', tostring(state[i][1] - need_tokens),
+               'requests', tostring(state[i][2] - need_requests), 'ts', tostring(now))
+    redis.call('EXPIRE', KEYS[i], ttl)
+end
+redis.call('HINCRBY', KEYS[1], 'reserved_requests', 1)
+redis.call('HINCRBY', KEYS[1], 'estimated_tokens', need_tokens)
+return {1, '0'}
+"""
+
+# Abgleich nach der Antwort: Differenz Schätzung - tatsächliche usage zurückbuchen
+# (negativ = nachbelasten, der Bucket darf kurz ins Minus gehen)
+# KEYS: stats, bucket... | ARGV: estimated, actual, tpm pro Bucket
+RECONCILE_LUA = """
+local delta = tonumber(ARGV[1]) - tonumber(ARGV[2])
+for i = 2, #KEYS do
+    local tokens = tonumber(redis.call('HGET', KEYS[i], 'tokens'))
+    if tokens then
+        redis.call('HSET', KEYS[i], 'tokens', tostring(math.min(tonumber(ARGV[1 + i]), tokens + delta)))
+    end
+end
+redis.call('HINCRBY', KEYS[1], 'actual_tokens', tonumber(ARGV[2]))
+return 1
+"""
+
+# Geschätzte Vision-Tokens pro Bild (vorverarbeitet auf max. 1024px: 4 Kacheln + Basis)
+IMAGE_TOKENS = {'high': 765, 'low': 85}
+
+
+def estimate_request_tokens(request: Dict[str, Any]) -> int:
+    """
+    Schätzt die Tokens eines Chat-Completion-Requests wie das Rate-Limit von OpenAI
+    (Eingabe inkl. Bilder + max_tokens der Ausgabe)
+
+    Args:
+        request: Parameter für chat.completions.create
+
+    Returns:
+        Geschätzte Tokens
+    """
+    tokens = request.get('max_tokens') or 0
+    for message in request.get('messages', []):
+        content = message.get('content')
+        parts = content if isinstance(content, list) else [{'type': 'text', 'text': content or ''}]
+        for part in parts:
+            if part.get('type') == 'image_url':
+                tokens += IMAGE_TOKENS.get(part['image_url'].get('detail', 'high'), IMAGE_TOKENS['high'])
+            else:
+                tokens += len(part.get('text', '')) // 4 + 4
+    return tokens
+
+
+class TokenBudget:
+    """
+    Flottenweites TPM/RPM-Budget für OpenAI in Redis (Token Bucket per Lua)
+    Jeder Request reserviert vor dem Senden seine geschätzten Tokens im globalen Bucket
+    und im Bucket seiner Prioritätsstufe (Lane) und gleicht danach mit `usage` ab.
+    Der Anteil einer Lane begrenzt, wie viel des Budgets sie höchstens belegen darf,
+    damit höhere Prioritäten Reserve behalten.
+    """
+
+    def __init__(self, redis_client, async_redis_client=None, tpm: int = None, rpm: int = None,
+                 lane_shares: List[float] = None):
+        """
+        Args:
+            redis_client: Sync Redis Client (Stats)
+            async_redis_client: Async Redis Client (Reservierung im Event Loop der ClothingAI, API-Stats)
+            tpm: Tokens pro Minute der Organisation (falls nicht gesetzt: ENV OPENAI_TPM_LIMIT, 0 = aus)
+            rpm: Requests pro Minute (falls nicht gesetzt: ENV OPENAI_RPM_LIMIT, 0 = aus)
+            lane_shares: Maximaler Budget-Anteil pro Prioritätsstufe
+                         (falls nicht gesetzt: ENV OPENAI_BUDGET_LANE_SHARES, z.B. "0.7,0.85,1.0")
+        """
+        self.redis_client = redis_client
+        self.async_redis_client = async_redis_client
+        self.tpm = tpm if tpm is not None else int(os.getenv('OPENAI_TPM_LIMIT', 0))
+        self.rpm = rpm if rpm is not None else int(os.getenv('OPENAI_RPM_LIMIT', 0))
+        self.lane_shares = lane_shares or [
+            float(share) for share in os.getenv('OPENAI_BUDGET_LANE_SHARES', '0.7,0.85,1.0').split(',')
+        ]
+        self.max_wait = float(os.getenv('OPENAI_BUDGET_MAX_WAIT', 30))
+
+        self.prefix = "openai_budget"
+        self.stats_key = f"{self.prefix}:stats"
+        self.bucket_ttl = 120
+
+        if async_redis_client is not None:
+            self._reserve_script = async_redis_client.register_script(RESERVE_LUA)
+            self._reconcile_script = async_redis_client.register_script(RECONCILE_LUA)
+
+    @property
+    def enabled(self) -> bool:
+        return self.tpm > 0 and self.async_redis_client is not None
+
+    def _lane(self, priority: int) -> int:
+        """Lane = Prioritätsstufe, begrenzt auf die konfigurierten Anteile"""
+        return max(0, min(int(priority or 0), len(self.lane_shares) - 1))
+
+    def _buckets(self, lane: int) -> List[tuple]:
+        """(Key, TPM, RPM) des globalen Buckets und des Lane-Buckets"""
+        share = self.lane_shares[lane]
+        rpm = self.rpm or 1_000_000  # ohne RPM-Limit praktisch unbegrenzt
+        return [
+            (f"{self.prefix}:global", self.tpm, rpm),
+            (f"{self.prefix}:lane:{lane}", max(1, int(self.tpm * share)), max(1, int(rpm * share)))
+        ]
+
+    async def acquire_async(self, tokens: int, priority: int = 0) -> bool:
+        """
+        Reserviert Tokens und einen Request; wartet bis max_wait auf Nachfüllung
+
+        Args:
+            tokens: Geschätzte Tokens (siehe estimate_request_tokens)
+            priority: Priorität des Jobs (bestimmt die Lane)
+
+        Returns:
+            True wenn reserviert (dann reconcile_async aufrufen), False wenn Budget aus/Redis nicht erreichbar
+
+        Raises:
+            RateLimitedError: Budget reicht auch nach max_wait nicht (Job wird später erneut versucht)
+        """
+        if not self.enabled:
+            return False
+
+        buckets = self._buckets(self._lane(priority))
+        # Ein Request darf nie mehr brauchen als ein Bucket fassen kann
+        tokens = min(tokens, min(tpm for _, tpm, _ in buckets))
+        args = [tokens, 1, self.bucket_ttl]
+        for _, tpm, rpm in buckets:
+            args.extend([tpm, rpm])
+
+        waited = 0.0
+        while True:
+            try:
+                granted, wait = await self._reserve_script(
+                    keys=[self.stats_key] + [key for key, _, _ in buckets], args=args
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ Token-Budget nicht erreichbar, Request ohne Reservierung: {e}")
+                return False
+
+            if int(granted):
+                return True
+
+            wait = float(wait)
+            if waited + wait > self.max_wait:
+                raise RateLimitedError(f"OpenAI Token-Budget erschöpft (Lane {self._lane(priority)})", wait)
+            # Jitter, damit wartende Worker nicht gleichzeitig wieder anfragen
+            wait += random.uniform(0, 0.1)
+            await asyncio.sleep(wait)
+            waited += wait
+
+    async def reconcile_async(self, estimated: int, actual: int, priority: int = 0) -> None:
+        """
+        Gleicht eine Reservierung mit der tatsächlichen usage ab
+
+        Args:
+            estimated: Reservierte Tokens
+            actual: Tatsächliche Tokens (0 bei abgelehnten/fehlgeschlagenen Requests)
+            priority: Priorität des Jobs
+        """
+        buckets = self._buckets(self._lane(priority))
+        try:
+            await self._reconcile_script(
+                keys=[self.stats_key] + [key for key, _, _ in buckets],
+                args=[min(estimated, min(tpm for _, tpm, _ in buckets)), actual] + [tpm for _, tpm, _ in buckets]
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Token-Budget Abgleich fehlgeschlagen: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Auslastung pro Bucket und Zähler"""
+        pipe = self.redis_client.pipeline(transaction=False)
+        self._queue_stats_commands(pipe)
+        return self._format_stats(pipe.execute())
+
+    async def get_stats_async(self) -> Dict[str, Any]:
+        """Async-Variante von get_stats"""
+        pipe = self.async_redis_client.pipeline(transaction=False)
+        self._queue_stats_commands(pipe)
+        return self._format_stats(await pipe.execute())
+
+    def _all_buckets(self) -> List[tuple]:
+        """(Name, Key, TPM, RPM) aller Buckets"""
+        buckets = [('global',) + self._buckets(0)[0]]
+        for lane in range(len(self.lane_shares)):
+            buckets.append((f'lane_{lane}',) + self._buckets(lane)[1])
+        return buckets
+
+    def _queue_stats_commands(self, pipe) -> None:
+        pipe.time()
+        pipe.hgetall(self.stats_key)
+        for _, key, _, _ in self._all_buckets():
+            pipe.hmget(key, 'tokens', 'requests', 'ts')
+
+    def _format_stats(self, results: list) -> Dict[str, Any]:
+        """Baut das Stats-Dict; Bucket-Stände werden wie im Lua-Skript bis jetzt nachgefüllt"""
+        if not self.enabled:
+            return {'enabled': False}
+
+        (seconds, microseconds), counters, *states = results
+        now = seconds + microseconds / 1_000_000
+        counters = {decode_response(key): int(value) for key, value in counters.items()}
+
+        buckets = {}
+        for (name, _, tpm, rpm), (tokens, requests, ts) in zip(self._all_buckets(), states):
+            elapsed = max(0.0, now - float(ts)) if ts is not None else 0.0
+            available = min(tpm, float(tokens) + elapsed * tpm / 60) if tokens is not None else tpm
+            available_requests = min(rpm, float(requests) + elapsed * rpm / 60) if requests is not None else rpm
+            buckets[name] = {
+                'tpm': tpm,
+                'available_tokens': int(available),
+                'token_utilization': round(1 - available / tpm, 4),
+                'request_utilization': round(1 - available_requests / rpm, 4) if self.rpm else None
+            }
+
+        estimated = counters.get('estimated_tokens', 0)
+        actual = counters.get('actual_tokens', 0)
+        return {
+            'enabled': True,
+            'tpm_limit': self.tpm,
+            'rpm_limit': self.rpm or None,
+            'lane_shares': self.lane_shares,
+            'buckets': buckets,
+            'reserved_requests': counters.get('reserved_requests', 0),
+            'denied': counters.get('denied', 0),
+            'estimated_tokens': estimated,
+            'actual_tokens': actual,
+            'estimate_ratio': round(actual / estimated, 4) if estimated else None
+        }
@@ -0,0 +1,245 @@
+import io
+import os
+import hashlib
+import tempfile
+import logging
+from typing import Optional, Union, List, Dict
+
+from multipart.multipart import MultipartParser, parse_options_header
+from multipart.exceptions import MultipartParseError
+
+logger = logging.getLogger(__name__)
+
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024  # 10MB pro Datei (wie StorageManager.validate_image_file)
+MULTIPART_OVERHEAD = 64 * 1024  # Boundaries, Part-Header und kleine Formularfelder
+
+# Magic Bytes → MIME-Type (WebP: "RIFF" + 4 Bytes Länge + "WEBP")
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+SNIFF_BYTES = 12
+
+
+class UploadError(Exception):
+    """Ungültiger Upload (Status-Code für die HTTP-Antwort)"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """
+    Bestimmt den Bildtyp anhand der ersten Bytes (Content-Type des Clients wird nicht vertraut)
+
+    Args:
+        head: Mindestens die ersten 12 Bytes der Datei
+
+    Returns:
+        MIME-Type oder None wenn kein unterstütztes Bildformat
+    """
+    for signature, content_type in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+class SpooledUpload:
+    """
+    Eine empfangene Datei: klein im Speicher, ab spool_size in einer temporären Datei.
+    SHA-256, Größe und Bildtyp werden beim Schreiben der Chunks berechnet.
+    """
+
+    def __init__(self, filename: Optional[str], declared_content_type: Optional[str],
+                 max_size: int, spool_size: int):
+        self.filename = filename
+        self.declared_content_type = declared_content_type
+        self.content_type: Optional[str] = None
+        self.size = 0
+        self.error: Optional[UploadError] = None  # nur bei receive_uploads(collect_errors=True)
+        self.max_size = max_size
+        self.spool_size = spool_size
+        self._digest = hashlib.sha256()
+        self._head = b""
+        self._chunks: List[bytes] = []
+        self._file: Optional[io.FileIO] = None
+
+    @property
+    def content_hash(self) -> str:
+        return self._digest.hexdigest()
+
+    def write(self, data: bytes) -> None:
+        """Hängt einen Chunk an (prüft Größenlimit und Magic Bytes so früh wie möglich)"""
+        self.size += len(data)
+        if self.size > self.max_size:
+            raise UploadError(f"Datei zu groß. Maximum: {self.max_size // (1024 * 1024)}MB", status_code=413)
+
+        if self.content_type is None and len(self._head) < SNIFF_BYTES:
+            self._head += data[:SNIFF_BYTES - len(self._head)]
+            if len(self._head) >= SNIFF_BYTES:
+                self._sniff()
+
+        self._digest.update(data)
+        if self._file is None and self.size > self.spool_size:
+            # Unbuffered FileIO: wird von storage3/httpx beim Upload in Chunks gelesen
+            self._file = tempfile.TemporaryFile(buffering=0)
+            for chunk in self._chunks:
+                self._file.write(chunk)
+            self._chunks = []
+        if self._file is not None:
+            self._file.write(data)
+        else:
+            self._chunks.append(data)
+
+    def finish(self) -> None:
+        """Abschluss des Parts: Typ auch für sehr kleine Dateien bestimmen"""
+        if self.content_type is None:
+            self._sniff()
+
+    def _sniff(self) -> None:
+        self.content_type = sniff_image_type(self._head)
+        if self.content_type is None:
+            raise UploadError("Dateiinhalt ist kein unterstütztes Bild (JPEG, PNG, WebP, GIF)")
+
+    def content(self) -> Union[bytes, io.FileIO]:
+        """Inhalt für den Storage-Upload: bytes (klein) oder die an den Anfang gespulte Datei"""
+        if self._file is None:
+            return b"".join(self._chunks)
+        self._file.seek(0)
+        return self._file
+
+    def close(self) -> None:
+        self._chunks = []
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+async def receive_uploads(request, field_name: str = "file", max_files: int = 1,
+                          max_size: int = MAX_UPLOAD_SIZE, spool_size: int = None,
+                          collect_errors: bool = False) -> List[SpooledUpload]:
+    """
+    Liest einen multipart/form-data Request als Stream, ohne den Body vorher zu puffern
+
+    Größenlimit, Magic Bytes und SHA-256 werden pro Chunk geprüft bzw. berechnet;
+    ein zu großer oder ungültiger Upload wird abgebrochen, bevor der Rest empfangen wird.
+
+    Args:
+        request: Starlette/FastAPI Request
+        field_name: Name des Datei-Felds
+        max_files: Maximale Anzahl Dateien im Feld
+        max_size: Maximale Größe pro Datei in Bytes
+        spool_size: Ab dieser Größe wird in eine temporäre Datei geschrieben
+                    (falls nicht gesetzt: ENV UPLOAD_SPOOL_SIZE, 256KB)
+        collect_errors: Ungültige Dateien nicht abbrechen, sondern in upload.error vermerken
+                        (Rest der Datei wird verworfen, die übrigen Dateien weiter gelesen)
+
+    Returns:
+        Liste der empfangenen Dateien (Aufrufer muss close() aufrufen)
+
+    Raises:
+        UploadError: Ungültiger Request, zu große oder ungültige Datei
+    """
+    spool_size = spool_size if spool_size is not None else int(os.getenv('UPLOAD_SPOOL_SIZE', 256 * 1024))
+    max_body = max_files * (max_size + MULTIPART_OVERHEAD)
+
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise UploadError("Erwartet multipart/form-data mit Boundary")
+
+    # Frühe Ablehnung anhand des angekündigten Bodys, ohne ihn zu lesen
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_body:
+        raise UploadError(f"Upload zu groß. Maximum: {max_size // (1024 * 1024)}MB pro Datei", status_code=413)
+
+    uploads: List[SpooledUpload] = []
+    state: Dict[str, object] = {"headers": {}, "field": b"", "value": b"", "current": None}
+
+    def on_part_begin():
+        state["headers"] = {}
+        state["current"] = None
+
+    def on_header_field(data, start, end):
+        state["field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        state["value"] += data[start:end]
+
+    def on_header_end():
+        state["headers"][state["field"].lower()] = state["value"]
+        state["field"], state["value"] = b"", b""
+
+    def on_headers_finished():
+        _, disposition = parse_options_header(state["headers"].get(b"content-disposition", b""))
+        if disposition.get(b"name", b"").decode("latin-1") != field_name or b"filename" not in disposition:
+            return  # Andere Formularfelder werden ignoriert
+        if len(uploads) >= max_files:
+            raise UploadError(f"Zu viele Dateien. Maximum: {max_files}")
+        declared = state["headers"].get(b"content-type", b"").decode("latin-1") or None
+        upload = SpooledUpload(disposition[b"filename"].decode("utf-8", "replace"), declared, max_size, spool_size)
+        uploads.append(upload)
+        state["current"] = upload
+
+    def guarded(action):
+        upload = state["current"]
+        if upload is None or upload.error is not None:
+            return
+        try:
+            action(upload)
+        except UploadError as e:
+            if not collect_errors:
+                raise
+            upload.error = e
+            upload.close()
+
+    def on_part_data(data, start, end):
+        guarded(lambda upload: upload.write(data[start:end]))
+
+    def on_part_end():
+        guarded(lambda upload: upload.finish())
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_body:
+                raise UploadError(f"Upload zu groß. Maximum: {max_size // (1024 * 1024)}MB pro Datei",
+                                  status_code=413)
+            parser.write(chunk)
+        parser.finalize()
+    except MultipartParseError as e:
+        _close_all(uploads)
+        raise UploadError(f"Ungültiger multipart Body: {e}")
+    except BaseException:
+        _close_all(uploads)
+        raise
+
+    if not uploads:
+        raise UploadError(f"Keine Datei im Feld '{field_name}'")
+    return uploads
+
+
+async def receive_upload(request, field_name: str = "file", max_size: int = MAX_UPLOAD_SIZE) -> SpooledUpload:
+    """Einzelne Datei per receive_uploads (siehe dort)"""
+    return (await receive_uploads(request, field_name, max_files=1, max_size=max_size))[0]
+
+
+def _close_all(uploads: List[SpooledUpload]) -> None:
+    for upload in uploads:
+        upload.close()
@@ -2,14 +2,34 @@
 import os
 import sys
 import time
-import json
+import base64
+import hashlib
+import signal
+import socket
 import logging
-import redis
-from typing import Dict, Any
-from datetime import datetime
+import mimetypes
+import threading
+import multiprocessing
+from uuid import uuid4
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Dict, Any, Optional, Tuple
+from datetime import datetime, timezone
 from storage_manager import StorageManager
 from ai import ClothingAI
 from database_manager import DatabaseManager, ProcessingStatus
+from queue_manager import QueueManager
+from image_cache import LocalImageCache
+from analysis_cache import AnalysisCache
+from analysis_batcher import AnalysisBatcher
+from status_events import StatusEvents
+from status_cache import StatusCache
+from token_budget import TokenBudget
+from cascade_stats import CascadeStats
+from image_processing import (
+    prepare_for_analysis, analysis_settings_from_env, make_derivatives, analyze_colors, color_settings_from_env
+)
+from taxonomy import DEFAULTS
+from retry_policy import default_policies, classify_error, ERROR_TRANSIENT
 
 # Logging Setup
 logging.basicConfig(
@@ -26,27 +46,79 @@ class ClothingProcessor:
     
     def __init__(self):
         """Initialisiert Worker mit Redis Connection und Services"""
-        # Redis Connection
-        self.redis_client = redis.Redis(
-            host=os.getenv('REDIS_HOST', 'localhost'),
-            port=int(os.getenv('REDIS_PORT', 6379)),
-            db=int(os.getenv('REDIS_DB', 0)),
-            decode_responses=True
-        )
+        # Parallele Jobs pro Worker-Prozess (I/O-gebunden: OpenAI, Storage, PostgREST)
+        self.concurrency = max(1, int(os.getenv('WORKER_CONCURRENCY', 1)))
+        
+        # Queue (Redis Connection + Reliable-Queue-Logik), Backend per QUEUE_BACKEND (list|streams)
+        self.queue = QueueManager(max_connections=max(20, self.concurrency * 2 + 4))
+        self.redis_client = self.queue.redis_client
         
         # Queue Namen
-        self.queue_name = "clothing_processing_queue"
-        self.retry_queue = "clothing_processing_retry"
+        self.queue_name = self.queue.queue_name
+        self.retry_queue = self.queue.retry_queue
+        
+        # Eindeutige Worker-ID für In-Flight-Liste und Lease (bzw. Consumer-Name im Streams-Backend)
+        self.worker_id = os.getenv('WORKER_ID') or f"{socket.gethostname()}-{os.getpid()}-{uuid4().hex[:6]}"
+        
+        # Optionaler lokaler Bild-Cache (IMAGE_CACHE_DIR), geteilt mit Workern auf demselben Host
+        self.image_cache = LocalImageCache.from_env()
+        
+        # Redis-Cache für AI-Analysen, Key = SHA-256 des Original-Bildes
+        self.analysis_cache = AnalysisCache(self.queue.redis_client)
+        
+        # Prozess-Pool für CPU-lastige Bildverarbeitung (Pillow/NumPy), damit die Job-Threads nicht
+        # um den GIL konkurrieren; "spawn", da fork aus einem Prozess mit Threads unsicher ist
+        self.image_workers = max(1, int(os.getenv('IMAGE_PROCESS_WORKERS', os.cpu_count() or 1)))
+        self.image_pool = ProcessPoolExecutor(
+            max_workers=self.image_workers,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+        self.analysis_image_settings = analysis_settings_from_env()
+        
+        # Lokale Farbanalyse (K-Means im Prozess-Pool): "fill" ergänzt unbekannte Farben der AI,
+        # "override" ersetzt sie bei ausreichender Sicherheit, "off" deaktiviert
+        self.color_mode = os.getenv('COLOR_ANALYSIS_MODE', 'fill').lower()
+        self.color_override_confidence = float(os.getenv('COLOR_OVERRIDE_CONFIDENCE', 0.6))
+        self.color_settings = color_settings_from_env()
         
         # Services
         self.storage = StorageManager()
-        self.ai = ClothingAI()
-        self.db = DatabaseManager()
+        # Flottenweites TPM/RPM-Budget (OPENAI_TPM_LIMIT), geteilt von allen Worker-Replicas
+        self.token_budget = TokenBudget(self.queue.redis_client, self.queue.async_redis_client)
+        self.ai = ClothingAI(
+            executor=self.image_pool,
+            budget=self.token_budget,
+            cascade_stats=CascadeStats(self.queue.redis_client)
+        )
+        # Statuswechsel werden in den Redis Status-Cache des Status-Endpoints durchgeschrieben
+        self.db = DatabaseManager(status_cache=StatusCache(self.queue.redis_client, self.queue.async_redis_client))
+        
+        # Statuswechsel per Redis Pub/Sub an die SSE/WebSocket-Verbindungen der API
+        self.status_events = StatusEvents(self.queue.redis_client)
+        
+        # Micro-Batching der AI-Analyse über parallel laufende Jobs (nur sinnvoll ab Concurrency 2)
+        self.analysis_batcher = AnalysisBatcher(
+            self.ai,
+            max_batch=min(int(os.getenv('ANALYSIS_BATCH_SIZE', 4)), self.concurrency),
+            max_in_flight=self.concurrency
+        )
+        
+        self._shutdown = threading.Event()
+        self._stopped = threading.Event()
+        
+        # Retry-Policies pro Fehlerklasse (exponentieller Backoff mit Jitter)
+        self.retry_policies = default_policies()
+        
+        # Intervalle für Heartbeat, Reaper und Sweep verwaister pending Einträge
+        self.heartbeat_interval = max(1, self.queue.lease_ttl // 3)
+        self.reaper_interval = int(os.getenv('REAPER_INTERVAL', 30))
+        self.orphan_sweep_interval = int(os.getenv('ORPHAN_SWEEP_INTERVAL', 300))
+        self.orphan_min_age = int(os.getenv('ORPHAN_MIN_AGE', 120))
         
         logger.info("🚀 ClothingProcessor Worker initialisiert")
-        logger.info(f"📡 Redis: {os.getenv('REDIS_HOST', 'localhost')}:{os.getenv('REDIS_PORT', 6379)}")
+        logger.info(f"📡 Redis: {os.getenv('REDIS_HOST', 'localhost')}:{os.getenv('REDIS_PORT', 6379)} (Backend: {self.queue.backend})")
     
-    def add_job(self, clothing_id: str, user_id: str, file_content_b64: str, 
+    def add_job(self, clothing_id: str, user_id: str, storage_path: str, 
                 file_name: str, content_type: str, priority: int = 0) -> bool:
         """
         Fügt einen Verarbeitungs-Job zur Queue hinzu
@@ -54,7 +126,7 @@ class ClothingProcessor:
         Args:
             clothing_id: UUID des Kleidungsstücks
             user_id: UUID des Nutzers
-            file_content_b64: Base64-kodierter Dateiinhalt
+            storage_path: Pfad des Original-Bildes im Storage
             file_name: Dateiname
             content_type: MIME-Type
             priority: Priorität (0 = normal, höher = wichtiger)
@@ -62,34 +134,55 @@ class ClothingProcessor:
         Returns:
             True wenn Job erfolgreich hinzugefügt
         """
-        try:
-            job_data = {
-                'clothing_id': clothing_id,
-                'user_id': user_id,
-                'file_content_b64': file_content_b64,
-                'file_name': file_name,
-                'content_type': content_type,
-                'created_at': datetime.utcnow().isoformat(),
-                'retry_count': 0,
-                'priority': priority
-            }
-            
-            # Job zu Queue hinzufügen (Redis List)
-            job_json = json.dumps(job_data)
-            
-            if priority > 0:
-                # High priority - an den Anfang der Queue
-                self.redis_client.lpush(self.queue_name, job_json)
-            else:
-                # Normal priority - an das Ende der Queue
-                self.redis_client.rpush(self.queue_name, job_json)
-            
-            logger.info(f"✅ Job hinzugefügt zur Queue: {clothing_id} (Priorität: {priority})")
-            return True
+        return self.queue.add_clothing_processing_job(
+            clothing_id=clothing_id,
+            user_id=user_id,
+            storage_path=storage_path,
+            file_name=file_name,
+            content_type=content_type,
+            priority=priority,
+            storage_bucket=self.storage.original_bucket
+        )
+    
+    def load_job_image(self, job_data: Dict[str, Any]) -> bytes:
+        """
+        Lädt die Bilddaten eines Jobs
+        
+        Claim-Check-Jobs enthalten nur den Storage-Pfad, die Bytes werden aus dem
+        lokalen Cache oder dem Storage geladen. Alte Jobs mit eingebettetem
+        Base64-Inhalt werden weiterhin dekodiert, bis die Queue geleert ist;
+        Binär-Jobs dürfen die Rohbytes direkt unter 'file_content' tragen.
+        
+        Args:
+            job_data: Job-Daten aus der Queue
             
-        except Exception as e:
-            logger.error(f"❌ Fehler beim Hinzufügen des Jobs: {e}")
-            return False
+        Returns:
+            Binärdaten des Original-Bildes
+        """
+        # Legacy-Format: Base64-Inhalt direkt im Job
+        if 'file_content_b64' in job_data:
+            return base64.b64decode(job_data['file_content_b64'])
+        
+        # Binär-Umschlag mit eingebetteten Rohbytes (ohne Base64-Overhead)
+        if isinstance(job_data.get('file_content'), bytes):
+            return job_data['file_content']
+        
+        bucket = job_data.get('storage_bucket') or self.storage.original_bucket
+        storage_path = job_data['storage_path']
+        cache_key = f"{bucket}/{storage_path}"
+        
+        if self.image_cache:
+            cached = self.image_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"💾 Bild aus lokalem Cache: {storage_path}")
+                return cached
+        
+        file_content = self.storage.download_image(bucket, storage_path)
+        
+        if self.image_cache:
+            self.image_cache.put(cache_key, file_content)
+        
+        return file_content
     
     def process_job(self, job_data: Dict[str, Any]) -> bool:
         """
@@ -108,27 +201,61 @@ class ClothingProcessor:
             logger.info(f"🔄 Starte Verarbeitung für Kleidungsstück: {clothing_id}")
             
             # Status auf "processing" setzen
-            self.db.update_processing_status(clothing_id, ProcessingStatus.PROCESSING)
+            processing_item = self.db.update_processing_status(clothing_id, ProcessingStatus.PROCESSING)
+            self.status_events.publish(user_id, clothing_id, ProcessingStatus.PROCESSING.value, processing_item)
+            
+            # Bilddaten laden (Claim-Check oder Legacy-Base64)
+            file_content = self.load_job_image(job_data)
             
-            # File Content dekodieren
-            import base64
-            file_content = base64.b64decode(job_data['file_content_b64'])
+            # Analyse-Cache direkt nach dem Laden prüfen: bei einem Treffer entfällt die Analyse-Vorbereitung
+            # Cache-Key immer aus den geladenen Bytes: der Hash im Job kann vom Client stammen (Direkt-Upload)
+            content_hash = hashlib.sha256(file_content).hexdigest()
+            if job_data.get('content_hash') not in (None, content_hash):
+                logger.warning(f"⚠️ content_hash im Job passt nicht zum Bild von {clothing_id}, nutze berechneten Hash")
+            ai_analysis = self.analysis_cache.get(content_hash)
+            if ai_analysis is not None:
+                logger.info(f"💾 AI-Analyse aus Cache: {content_hash[:12]}")
             
-            # 1. Kleidung aus Hintergrund extrahieren
+            # 1. Kleidung aus Hintergrund extrahieren (im Prozess-Pool)
+            # Auch bei einem Cache-Treffer nötig: Freisteller und Derivate gehören zu diesem Kleidungsstück
             logger.info("🖼️ Extrahiere Kleidung aus Hintergrund...")
-            extracted_image_bytes = self.ai.extract_clothing(file_content)
+            extracted_image_bytes, extracted_content_type = self.ai.extract_clothing(file_content)
             
-            # 2. Extrahiertes Bild hochladen
-            extracted_path, extracted_url = self.storage.upload_processed_image(
+            # 2. Derivate, lokale Farbanalyse und (nur bei Cache-Miss) Analyse-Vorbereitung parallel
+            #    im Prozess-Pool, alle Varianten parallel hochladen
+            colors_future = None
+            if self.color_mode != 'off':
+                colors_future = self.image_pool.submit(analyze_colors, extracted_image_bytes, **self.color_settings)
+            prepare_future = None
+            if ai_analysis is None:
+                # Verkleinern, EXIF-Orientierung, Metadaten entfernen, kompakt neu kodieren
+                prepare_future = self.image_pool.submit(
+                    prepare_for_analysis, extracted_image_bytes, **self.analysis_image_settings
+                )
+            derivatives = self.image_pool.submit(make_derivatives, extracted_image_bytes).result()
+            uploaded = self.storage.upload_processed_images(
                 user_id=user_id,
                 clothing_id=clothing_id,
-                file_content=extracted_image_bytes,
-                content_type=job_data['content_type']
+                images={'full': (extracted_image_bytes, extracted_content_type), **derivatives}
             )
+            extracted_url = uploaded['full'][1]
+            
+            # 3. AI-Analyse durchführen (entfällt bei einem Cache-Treffer)
+            if prepare_future is not None:
+                analysis_image, analysis_content_type = prepare_future.result()
+                logger.info(f"🗜️ Bild für Analyse vorbereitet: {len(extracted_image_bytes)} → "
+                            f"{len(analysis_image)} Bytes ({analysis_content_type})")
+                
+                logger.info("🤖 Führe AI-Analyse durch...")
+                ai_analysis = self.analysis_batcher.analyze(
+                    analysis_image, analysis_content_type, job_data.get('priority', 0)
+                )
+                # Fallback-Ergebnisse (confidence 0) nicht cachen
+                if ai_analysis.get('confidence'):
+                    self.analysis_cache.put(content_hash, ai_analysis)
             
-            # 3. AI-Analyse durchführen
-            logger.info("🤖 Führe AI-Analyse durch...")
-            ai_analysis = self.ai.analyze_clothing_image(extracted_image_bytes)
+            local_colors = colors_future.result() if colors_future else None
+            ai_analysis = self.merge_local_colors(ai_analysis, local_colors)
             
             # 4. Verarbeitung als abgeschlossen markieren
             completed_item = self.db.complete_clothing_processing(
@@ -140,8 +267,12 @@ class ClothingProcessor:
                 season=ai_analysis['season'],
                 material=ai_analysis['material'],
                 occasion=ai_analysis['occasion'],
-                confidence=ai_analysis['confidence']
+                confidence=ai_analysis['confidence'],
+                thumbnail_url=uploaded['thumb'][1],
+                medium_image_url=uploaded['medium'][1],
+                color_palette=local_colors['palette'] if local_colors else None
             )
+            self.status_events.publish(user_id, clothing_id, ProcessingStatus.COMPLETED.value, completed_item)
             
             logger.info(f"✅ Verarbeitung abgeschlossen für: {clothing_id}")
             logger.info(f"🎯 Erkannt: {ai_analysis['category']} ({ai_analysis['color']}, {ai_analysis['style']})")
@@ -151,102 +282,289 @@ class ClothingProcessor:
         except Exception as e:
             logger.error(f"❌ Fehler bei der Verarbeitung von {clothing_id}: {e}")
             
-            # Fehler in DB markieren
-            try:
-                self.db.mark_processing_failed(clothing_id, str(e))
-            except Exception as db_error:
-                logger.error(f"❌ Zusätzlicher DB-Fehler: {db_error}")
+            # Fehlerklasse für die Retry-Policy merken
+            job_data['last_error'] = str(e)
+            job_data['error_class'] = classify_error(e)
+            if getattr(e, 'retry_after', None):
+                job_data['retry_after'] = e.retry_after
             
+            # Status in der DB erst nach der Retry-Entscheidung setzen (handle_failed_job)
             return False
     
-    def handle_failed_job(self, job_data: Dict[str, Any]) -> None:
+    def merge_local_colors(self, ai_analysis: Dict[str, Any],
+                           local_colors: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Ergänzt bzw. ersetzt die Farbe der AI durch die lokale Farbanalyse
+        
+        Args:
+            ai_analysis: Validiertes AI-Ergebnis
+            local_colors: Ergebnis von analyze_colors (None = deaktiviert)
+            
+        Returns:
+            AI-Ergebnis mit ggf. geänderter Farbe (Kopie)
+        """
+        if not local_colors:
+            return ai_analysis
+        
+        ai_color = ai_analysis['color']
+        use_local = ai_color == DEFAULTS['color'] or (
+            self.color_mode == 'override' and local_colors['confidence'] >= self.color_override_confidence
+        )
+        if not use_local or local_colors['color'] == ai_color:
+            return ai_analysis
+        
+        logger.info(f"🎨 Farbe lokal bestimmt: {ai_color} → {local_colors['color']} "
+                    f"(Anteil {local_colors['confidence']:.0%}, Muster {local_colors['pattern_score']:.2f})")
+        return {**ai_analysis, 'color': local_colors['color']}
+    
+    def handle_failed_job(self, job_data: Dict[str, Any]) -> bool:
         """
         Behandelt fehlgeschlagene Jobs (Retry-Logik)
         
+        Retries werden mit exponentiellem Backoff + Jitter im Sorted Set eingeplant
+        (Policy je Fehlerklasse), statt sofort wieder in die Queue zu gehen. Während eines
+        geplanten Retries bleibt der Status "processing" (Event "retrying"); erst wenn kein
+        Retry mehr folgt, wird das Kleidungsstück als fehlgeschlagen markiert.
+        
         Args:
             job_data: Fehlgeschlagene Job-Daten
+            
+        Returns:
+            True wenn der Job für einen Retry vorgemerkt wurde
         """
         retry_count = job_data.get('retry_count', 0)
-        max_retries = int(os.getenv('MAX_RETRIES', '3'))
+        error_class = job_data.get('error_class', ERROR_TRANSIENT)
+        policy = self.retry_policies.get(error_class, self.retry_policies[ERROR_TRANSIENT])
         
-        if retry_count < max_retries:
+        # retry-after von OpenAI gilt nur für diesen Versuch (nicht mit dem Job speichern)
+        retry_after = job_data.pop('retry_after', 0)
+        
+        if policy.should_retry(retry_count):
+            delay = max(policy.backoff(retry_count), retry_after)
+            
             # Retry-Count erhöhen
             job_data['retry_count'] = retry_count + 1
             job_data['retry_at'] = datetime.utcnow().isoformat()
             
-            # Zurück in die Retry-Queue
-            retry_json = json.dumps(job_data)
-            self.redis_client.rpush(self.retry_queue, retry_json)
+            # Verzögert erneut einplanen
+            self.queue.schedule_retry(job_data, delay)
+            
+            logger.warning(f"🔄 Job {job_data['clothing_id']} für Retry in {delay:.0f}s vorgemerkt "
+                           f"(Versuch {retry_count + 1}/{policy.max_retries}, Fehlerklasse: {error_class})")
+            self.status_events.publish(job_data['user_id'], job_data['clothing_id'], 'retrying',
+                                       error=job_data.get('last_error'))
+            return True
+        else:
+            logger.error(f"❌ Job {job_data['clothing_id']} endgültig fehlgeschlagen nach {retry_count} Retries "
+                         f"(Fehlerklasse: {error_class})")
+            self.mark_job_failed(job_data)
+            return False
+    
+    def mark_job_failed(self, job_data: Dict[str, Any]) -> None:
+        """
+        Markiert das Kleidungsstück eines endgültig fehlgeschlagenen Jobs in der DB
+        und veröffentlicht das "failed" Event
+        
+        Args:
+            job_data: Job-Daten mit last_error
+        """
+        clothing_id = job_data['clothing_id']
+        error_message = job_data.get('last_error') or "Unbekannter Fehler"
+        try:
+            failed_item = self.db.mark_processing_failed(clothing_id, error_message)
+            self.status_events.publish(job_data['user_id'], clothing_id, ProcessingStatus.FAILED.value,
+                                       failed_item, error=error_message)
+        except Exception as db_error:
+            logger.error(f"❌ Zusätzlicher DB-Fehler: {db_error}")
+    
+    def _fetch_next_job(self, timeout: int = 2) -> Optional[Tuple[bytes, Dict[str, Any]]]:
+        """
+        Holt den nächsten Job in die In-Flight-Liste dieses Workers
+        (Retry-Queue zuerst, dann Haupt-Queue)
+        
+        Args:
+            timeout: Blockierendes Warten in Sekunden
             
-            logger.warning(f"🔄 Job {job_data['clothing_id']} für Retry vorgemerkt (Versuch {retry_count + 1}/{max_retries})")
+        Returns:
+            Tuple (receipt, job_data) oder None wenn keine Jobs vorhanden
+        """
+        claimed = self.queue.claim_job(self.worker_id, timeout=timeout)
+        
+        if not claimed:
+            return None
+        
+        receipt, job_data = claimed
+        retry_count = job_data.get('retry_count', 0)
+        
+        if retry_count:
+            logger.info(f"🔄 Verarbeite Retry-Job: {job_data['clothing_id']} (Versuch {retry_count})")
         else:
-            logger.error(f"❌ Job {job_data['clothing_id']} endgültig fehlgeschlagen nach {max_retries} Versuchen")
+            logger.info(f"📦 Neuer Job empfangen: {job_data['clothing_id']}")
+        
+        return receipt, job_data
     
-    def process_retry_queue(self) -> None:
-        """Verarbeitet Jobs aus der Retry-Queue"""
+    def _execute_job(self, receipt: bytes, job_data: Dict[str, Any]) -> None:
+        """
+        Führt einen Job isoliert aus (läuft im Thread-Pool)
+        Fehler eines Jobs beeinflussen weder andere Jobs noch die Hauptschleife.
+        Der Job verlässt die In-Flight-Liste erst, wenn Erfolg oder Retry feststehen.
+        """
+        finished = True
         try:
-            # Retry-Job holen (mit Timeout)
-            retry_data = self.redis_client.blpop(self.retry_queue, timeout=1)
+            success = self.process_job(job_data)
             
-            if retry_data:
-                _, job_json = retry_data
-                job_data = json.loads(job_json)
+            if not success:
+                finished = not self.handle_failed_job(job_data)
                 
-                retry_count = job_data.get('retry_count', 0)
-                logger.info(f"🔄 Verarbeite Retry-Job: {job_data['clothing_id']} (Versuch {retry_count})")
+        except Exception as e:
+            logger.error(f"❌ Unerwarteter Fehler in Job {job_data.get('clothing_id')}: {e}")
+            job_data.setdefault('last_error', str(e))
+            try:
+                finished = not self.handle_failed_job(job_data)
+            except Exception as retry_error:
+                logger.error(f"❌ Retry konnte nicht vorgemerkt werden: {retry_error}")
+                # Job bleibt In-Flight und wird nach Ablauf der Lease vom Reaper zurückgelegt
+                return
+        
+        try:
+            self.queue.ack_job(self.worker_id, receipt, job_data['clothing_id'], finished=finished)
+        except Exception as e:
+            logger.error(f"❌ Job {job_data.get('clothing_id')} konnte nicht bestätigt werden: {e}")
+    
+    def sweep_orphaned_items(self) -> int:
+        """
+        Legt pending Kleidungsstücke ohne Queue-Eintrag neu in die Queue
+        (z.B. API-Absturz zwischen DB-Insert und Enqueue)
+        
+        Returns:
+            Anzahl neu eingereihter Jobs
+        """
+        requeued = 0
+        now = datetime.now(timezone.utc)
+        
+        for item in self.db.get_pending_clothing_items(limit=100):
+            created_at = datetime.fromisoformat(item['created_at'].replace('Z', '+00:00'))
+            if (now - created_at).total_seconds() < self.orphan_min_age:
+                continue
+            
+            if self.queue.is_tracked(item['id']):
+                continue
+            
+            storage_path = self.storage.path_from_public_url(item['image_url'], self.storage.original_bucket)
+            if not storage_path:
+                logger.warning(f"⚠️ Storage-Pfad für {item['id']} nicht ermittelbar - übersprungen")
+                continue
+            
+            added = self.add_job(
+                clothing_id=item['id'],
+                user_id=item['user_id'],
+                storage_path=storage_path,
+                file_name=item.get('original_filename') or os.path.basename(storage_path),
+                content_type=mimetypes.guess_type(storage_path)[0] or 'image/jpeg'
+            )
+            if added:
+                requeued += 1
+        
+        if requeued:
+            logger.warning(f"♻️ {requeued} verwaiste pending Kleidungsstücke neu eingereiht")
+        return requeued
+    
+    def _maintenance_loop(self) -> None:
+        """
+        Hintergrund-Thread: Heartbeat (Lease verlängern), Mover für fällige Retries,
+        Reaper für abgelaufene Leases und Sweep verwaister pending Einträge.
+        Läuft bis nach dem Drain weiter, damit die Lease laufender Jobs nicht abläuft.
+        """
+        last_heartbeat = 0.0
+        last_reap = 0.0
+        last_sweep = 0.0
+        
+        while not self._stopped.wait(1):
+            try:
+                now = time.monotonic()
+                if now - last_heartbeat >= self.heartbeat_interval:
+                    last_heartbeat = now
+                    self.queue.heartbeat(self.worker_id)
+                
+                if self._shutdown.is_set():
+                    continue
+                
+                self.queue.promote_due_jobs()
                 
-                # Job erneut verarbeiten
-                success = self.process_job(job_data)
+                if now - last_reap >= self.reaper_interval:
+                    last_reap = now
+                    self.queue.requeue_expired_leases()
                 
-                if not success:
-                    self.handle_failed_job(job_data)
+                if now - last_sweep >= self.orphan_sweep_interval:
+                    last_sweep = now
+                    self.sweep_orphaned_items()
                     
-        except Exception as e:
-            logger.error(f"❌ Fehler bei Retry-Queue Verarbeitung: {e}")
+            except Exception as e:
+                logger.error(f"❌ Fehler im Maintenance-Thread: {e}")
+    
+    def _handle_shutdown_signal(self, signum, frame) -> None:
+        """Signal-Handler für SIGTERM/SIGINT: keine neuen Jobs mehr annehmen"""
+        if not self._shutdown.is_set():
+            logger.info(f"🛑 Signal {signum} empfangen - laufende Jobs werden abgeschlossen...")
+            self._shutdown.set()
     
     def run(self) -> None:
         """
         Hauptschleife des Workers
-        Wartet auf Jobs und verarbeitet sie
+        Wartet auf Jobs und verarbeitet bis zu WORKER_CONCURRENCY Jobs parallel
         """
-        logger.info("🚀 Worker gestartet - Warte auf Jobs...")
+        logger.info(f"🚀 Worker gestartet (Concurrency: {self.concurrency}, "
+                    f"Bildprozesse: {self.image_workers}) - Warte auf Jobs...")
         
         # Health Check der Services
         if not self._health_check():
             logger.error("❌ Health Check fehlgeschlagen - Worker wird beendet")
             sys.exit(1)
         
-        while True:
-            try:
-                # Retry-Queue zuerst verarbeiten
-                self.process_retry_queue()
-                
-                # Haupt-Queue verarbeiten (blockierend mit Timeout)
-                job_data = self.redis_client.blpop(self.queue_name, timeout=5)
+        signal.signal(signal.SIGTERM, self._handle_shutdown_signal)
+        signal.signal(signal.SIGINT, self._handle_shutdown_signal)
+        
+        # Lease + Heartbeat: In-Flight-Jobs überleben Abstürze dieses Prozesses
+        self.queue.register_worker(self.worker_id)
+        maintenance = threading.Thread(target=self._maintenance_loop, name="maintenance", daemon=True)
+        maintenance.start()
+        
+        # Ein freier Slot pro parallelem Job
+        slots = threading.BoundedSemaphore(self.concurrency)
+        
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="job") as executor:
+            while not self._shutdown.is_set():
+                # Auf freien Slot warten, bevor ein Job aus der Queue genommen wird
+                if not slots.acquire(timeout=1):
+                    continue
                 
-                if job_data:
-                    # Job aus Queue holen
-                    _, job_json = job_data
-                    job_data_dict = json.loads(job_json)
-                    
-                    clothing_id = job_data_dict['clothing_id']
-                    logger.info(f"📦 Neuer Job empfangen: {clothing_id}")
-                    
-                    # Job verarbeiten
-                    success = self.process_job(job_data_dict)
-                    
-                    if not success:
-                        self.handle_failed_job(job_data_dict)
+                try:
+                    claimed = self._fetch_next_job()
+                except Exception as e:
+                    slots.release()
+                    logger.error(f"❌ Unerwarteter Fehler in Worker-Schleife: {e}")
+                    self._shutdown.wait(5)  # Längere Pause bei Fehlern
+                    continue
                 
-                # Kurze Pause zwischen Iterationen
-                time.sleep(0.1)
+                if not claimed:
+                    slots.release()
+                    continue
                 
-            except KeyboardInterrupt:
-                logger.info("🛑 Worker wird beendet (Ctrl+C)")
-                break
-            except Exception as e:
-                logger.error(f"❌ Unerwarteter Fehler in Worker-Schleife: {e}")
-                time.sleep(5)  # Längere Pause bei Fehlern
+                receipt, job_data = claimed
+                future = executor.submit(self._execute_job, receipt, job_data)
+                future.add_done_callback(lambda _: slots.release())
+            
+            # Graceful Drain: Executor wartet beim Verlassen auf alle laufenden Jobs
+            logger.info("⏳ Warte auf laufende Jobs...")
+        
+        self._stopped.set()
+        maintenance.join(timeout=5)
+        self.analysis_batcher.close()
+        self.ai.close()
+        self.image_pool.shutdown()
+        self.queue.unregister_worker(self.worker_id)
+        
+        logger.info("🛑 Worker beendet")
     
     def _health_check(self) -> bool:
         """
@@ -285,22 +603,7 @@ class ClothingProcessor:
         Returns:
             Dict mit Queue-Statistiken
         """
-        try:
-            main_queue_length = self.redis_client.llen(self.queue_name)
-            retry_queue_length = self.redis_client.llen(self.retry_queue)
-            
-            return {
-                'main_queue_length': main_queue_length,
-                'retry_queue_length': retry_queue_length,
-                'total_pending': main_queue_length + retry_queue_length,
-                'timestamp': datetime.utcnow().isoformat()
-            }
-        except Exception as e:
-            logger.error(f"❌ Fehler beim Holen der Queue-Stats: {e}")
-            return {
-                'error': str(e),
-                'timestamp': datetime.utcnow().isoformat()
-            }
+        return self.queue.get_queue_stats()
 
 
 def main():
@@ -314,7 +617,7 @@ def main():
     - AI-Analyse 
     - Database-Updates
     
-    Drücken Sie Ctrl+C zum Beenden.
+    Drücken Sie Ctrl+C zum Beenden (laufende Jobs werden abgeschlossen).
     """)
     
     # Worker erstellen und starten